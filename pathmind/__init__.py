@@ -1,2 +1,16 @@
+from .async_simulation import *
+from .cache import *
+from .data import *
+from .distributed import *
+from .evaluation import *
+from .gym_env import *
+from .kernels import *
+from .memory import *
+from .metrics import *
+from .pacing import *
 from .policy import *
+from .policy_server import *
 from .simulation import *
+from .store import *
+from .sweep import *
+from .transport import *
@@ -0,0 +1,261 @@
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from prettytable import PrettyTable
+
+from pathmind.simulation import (
+    Continuous,
+    Discrete,
+    Simulation,
+    _Generators,
+    _ObservedSimulation,
+    _summary_fields,
+    seed_episode,
+    write_table,
+)
+
+__all__ = ["AsyncSimulation", "run_async", "rollout"]
+
+
+class AsyncSimulation(_Generators):
+    """Pathmind's asynchronous Python interface, for simulations that wait on I/O, e.g. on
+    databases or external solvers, while stepping.
+
+    It mirrors `Simulation`, except that "reset", "step", "get_observation", "get_reward",
+    "is_done" and "decision_mask" are coroutines. Run it with `run_async`, which keeps several
+    simulations in flight, so that the policy computes actions for one simulation while others
+    are stepping.
+    """
+
+    action: Dict[int, Union[float, np.ndarray]] = None
+
+    def number_of_agents(self) -> int:
+        """Returns the total number of agents to be controlled by Pathmind."""
+        raise NotImplementedError
+
+    def action_space(self, agent_id: int) -> Union[Continuous, Discrete]:
+        """Return a Discrete or Continuous action space per agent."""
+        raise NotImplementedError
+
+    def action_spaces(
+        self, agent_ids: Optional[List[int]] = None
+    ) -> List[Union[Continuous, Discrete]]:
+        """Action spaces of all agents, or of the given ones."""
+        if agent_ids is None:
+            agent_ids = range(self.number_of_agents())
+        return [self.action_space(i) for i in agent_ids]
+
+    async def step(self) -> None:
+        """Carry out the next time-step of your simulation, using 'self.action'."""
+        raise NotImplementedError
+
+    async def reset(self) -> None:
+        """Reset your simulation parameters."""
+        raise NotImplementedError
+
+    async def get_reward(self, agent_id: int) -> Dict[str, float]:
+        """Get reward terms as a dictionary per agent."""
+        raise NotImplementedError
+
+    async def get_observation(
+        self, agent_id: int
+    ) -> Dict[str, Union[float, List[float]]]:
+        """Get a dictionary of observations per agent."""
+        raise NotImplementedError
+
+    async def is_done(self, agent_id: int) -> bool:
+        """Has this agent reached its target?"""
+        raise NotImplementedError
+
+    async def decision_mask(self) -> Optional[List[bool]]:
+        """Which agents need a decision in the current step, like `Simulation.decision_mask`.
+        By default, all agents that aren't done yet do."""
+        return None
+
+
+class SyncAdapter(AsyncSimulation):
+    """Run a regular `Simulation` with `run_async`. Its "step" runs in a worker thread,
+    so that it overlaps with other simulations and with policy inference."""
+
+    def __init__(self, simulation: Simulation, executor: ThreadPoolExecutor):
+        self.simulation = simulation
+        self.executor = executor
+
+    def number_of_agents(self) -> int:
+        return self.simulation.number_of_agents()
+
+    def action_space(self, agent_id: int) -> Union[Continuous, Discrete]:
+        return self.simulation.action_space(agent_id)
+
+    def action_spaces(
+        self, agent_ids: Optional[List[int]] = None
+    ) -> List[Union[Continuous, Discrete]]:
+        return self.simulation.action_spaces(agent_ids)
+
+    async def step(self) -> None:
+        self.simulation.action = self.action
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.simulation.step)
+
+    async def reset(self) -> None:
+        self.simulation.reset()
+
+    async def get_reward(self, agent_id: int) -> Dict[str, float]:
+        return self.simulation.get_reward(agent_id)
+
+    async def get_observation(
+        self, agent_id: int
+    ) -> Dict[str, Union[float, List[float]]]:
+        return self.simulation.get_observation(agent_id)
+
+    async def is_done(self, agent_id: int) -> bool:
+        return self.simulation.is_done(agent_id)
+
+    async def decision_mask(self) -> Optional[List[bool]]:
+        return self.simulation.decision_mask()
+
+
+class _AsyncObservedSimulation(_ObservedSimulation):
+    """The view of an AsyncSimulation a policy gets in `rollout`. The policy runs in a
+    worker thread, so it can wait for the observations of agents without a decision on
+    the event loop."""
+
+    def __init__(self, simulation, observations, agent_ids, loop):
+        super().__init__(simulation, observations, agent_ids)
+        self.loop = loop
+
+    def get_observation(self, agent_id: int) -> Dict[str, Union[float, List[float]]]:
+        if agent_id in self.observations_by_id:
+            return self.observations_by_id[agent_id]
+        observation = self.simulation.get_observation(agent_id)
+        return asyncio.run_coroutine_threadsafe(observation, self.loop).result()
+
+
+async def rollout(
+    simulations: List[Union[Simulation, AsyncSimulation]],
+    policy=None,
+    num_episodes: int = 1,
+    seed: Optional[int] = None,
+) -> PrettyTable:
+    """Coroutine version of `run_async`, e.g. for use in an already running event loop."""
+    if not policy:
+        from pathmind.policy import Random
+
+        policy = Random()
+
+    executor = ThreadPoolExecutor(max_workers=max(2 * len(simulations), 1))
+    simulations = [
+        SyncAdapter(sim, executor) if isinstance(sim, Simulation) else sim
+        for sim in simulations
+    ]
+
+    await simulations[0].reset()
+    num_agents = simulations[0].number_of_agents()
+    agents = range(num_agents)
+    rewards = [await simulations[0].get_reward(i) for i in agents]
+    summary = PrettyTable()
+    summary.field_names = ["Episode"] + _summary_fields(rewards)
+
+    episodes = iter(range(num_episodes))
+    results = {}
+
+    async def worker(simulation: AsyncSimulation):
+        loop = asyncio.get_running_loop()
+        # A copy per simulation, so that seeding it doesn't affect the other episodes
+        own_policy = copy.copy(policy)
+        if isinstance(simulation, SyncAdapter):
+            state_of = simulation.simulation
+        else:
+            state_of = simulation
+        for episode in episodes:
+            if seed is not None:
+                # Simulations step concurrently, so only seed their own generators
+                seed_episode(own_policy, seed, episode, state_of, global_state=False)
+            await simulation.reset()
+            active = np.ones(num_agents, dtype=bool)
+            dones = [False] * num_agents
+            rewards = [None] * num_agents
+            while active.any():
+                # Only agents that aren't done and need a decision get observed and acted for
+                mask = await simulation.decision_mask()
+                deciding = (
+                    active if mask is None else active & np.asarray(mask, dtype=bool)
+                )
+                agent_ids = np.flatnonzero(deciding).tolist()
+                observations = await asyncio.gather(
+                    *[simulation.get_observation(i) for i in agent_ids]
+                )
+
+                actions = {}
+                if observations:
+                    ids = None if deciding.all() else agent_ids
+                    if isinstance(simulation, SyncAdapter):
+                        state = _ObservedSimulation(state_of, observations, ids)
+                    else:
+                        state = _AsyncObservedSimulation(
+                            simulation, observations, ids, loop
+                        )
+                    # Inference runs in a thread, other simulations keep stepping meanwhile
+                    actions = await loop.run_in_executor(
+                        executor, own_policy.get_actions, state
+                    )
+                    actions = {i: actions[i] for i in agent_ids if i in actions}
+                simulation.action = actions
+                await simulation.step()
+
+                # Agents that are done keep their last rewards and aren't asked again
+                active_ids = np.flatnonzero(active).tolist()
+                active_dones, active_rewards = await asyncio.gather(
+                    asyncio.gather(*[simulation.is_done(i) for i in active_ids]),
+                    asyncio.gather(*[simulation.get_reward(i) for i in active_ids]),
+                )
+                for i, done, reward in zip(active_ids, active_dones, active_rewards):
+                    dones[i], rewards[i] = done, reward
+                active = ~np.asarray(dones, dtype=bool)
+
+            terms = await asyncio.gather(*[simulation.get_reward(i) for i in agents])
+            results[episode] = [v for reward in terms for v in reward.values()]
+            print(f"--------Finished episode {episode}--------")
+
+    try:
+        await asyncio.gather(*[worker(simulation) for simulation in simulations])
+    finally:
+        executor.shutdown(wait=False)
+
+    for episode in sorted(results):
+        summary.add_row([episode] + results[episode])
+    return summary
+
+
+def run_async(
+    simulations: List[Union[Simulation, AsyncSimulation]],
+    policy=None,
+    num_episodes: int = 1,
+    summary_csv: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> PrettyTable:
+    """Run episodes on several independent simulation instances concurrently.
+
+    Each simulation runs one episode after the other, taking the next episode number
+    from a shared counter, until "num_episodes" are done. While a simulation awaits its
+    step, the others can step or get actions from the policy, so neither the CPU nor the
+    policy sits idle. Regular `Simulation` instances are supported, too. Like in
+    `Simulation.run`, only agents that aren't done and need a decision are observed and
+    passed to the policy.
+
+    :param simulations: instances of the same AsyncSimulation or Simulation.
+    :param policy: A Pathmind Policy (local, server, or random). Default is random.
+    :param num_episodes: the total number of episodes to run over all simulations.
+    :param summary_csv: If you specify a summary CSV file, a summary of reward terms over all episodes will be
+        stored in that file.
+    :param seed: Optionally seed every episode with a seed derived from this one and the episode number. Since
+        simulations step concurrently, only random numbers drawn from their "np_random" and "py_random" are
+        reproducible, not those drawn from the global random number generators.
+    :return: the summary table of reward terms per episode.
+    """
+    summary = asyncio.run(rollout(simulations, policy, num_episodes, seed))
+    write_table(table=summary, out_csv=summary_csv)
+    return summary
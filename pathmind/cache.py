@@ -0,0 +1,110 @@
+import hashlib
+import inspect
+import os
+import pickle
+from typing import List, Optional
+
+from pathmind.data import CACHE_DIR, _atomic_write, file_hash
+
+__all__ = ["RolloutCache"]
+
+_UNHASHED = ("action", "_batch_cache", "_np_random", "_py_random")
+
+
+class RolloutCache:
+    """On-disk cache of rollout results, which lets `Simulation.run` return instantly
+    when it runs an evaluation it has run before.
+
+    Results are keyed by a hash of the source code of the simulation class, the state of
+    the simulation after "reset", the identity of the policy (see `Policy.cache_key`), and
+    all arguments of "run" that change its results, like the number of episodes and the
+    seed. Note that a cached rollout only reproduces a fresh one if the rollout is
+    deterministic, e.g. because you pass a "seed" to "run".
+
+    Once the cache exceeds "max_bytes", the least recently used results are evicted.
+
+    :param path: optional cache folder, defaults to "rollouts" in "PATHMIND_CACHE_DIR" or "~/.cache/pathmind".
+    :param max_bytes: maximum total size of all cached results.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 1 << 30):
+        cache_dir = os.environ.get("PATHMIND_CACHE_DIR", CACHE_DIR)
+        self.path = path or os.path.join(cache_dir, "rollouts")
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, simulation, policy, **options) -> str:
+        """Hash everything that determines the results of a rollout."""
+        sha = hashlib.sha256()
+        for cls in type(simulation).__mro__:
+            if cls.__module__ in ("builtins", "pathmind.simulation"):
+                continue
+            try:
+                sha.update(inspect.getsource(cls).encode())
+            except (OSError, TypeError):
+                sha.update(cls.__qualname__.encode())
+        # The actions and cached values of the last step, and the random number generators
+        # seeded per episode, don't configure the simulation
+        state = {
+            name: value
+            for name, value in vars(simulation).items()
+            if name not in _UNHASHED
+        }
+        sha.update(_state_hash(state).encode())
+
+        if hasattr(policy, "cache_key"):
+            sha.update(policy.cache_key().encode())
+        else:
+            sha.update(_state_hash(policy).encode())
+
+        for name, value in sorted(options.items()):
+            sha.update(f"{name}={_option_hash(value)}".encode())
+        return sha.hexdigest()
+
+    def get(self, key: str) -> Optional[list]:
+        """Return the cached results for a key, if there are any."""
+        file = self._file(key)
+        try:
+            with open(file, "rb") as f:
+                results = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        # Mark as recently used
+        os.utime(file)
+        return results
+
+    def put(self, key: str, results: list) -> None:
+        data = pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+        _atomic_write(self._file(key), lambda f: f.write(data), self.path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries: List[os.DirEntry] = [
+            entry for entry in os.scandir(self.path) if entry.name.endswith(".pkl")
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        # Never evict the most recent entry, even if it exceeds the limit by itself
+        for entry in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pkl")
+
+
+def _state_hash(state) -> str:
+    try:
+        return hashlib.sha256(pickle.dumps(state)).hexdigest()
+    except Exception:
+        return repr(state)
+
+
+def _option_hash(value) -> str:
+    if isinstance(value, str) and os.path.isfile(value):
+        return file_hash(value)
+    if value is None or isinstance(value, (int, float, str, bool)):
+        return repr(value)
+    return _state_hash(vars(value) if hasattr(value, "__dict__") else value)
@@ -0,0 +1,220 @@
+import hashlib
+import os
+import tempfile
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import yaml
+
+__all__ = ["load_columns", "TimeSeries"]
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pathmind")
+
+
+def load_columns(
+    path: str, loader: Optional[Callable] = None, cache_dir: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """Load a tabular data file as a dictionary of read-only NumPy columns.
+
+    The file is parsed only once. Its columns are stored as ".npy" files in a cache
+    folder keyed by the hash of the file content, and every subsequent call, e.g. from
+    each of your simulation worker processes, memory-maps these columns instead. All
+    processes then share the same pages in memory, and attaching takes milliseconds.
+
+    :param path: the data file to load, e.g. an Excel or CSV file.
+    :param loader: optional callable that parses "path" into a pandas DataFrame or a dictionary
+        of arrays. Defaults to pandas' "read_excel" or "read_csv", depending on the file extension.
+    :param cache_dir: optional cache folder, defaults to "PATHMIND_CACHE_DIR" or "~/.cache/pathmind".
+    :return: a dictionary of column names to read-only, memory-mapped NumPy arrays.
+    """
+    loader = loader or _default_loader(path)
+    cache_dir = cache_dir or os.environ.get("PATHMIND_CACHE_DIR", CACHE_DIR)
+    folder = os.path.join(cache_dir, "data", _cache_key(path, loader))
+
+    index_file = os.path.join(folder, "index.yaml")
+    if not os.path.exists(index_file):
+        _write_columns(folder, _to_columns(loader(path)))
+
+    with open(index_file) as f:
+        names = yaml.safe_load(f).get("columns")
+    return {
+        name: np.load(os.path.join(folder, f"{i}.npy"), mmap_mode="r")
+        for i, name in enumerate(names)
+    }
+
+
+class TimeSeries:
+    """Values indexed by sorted timestamps, for simulations that look up data by time.
+
+    All lookups use binary search on the timestamp index, so each of them costs O(log n)
+    instead of scanning the whole data set. Timestamps can be datetimes (Python, NumPy or
+    pandas) or plain numbers. Every lookup accepts a single timestamp or an array of them.
+
+    For instance, TimeSeries(dates, prices).asof(now) returns the last known price at time
+    "now", and .at(now, default=0.0) only returns a price for exact matches.
+    """
+
+    def __init__(self, timestamps, values, assume_sorted: bool = False):
+        timestamps = np.asarray(timestamps)
+        values = np.asarray(values)
+        if len(timestamps) != len(values):
+            raise ValueError(
+                f"Got {len(timestamps)} timestamps, but {len(values)} values."
+            )
+
+        self.is_datetime = np.issubdtype(timestamps.dtype, np.datetime64)
+        keys = self._keys(timestamps)
+        if not assume_sorted and np.any(keys[1:] < keys[:-1]):
+            order = np.argsort(keys, kind="stable")
+            keys, values = keys[order], values[order]
+        self.keys = keys
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """The sorted timestamp index."""
+        return self.keys.view("datetime64[ns]") if self.is_datetime else self.keys
+
+    def at(self, time, default=np.nan):
+        """Value at exactly the given time, or "default" if there's no such timestamp."""
+        keys = self._keys(time)
+        idx = np.searchsorted(self.keys, keys, side="left")
+        found = idx < len(self.keys)
+        found[found] = self.keys[idx[found]] == keys[found]
+        return self._result(time, idx, found, default)
+
+    def asof(self, time, default=np.nan):
+        """Last value at or before the given time, or "default" before the first timestamp."""
+        idx = np.searchsorted(self.keys, self._keys(time), side="right") - 1
+        return self._result(time, idx, idx >= 0, default)
+
+    def interpolate(self, time):
+        """Linearly interpolated value at the given time, clamped to the first and last value."""
+        if not len(self.keys):
+            raise ValueError("Can't interpolate an empty time series.")
+        keys = self._keys(time)
+        if len(self.keys) == 1:
+            result = np.full(keys.shape, self.values[0])
+            return result if np.ndim(time) else result.item()
+        upper = np.clip(np.searchsorted(self.keys, keys), 1, len(self.keys) - 1)
+        lower = upper - 1
+        span = (self.keys[upper] - self.keys[lower]).astype(np.float64)
+        fraction = np.clip((keys - self.keys[lower]) / np.maximum(span, 1), 0.0, 1.0)
+        result = self.values[lower] + fraction * (
+            self.values[upper] - self.values[lower]
+        )
+        return result if np.ndim(time) else result.item()
+
+    def window(self, start, end) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and values in the half-open interval [start, end), as views."""
+        lower, upper = np.searchsorted(self.keys, self._keys([start, end]))
+        return self.timestamps[lower:upper], self.values[lower:upper]
+
+    def _keys(self, time) -> np.ndarray:
+        if self.is_datetime:
+            # A view, so that memory-mapped timestamps aren't copied
+            time = np.asarray(time, dtype="datetime64[ns]").view(np.int64)
+        return np.atleast_1d(np.asarray(time))
+
+    def _result(self, time, idx, found, default):
+        if not len(self.keys):
+            return np.full(found.shape, default) if np.ndim(time) else default
+        result = np.where(found, self.values[np.where(found, idx, 0)], default)
+        return result if np.ndim(time) else result.item()
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 hex digest of a file's content."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def directory_hash(path: str) -> str:
+    """Compute the SHA-256 hex digest of all file names and contents in a folder."""
+    sha = hashlib.sha256()
+    for root, folders, names in os.walk(path):
+        folders.sort()
+        for name in sorted(names):
+            file = os.path.join(root, name)
+            sha.update(os.path.relpath(file, path).encode())
+            sha.update(file_hash(file).encode())
+    return sha.hexdigest()
+
+
+def _cache_key(path: str, loader: Callable) -> str:
+    loader_name = f"{loader.__module__}.{getattr(loader, '__qualname__', loader)}"
+    sha = hashlib.sha256(file_hash(path).encode())
+    sha.update(loader_name.encode())
+    return sha.hexdigest()
+
+
+def _default_loader(path: str) -> Callable:
+    import pandas as pd
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in [".xls", ".xlsx"]:
+        return pd.read_excel
+    elif extension == ".csv":
+        return pd.read_csv
+    raise ValueError(
+        f"No default loader for '{extension}' files, please provide a 'loader'."
+    )
+
+
+def _to_columns(data) -> Dict[str, np.ndarray]:
+    columns = {}
+    for name in data.keys():
+        column = np.asarray(data[name])
+        if column.dtype == object:
+            # Python objects can't be memory-mapped, store them as fixed-width strings
+            column = column.astype(str)
+        columns[str(name)] = column
+    return columns
+
+
+def _write_columns(folder: str, columns: Dict[str, np.ndarray]) -> None:
+    """Write all columns first and the index last, each via an atomic rename, so that
+    concurrent readers only ever see a complete cache entry."""
+    os.makedirs(folder, exist_ok=True)
+    for i, column in enumerate(columns.values()):
+        _atomic_write(
+            os.path.join(folder, f"{i}.npy"), lambda f: np.save(f, column), folder
+        )
+    index = yaml.dump({"columns": list(columns.keys())})
+    _atomic_write(
+        os.path.join(folder, "index.yaml"), lambda f: f.write(index.encode()), folder
+    )
+
+
+def _atomic_write(
+    target: str, write: Callable, folder: str, fsync: bool = False
+) -> None:
+    fd, tmp = tempfile.mkstemp(dir=folder)
+    with os.fdopen(fd, "wb") as f:
+        write(f)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, target)
+    if fsync:
+        _fsync_folder(folder)
+
+
+def _fsync_folder(folder: str) -> None:
+    """Make renames and new files in a folder durable, where the platform supports it."""
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
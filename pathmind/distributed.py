@@ -0,0 +1,375 @@
+import argparse
+import importlib
+import os
+import pickle
+import random
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing.managers import BaseManager
+from typing import Dict, Optional, Tuple, Type, Union
+
+from prettytable import PrettyTable
+
+from pathmind.simulation import (
+    ObservationFilter,
+    Simulation,
+    _define_tables,
+    _EpisodeCollector,
+    _row_template,
+    _run_episode,
+    write_table,
+)
+
+__all__ = ["Coordinator", "run_worker"]
+
+
+class Coordinator:
+    """Spreads the episodes of a rollout over workers on several machines.
+
+    The coordinator serves a work queue over TCP. Every worker, started with
+    `run_worker` or "python -m pathmind.distributed HOST:PORT", imports the simulation
+    by its dotted path, so your code has to be installed on all machines, and then
+    leases one episode number and seed after the other until the rollout is complete.
+    Workers send a heartbeat while they run an episode. If a worker stops sending them
+    for "timeout" seconds, e.g. since its machine went down, its episode is handed to
+    the next worker that asks for work. Once all workers that connected are lost, the
+    rollout fails rather than waiting for new ones.
+
+    The policy has to be picklable. A Local policy loads its model from "model_file" on
+    every worker, so the exported model has to be available there as well.
+
+        with Coordinator(MySim, policy, num_episodes=1000, address=("", 5000)) as coordinator:
+            print(coordinator.authkey.decode())
+            # start "PATHMIND_AUTHKEY=<authkey> python -m pathmind.distributed coordinator-host:5000"
+            # on each machine
+            coordinator.run(summary_csv="summary.csv")
+
+    Coordinator and workers exchange pickles, so anyone who knows the authkey and can reach
+    the address can run code on them. The coordinator only listens on the loopback interface,
+    unless you pass a host like "" for all interfaces, and generates a random authkey,
+    unless you pass one.
+
+    :param simulation: your Simulation class, or its dotted path like "my_package.my_module.MySim".
+    :param policy: A Pathmind Policy (local, server, or random). Default is random. It is pickled and sent to
+        all workers.
+    :param num_episodes: the number of episodes to run rollouts for.
+    :param seed: the seed from which all episode seeds are derived. Defaults to a random one.
+    :param simulation_kwargs: optional keyword arguments to construct the simulation with.
+    :param observation_yaml: Optionally only compute and pass to the policy the observations selected in
+        this obs.yaml. It is only read on the coordinator.
+    :param address: the (host, port) to listen on. Port 0 picks a free port.
+    :param authkey: secret workers need to know to connect. Defaults to a random one, see "authkey".
+    :param timeout: seconds without a heartbeat after which a worker counts as lost.
+    """
+
+    def __init__(
+        self,
+        simulation: Union[str, Type[Simulation]],
+        policy=None,
+        num_episodes: int = 1,
+        seed: Optional[int] = None,
+        simulation_kwargs: Optional[Dict] = None,
+        observation_yaml: Optional[str] = None,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        authkey: Optional[bytes] = None,
+        timeout: float = 60.0,
+    ):
+        if not policy:
+            # Don't move the import statement. This prevents a circular import.
+            from pathmind.policy import Random
+
+            print("Running with Random Actions")
+            policy = Random()
+
+        if not isinstance(simulation, str):
+            simulation = str(simulation).split("'")[1]
+        self.simulation = simulation
+        self.simulation_kwargs = simulation_kwargs or {}
+        self.num_episodes = num_episodes
+        self.observation_filter = ObservationFilter.from_yaml(observation_yaml)
+        spec = {
+            "simulation": simulation,
+            "simulation_kwargs": self.simulation_kwargs,
+            "policy": pickle.dumps(policy),
+            "observation_filter": self.observation_filter,
+            "seed": random.getrandbits(32) if seed is None else seed,
+            "timeout": timeout,
+        }
+        # Printable, so that it can be passed to workers in PATHMIND_AUTHKEY
+        self.authkey = authkey or secrets.token_hex(16).encode()
+        self.manager = _CoordinatorManager(address=address, authkey=self.authkey)
+        self.manager.start(_init_queue, (spec, num_episodes))
+        self.queue = self.manager.work_queue()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """The address workers connect to."""
+        return self.manager.address
+
+    def run(
+        self,
+        out_csv: Optional[str] = None,
+        summary_csv: Optional[str] = None,
+        stopping=None,
+        store: Optional[str] = None,
+        deadline: Optional[float] = None,
+    ) -> PrettyTable:
+        """Wait for the workers to complete all episodes, and collect their results like
+        `Simulation.run` does.
+
+        :param out_csv: If you specify an output CSV file, complete results of all episodes will be stored there.
+        :param summary_csv: If you specify a summary CSV file, a summary of reward terms over all episodes will be
+            stored in that file.
+        :param stopping: Optionally stop early, once the reward terms selected by this StoppingRule are estimated
+            precisely enough.
+        :param store: Optionally append the complete results of every episode to an EpisodeStore in this folder.
+        :param deadline: Optionally fail with a TimeoutError, if the rollout doesn't complete within this many
+            seconds.
+        :return: the summary table of reward terms per episode.
+        """
+        from pathmind.store import EpisodeStore
+
+        simulation = _import_simulation(self.simulation)(**self.simulation_kwargs)
+        simulation.reset()
+        agents = range(simulation.number_of_agents())
+        table, summary = _define_tables(simulation, agents)
+        collector = _EpisodeCollector(
+            table,
+            summary,
+            num_agents=len(agents),
+            stopping=stopping,
+            store=EpisodeStore(store) if store else None,
+            store_template=(
+                _row_template(simulation, self.observation_filter) if store else None
+            ),
+        )
+        try:
+            collector.collect(self._results(deadline))
+        finally:
+            # Idle workers exit with their next request for work
+            self.queue.close()
+
+        write_table(table=table, out_csv=out_csv)
+        write_table(table=summary, out_csv=summary_csv)
+        return summary
+
+    def shutdown(self) -> None:
+        """Stop serving the work queue."""
+        self.manager.shutdown()
+
+    def __enter__(self) -> "Coordinator":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def _results(self, deadline: Optional[float]):
+        end = None if deadline is None else time.monotonic() + deadline
+        for episode in range(self.num_episodes):
+            result = self.queue.result(episode)
+            while result is None:
+                if end is not None and time.monotonic() > end:
+                    raise TimeoutError(
+                        f"The rollout didn't complete within {deadline} seconds, "
+                        f"{self.queue.completed()} of {self.num_episodes} episodes completed."
+                    )
+                if self.queue.all_lost():
+                    raise RuntimeError(
+                        f"Lost all workers, {self.queue.completed()} of "
+                        f"{self.num_episodes} episodes completed."
+                    )
+                result = self.queue.result(episode)
+            yield result
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes, poll: float = 0.5) -> int:
+    """Run episodes leased from a Coordinator until its rollout is complete.
+
+    :param address: the (host, port) of the coordinator.
+    :param authkey: the secret the coordinator was started with.
+    :param poll: seconds to wait before asking again, if all remaining episodes are leased to other workers.
+    :return: the number of episodes this worker completed.
+    """
+    manager = _WorkerManager(address=address, authkey=authkey)
+    manager.connect()
+    queue = manager.work_queue()
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+
+    spec = queue.spec()
+    simulation = _import_simulation(spec["simulation"])(**spec["simulation_kwargs"])
+    policy = pickle.loads(spec["policy"])
+
+    stopped = threading.Event()
+    heartbeats = threading.Thread(
+        target=_send_heartbeats,
+        args=(queue, worker, spec["timeout"] / 4, stopped),
+        daemon=True,
+    )
+    heartbeats.start()
+
+    completed = 0
+    try:
+        while True:
+            try:
+                task = queue.lease(worker)
+            except (EOFError, OSError):
+                # The coordinator is gone, there's nothing left to do
+                break
+            if task is None:
+                break
+            if not task:
+                time.sleep(poll)
+                continue
+
+            episode, seed = task
+            rows, terms = _run_episode(
+                simulation,
+                policy,
+                episode,
+                seed=seed,
+                observation_filter=spec["observation_filter"],
+            )
+            queue.complete(worker, episode, rows, terms)
+            completed += 1
+    finally:
+        stopped.set()
+    return completed
+
+
+class _WorkQueue:
+    """State of a distributed rollout, living in the coordinator's server process. All
+    methods are called from the server's connection threads."""
+
+    def __init__(self, spec: dict, num_episodes: int):
+        self._spec = spec
+        self.num_episodes = num_episodes
+        self.pending = deque(range(num_episodes))
+        self.leases: Dict[int, str] = {}
+        self.heartbeats: Dict[str, float] = {}
+        self.results: Dict[int, tuple] = {}
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def spec(self) -> dict:
+        return self._spec
+
+    def lease(self, worker: str):
+        """The next (episode, seed) to run, an empty tuple to ask again later, or None
+        if the rollout is complete."""
+        with self.condition:
+            self.heartbeats[worker] = time.monotonic()
+            self._reschedule_lost()
+            if self.closed:
+                return None
+            if self.pending:
+                episode = self.pending.popleft()
+                self.leases[episode] = worker
+                return episode, self._spec["seed"]
+            return None if len(self.results) == self.num_episodes else ()
+
+    def heartbeat(self, worker: str) -> None:
+        with self.condition:
+            self.heartbeats[worker] = time.monotonic()
+
+    def complete(self, worker: str, episode: int, rows: list, terms: list) -> None:
+        with self.condition:
+            self.heartbeats[worker] = time.monotonic()
+            self.leases.pop(episode, None)
+            if episode in self.pending:
+                self.pending.remove(episode)
+            # Only the first result counts, if a presumably lost worker comes back
+            self.results.setdefault(episode, (rows, terms))
+            self.condition.notify_all()
+
+    def result(self, episode: int, timeout: float = 1.0):
+        """The rows and terms of an episode, or None if it doesn't complete within "timeout"."""
+        with self.condition:
+            if episode not in self.results:
+                self.condition.wait(timeout)
+                self._reschedule_lost()
+            return self.results.get(episode)
+
+    def completed(self) -> int:
+        with self.condition:
+            return len(self.results)
+
+    def all_lost(self) -> bool:
+        """Whether workers connected, but none sent a heartbeat within the timeout."""
+        with self.condition:
+            now = time.monotonic()
+            return bool(self.heartbeats) and all(
+                now - heartbeat > self._spec["timeout"]
+                for heartbeat in self.heartbeats.values()
+            )
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+
+    def _reschedule_lost(self) -> None:
+        now = time.monotonic()
+        for episode, worker in list(self.leases.items()):
+            if now - self.heartbeats[worker] > self._spec["timeout"]:
+                print(f">>> Lost worker {worker}, rescheduling episode {episode}")
+                del self.leases[episode]
+                self.pending.appendleft(episode)
+
+
+_queue: Optional[_WorkQueue] = None
+
+
+def _init_queue(spec: dict, num_episodes: int) -> None:
+    global _queue
+    _queue = _WorkQueue(spec, num_episodes)
+
+
+def _get_queue() -> _WorkQueue:
+    return _queue
+
+
+class _CoordinatorManager(BaseManager):
+    pass
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_CoordinatorManager.register("work_queue", callable=_get_queue)
+_WorkerManager.register("work_queue")
+
+
+def _send_heartbeats(queue, worker: str, interval: float, stopped: threading.Event):
+    while not stopped.wait(interval):
+        try:
+            queue.heartbeat(worker)
+        except (EOFError, OSError):
+            return
+
+
+def _import_simulation(path: str) -> Type[Simulation]:
+    module, name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run episodes for a Pathmind Coordinator."
+    )
+    parser.add_argument("address", help="HOST:PORT of the coordinator")
+    parser.add_argument(
+        "--authkey",
+        default=os.environ.get("PATHMIND_AUTHKEY"),
+        help="the secret the coordinator was started with, defaults to PATHMIND_AUTHKEY",
+    )
+    args = parser.parse_args()
+    if not args.authkey:
+        parser.error(
+            "Pass the coordinator's authkey with --authkey or PATHMIND_AUTHKEY."
+        )
+    host, port = args.address.rsplit(":", 1)
+    episodes = run_worker((host, int(port)), args.authkey.encode())
+    print(f">>> Completed {episodes} episodes")
@@ -0,0 +1,221 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from prettytable import PrettyTable
+
+from pathmind.simulation import Simulation, _run_episode, _summary_fields
+
+__all__ = ["StoppingRule", "PolicyComparison", "compare_policies"]
+
+
+class RunningStats:
+    """Online mean and variance of a stream of values (Welford's algorithm)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else math.inf
+
+    @property
+    def std_error(self) -> float:
+        return math.sqrt(self.variance / self.count) if self.count > 1 else math.inf
+
+
+class StoppingRule:
+    """Decides when "Simulation.run" has run enough episodes to estimate the mean of
+    selected summary reward terms with the requested precision.
+
+    Pass it to "run" as "stopping" and use "num_episodes" as the maximum episode
+    budget. Episodes are run until the confidence interval of every selected term
+    is at most "ci_width" wide, or its half-width is at most "relative_error" times
+    the absolute mean, whichever of the two you specify.
+
+    :param terms: summary columns to watch, e.g. ["reward_0_found_cheese"]. Defaults to all reward terms.
+    :param ci_width: target width of the confidence interval.
+    :param relative_error: target half-width of the confidence interval relative to the mean.
+    :param confidence: confidence level of the intervals.
+    :param min_episodes: never stop before this many episodes, as the variance estimate is unreliable before.
+    """
+
+    def __init__(
+        self,
+        terms: Optional[List[str]] = None,
+        ci_width: Optional[float] = None,
+        relative_error: Optional[float] = None,
+        confidence: float = 0.95,
+        min_episodes: int = 10,
+    ):
+        if ci_width is None and relative_error is None:
+            raise ValueError("Specify at least one of 'ci_width' or 'relative_error'.")
+        self.terms = terms
+        self.ci_width = ci_width
+        self.relative_error = relative_error
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.min_episodes = max(min_episodes, 2)
+        self.stats: Dict[str, RunningStats] = {}
+
+    def update(self, summary: Dict[str, float]) -> None:
+        """Add the reward terms of a finished episode."""
+        for term in self.terms or summary.keys():
+            if term not in summary:
+                raise ValueError(
+                    f"Unknown reward term '{term}', choose from {list(summary.keys())}."
+                )
+            self.stats.setdefault(term, RunningStats()).add(float(summary[term]))
+
+    def intervals(self) -> Dict[str, Tuple[float, float]]:
+        """Current mean and confidence interval half-width per watched term."""
+        return {
+            term: (stats.mean, self.z * stats.std_error)
+            for term, stats in self.stats.items()
+        }
+
+    def is_satisfied(self) -> bool:
+        if not self.stats:
+            return False
+        for term, (mean, half_width) in self.intervals().items():
+            if self.stats[term].count < self.min_episodes:
+                return False
+            if self.ci_width is not None and 2 * half_width > self.ci_width:
+                return False
+            if (
+                self.relative_error is not None
+                and half_width > self.relative_error * abs(mean)
+            ):
+                return False
+        return True
+
+    def report(self) -> str:
+        lines = [
+            f"{term}: {mean:.6g} +/- {half_width:.6g}"
+            for term, (mean, half_width) in self.intervals().items()
+        ]
+        return "\n".join(lines)
+
+
+class PolicyComparison:
+    """Summary reward terms of several policies, evaluated on the same episodes.
+
+    :param terms: names of the summary reward terms, e.g. "reward_0_found_cheese".
+    :param rewards: per policy name, an array of shape (episodes, terms).
+    """
+
+    def __init__(self, terms: List[str], rewards: Dict[str, np.ndarray]):
+        self.terms = terms
+        self.rewards = rewards
+
+    def means(self) -> Dict[str, Dict[str, float]]:
+        """Mean of each reward term per policy."""
+        return {
+            name: dict(zip(self.terms, values.mean(axis=0)))
+            for name, values in self.rewards.items()
+        }
+
+    def paired_differences(
+        self, baseline: str
+    ) -> Dict[str, Dict[str, Tuple[float, float]]]:
+        """Mean difference to the baseline policy and its standard error, per policy and term.
+
+        Since all policies ran on identical episode seeds, the episode-wise differences
+        cancel out most of the simulation's own randomness, so their variance is usually
+        much smaller than that of two independent rollouts.
+        """
+        differences = {}
+        for name, values in self.rewards.items():
+            if name == baseline:
+                continue
+            diff = values - self.rewards[baseline]
+            std_error = diff.std(axis=0, ddof=1) / np.sqrt(len(diff))
+            differences[name] = {
+                term: (float(mean), float(error))
+                for term, mean, error in zip(self.terms, diff.mean(axis=0), std_error)
+            }
+        return differences
+
+    def episodes_for_power(
+        self, baseline: str, effect: float, power: float = 0.8, alpha: float = 0.05
+    ) -> Dict[str, Dict[str, int]]:
+        """Estimate how many paired episodes it takes to detect a difference of "effect"
+        to the baseline with the given power, in a two-sided test at level "alpha"."""
+        z = NormalDist().inv_cdf(1 - alpha / 2) + NormalDist().inv_cdf(power)
+        result = {}
+        for name, terms in self.paired_differences(baseline).items():
+            n = len(self.rewards[name])
+            result[name] = {
+                term: max(2, math.ceil((z * error * math.sqrt(n) / effect) ** 2))
+                for term, (_, error) in terms.items()
+            }
+        return result
+
+    def table(self, baseline: str) -> PrettyTable:
+        table = PrettyTable()
+        table.field_names = ["Policy", "Term", "Mean", "Difference", "Std. error"]
+        means = self.means()
+        differences = self.paired_differences(baseline)
+        for name in self.rewards:
+            for term in self.terms:
+                diff, error = differences.get(name, {}).get(term, (0.0, 0.0))
+                table.add_row([name, term, means[name][term], diff, error])
+        return table
+
+
+def compare_policies(
+    simulation: Simulation,
+    policies: Dict[str, object],
+    num_episodes: int = 100,
+    seed: int = 0,
+    processes: Optional[int] = None,
+) -> PolicyComparison:
+    """Evaluate several policies with common random numbers.
+
+    Every policy runs episode "i" with the same seed for the simulation, so that e.g.
+    sampled demand is identical across policies, and the comparison only reflects
+    differences in their decisions.
+
+    :param simulation: A Pathmind Simulation
+    :param policies: the policies to compare, by name, e.g. {"random": Random(), "trained": Local()}.
+    :param num_episodes: the number of episodes to run per policy.
+    :param seed: the seed from which all episode seeds are derived.
+    :param processes: Optionally spread all policies and episodes over this many worker processes.
+        Your simulation and policies need to be picklable to do so.
+    :return: a PolicyComparison of all summary reward terms.
+    """
+    items = [(name, episode) for episode in range(num_episodes) for name in policies]
+
+    if processes and processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(
+                    _run_episode, simulation, policies[name], episode, seed=seed
+                )
+                for name, episode in items
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [
+            _run_episode(simulation, policies[name], episode, seed=seed)
+            for name, episode in items
+        ]
+
+    # Episodes in worker processes leave this simulation untouched, so reset it to
+    # name the reward terms, like "run" does
+    simulation.reset()
+    terms = _summary_fields(simulation.get_rewards())
+    rewards = {name: np.zeros((num_episodes, len(terms))) for name in policies}
+    for (name, episode), (_, values) in zip(items, results):
+        rewards[name][episode] = values
+
+    return PolicyComparison(terms, rewards)
@@ -0,0 +1,222 @@
+import functools
+import random
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import gym
+import numpy as np
+from gym.vector import AsyncVectorEnv
+from gym.vector.utils import batch_space
+
+from pathmind.simulation import Continuous, Discrete, Simulation, seed_episode
+
+__all__ = ["to_gym", "to_gym_space", "SimulationEnv", "MultiAgentEnv"]
+
+
+def to_gym(
+    simulation_factory: Callable[[], Simulation],
+    n_envs: int = 1,
+    reward_function: Optional[Callable[[Dict[str, float]], float]] = None,
+) -> gym.Env:
+    """Expose a Simulation as a gym environment, e.g. to train on it with standard RL tooling.
+
+    Simulations with a single agent become a SimulationEnv, simulations with several agents a
+    MultiAgentEnv, which steps all agents at once. With "n_envs" above one, that many copies
+    step in parallel in subprocesses of a gym AsyncVectorEnv:
+
+        env = to_gym(MouseAndCheese, n_envs=8)
+        observations, infos = env.reset(seed=0)
+
+    :param simulation_factory: creates the simulation, e.g. your Simulation class. It needs to
+        be picklable for "n_envs" above one, e.g. a class or a module-level function.
+    :param n_envs: the number of environments to step in parallel.
+    :param reward_function: combines the reward terms of an agent into its reward. Default is
+        their sum.
+    :return: a gym environment, or a gym vector environment for "n_envs" above one.
+    """
+    if n_envs < 1:
+        raise ValueError("n_envs has to be at least 1.")
+    make_env = functools.partial(_make_env, simulation_factory, reward_function)
+    if n_envs == 1:
+        return make_env()
+    return AsyncVectorEnv([make_env] * n_envs)
+
+
+def _make_env(
+    simulation_factory: Callable[[], Simulation],
+    reward_function: Optional[Callable[[Dict[str, float]], float]],
+) -> gym.Env:
+    simulation = simulation_factory()
+    if simulation.number_of_agents() == 1:
+        return SimulationEnv(simulation, reward_function)
+    return MultiAgentEnv(simulation, reward_function)
+
+
+def to_gym_space(space: Union[Discrete, Continuous]) -> gym.Space:
+    """The gym space of a Pathmind action space."""
+    if isinstance(space, Discrete):
+        if space.size == 1:
+            return gym.spaces.Discrete(space.choices)
+        return gym.spaces.MultiDiscrete([space.choices] * space.size)
+    if isinstance(space, Continuous):
+        return gym.spaces.Box(
+            low=space.low, high=space.high, shape=tuple(space.shape), dtype=np.float32
+        )
+    raise ValueError(
+        f"Unsupported action space {type(space)}, use Discrete or Continuous."
+    )
+
+
+class _ObservationLayout:
+    """Flattens observation dictionaries into float32 vectors, in the key order and with
+    the sizes of the first observation, which are computed only once."""
+
+    def __init__(self, observation: Dict):
+        self.keys = list(observation)
+        self.sizes = [int(np.size(observation[key])) for key in self.keys]
+        self.width = sum(self.sizes)
+
+    def flatten(self, observation: Dict) -> np.ndarray:
+        out = np.empty(self.width, dtype=np.float32)
+        position = 0
+        try:
+            for key, size in zip(self.keys, self.sizes):
+                out[position : position + size] = np.ravel(observation[key])
+                position += size
+        except (KeyError, ValueError) as error:
+            raise ValueError(
+                f"Observations need the same keys and sizes in every step, "
+                f"expected {dict(zip(self.keys, self.sizes))}."
+            ) from error
+        return out
+
+
+def _sum_terms(reward: Dict[str, float]) -> float:
+    return float(sum(reward.values()))
+
+
+def _to_action(space: Union[Discrete, Continuous], action) -> np.ndarray:
+    if isinstance(space, Discrete):
+        return np.asarray(action, dtype=np.int64).reshape(space.size)
+    return np.asarray(action, dtype=np.float64).reshape(space.shape)
+
+
+def _seed(simulation: Simulation, seed: Optional[int]) -> None:
+    # Simulations typically draw from the global random number generators, or from
+    # their own "np_random" and "py_random"
+    if seed is not None:
+        np.random.seed(seed)
+        random.seed(seed)
+        seed_episode(None, seed, 0, simulation, global_state=False)
+
+
+class SimulationEnv(gym.Env):
+    """A gym environment stepping a single-agent Simulation.
+
+    Observations are the agent's observations, flattened into one float32 vector in the key
+    order of the first observation, and the reward is its combined reward terms. The info
+    of every step holds the individual "reward_terms".
+
+    :param simulation: the simulation to step.
+    :param reward_function: combines the reward terms into the reward. Default is their sum.
+    """
+
+    def __init__(
+        self,
+        simulation: Simulation,
+        reward_function: Optional[Callable[[Dict[str, float]], float]] = None,
+    ):
+        if simulation.number_of_agents() != 1:
+            raise ValueError("Use MultiAgentEnv for simulations with several agents.")
+        self.simulation = simulation
+        self.reward_function = reward_function or _sum_terms
+        self.space = simulation.action_space(0)
+        self.action_space = to_gym_space(self.space)
+
+        simulation.reset()
+        self.layout = _ObservationLayout(simulation.get_observation(0))
+        self.observation_space = gym.spaces.Box(
+            -np.inf, np.inf, shape=(self.layout.width,), dtype=np.float32
+        )
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None):
+        super().reset(seed=seed)
+        _seed(self.simulation, seed)
+        self.simulation.reset()
+        return self.layout.flatten(self.simulation.get_observation(0)), {}
+
+    def step(self, action) -> Tuple[np.ndarray, float, bool, bool, dict]:
+        simulation = self.simulation
+        simulation.set_action({0: _to_action(self.space, action)})
+        simulation.step()
+        terms = simulation.get_reward(0)
+        observation = self.layout.flatten(simulation.get_observation(0))
+        info = {"reward_terms": terms}
+        return (
+            observation,
+            self.reward_function(terms),
+            simulation.is_done(0),
+            False,
+            info,
+        )
+
+
+class MultiAgentEnv(gym.Env):
+    """A gym environment stepping all agents of a Simulation at once.
+
+    Observations are an (agents, observations) float32 array, flattened per agent in the key
+    order of the first agent's first observation, and actions are batched per agent, e.g. a
+    MultiDiscrete space for agents with one Discrete action each. Rewards are an array with
+    the combined reward terms per agent. The episode terminates once all agents are done,
+    and the info of every step holds the "dones" and "reward_terms" per agent.
+
+    All agents need the same action space.
+
+    :param simulation: the simulation to step.
+    :param reward_function: combines the reward terms of an agent into its reward. Default
+        is their sum.
+    """
+
+    def __init__(
+        self,
+        simulation: Simulation,
+        reward_function: Optional[Callable[[Dict[str, float]], float]] = None,
+    ):
+        self.simulation = simulation
+        self.reward_function = reward_function or _sum_terms
+        self.num_agents = simulation.number_of_agents()
+        spaces = simulation.action_spaces()
+        gym_spaces = [to_gym_space(space) for space in spaces]
+        if any(space != gym_spaces[0] for space in gym_spaces):
+            raise ValueError("All agents need the same action space.")
+        self.space = spaces[0]
+        self.action_space = batch_space(gym_spaces[0], self.num_agents)
+
+        simulation.reset()
+        self.layout = _ObservationLayout(simulation.get_observation(0))
+        self.observation_space = gym.spaces.Box(
+            -np.inf,
+            np.inf,
+            shape=(self.num_agents, self.layout.width),
+            dtype=np.float32,
+        )
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None):
+        super().reset(seed=seed)
+        _seed(self.simulation, seed)
+        self.simulation.reset()
+        return self._observations(), {}
+
+    def step(self, action) -> Tuple[np.ndarray, np.ndarray, bool, bool, dict]:
+        simulation = self.simulation
+        actions = [_to_action(self.space, a) for a in np.asarray(action)]
+        simulation.set_action(dict(enumerate(actions)))
+        simulation.step()
+        terms = simulation.get_rewards()
+        rewards = np.array([self.reward_function(t) for t in terms], dtype=np.float32)
+        dones = np.array(simulation.get_dones(), dtype=bool)
+        info = {"dones": dones, "reward_terms": terms}
+        return self._observations(), rewards, bool(dones.all()), False, info
+
+    def _observations(self) -> np.ndarray:
+        observations = self.simulation.get_observations()
+        return np.stack([self.layout.flatten(obs) for obs in observations])
@@ -0,0 +1,47 @@
+from typing import Callable, Optional
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+__all__ = ["step_kernel", "is_compiled"]
+
+
+def step_kernel(
+    function: Optional[Callable] = None, cache: bool = True, fastmath: bool = False
+):
+    """Compile a simulation's state transition with Numba, if it is installed.
+
+    Write the transition as a plain function over NumPy arrays and scalars, which updates
+    the state arrays in place, and call it from your Simulation's "step":
+
+        @step_kernel
+        def move(position, action):
+            ...
+
+        class MySim(Simulation):
+            def step(self):
+                move(self.position, self.action[0][0])
+
+    With Numba, the kernel is compiled to machine code with "numba.njit" on its first call,
+    and the compiled code is cached on disk next to your module, so later processes load it
+    instead of compiling again. Without Numba, the function is returned unchanged and runs
+    as regular Python.
+
+    :param function: the kernel to compile.
+    :param cache: cache the compiled kernel on disk.
+    :param fastmath: allow floating point optimizations that don't strictly follow IEEE 754.
+    """
+
+    def decorate(function: Callable) -> Callable:
+        if numba is None:
+            return function
+        return numba.njit(cache=cache, fastmath=fastmath)(function)
+
+    return decorate if function is None else decorate(function)
+
+
+def is_compiled(function: Callable) -> bool:
+    """Was this step kernel compiled with Numba?"""
+    return numba is not None and isinstance(function, numba.core.dispatcher.Dispatcher)
@@ -0,0 +1,126 @@
+import tracemalloc
+from typing import Dict, List, Optional, Set, Tuple
+
+__all__ = ["MemoryMonitor", "MemoryGrowthError"]
+
+_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+class MemoryGrowthError(RuntimeError):
+    """Memory of a run grew by more than the threshold of its MemoryMonitor."""
+
+
+class MemoryMonitor:
+    """Finds memory that keeps growing from episode to episode of "Simulation.run", e.g.
+    state your simulation accumulates because "reset" doesn't clear it.
+
+    Pass it to "run" as "memory". It traces allocations with tracemalloc, takes a snapshot
+    after every episode, and reports the allocation sites whose size grew, without ever
+    shrinking between two episodes.
+    Tracing slows a run down, so only use it to investigate. With "processes", it traces the
+    process running "run", not the worker processes.
+
+    :param top: the number of growing allocation sites to report.
+    :param threshold: Optionally fail the run with a MemoryGrowthError, once the traced memory
+        grew by more than this many bytes since the first snapshot.
+    :param warmup: the number of episodes before the first snapshot, since caches and lazily
+        imported modules usually fill up during the first episodes.
+    :param frames: the number of stack frames to record per allocation. More frames tell apart
+        allocations from the same line, called from different places, but slow a run down more.
+    """
+
+    def __init__(
+        self,
+        top: int = 10,
+        threshold: Optional[int] = None,
+        warmup: int = 1,
+        frames: int = 1,
+    ):
+        self.top = top
+        self.threshold = threshold
+        self.warmup = warmup
+        self.frames = frames
+        self.episodes = 0
+        self.totals: List[int] = []
+        # First and last size of every site that only grew so far
+        self.sites: Dict[tracemalloc.Traceback, Tuple[int, int]] = {}
+        self.shrunk: Set[tracemalloc.Traceback] = set()
+        self.started = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started = True
+
+    def stop(self) -> None:
+        if self.started:
+            tracemalloc.stop()
+            self.started = False
+
+    def update(self) -> None:
+        """Take the snapshot at the end of an episode."""
+        self.episodes += 1
+        if self.episodes <= self.warmup:
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+        key = "traceback" if self.frames > 1 else "lineno"
+        sizes = {stat.traceback: stat.size for stat in snapshot.statistics(key)}
+
+        for site in list(self.sites):
+            if site not in sizes:
+                del self.sites[site]
+                self.shrunk.add(site)
+        for site, size in sizes.items():
+            if site in self.shrunk:
+                continue
+            # Sites that appear after the first snapshot grew from nothing
+            first, last = self.sites.get(site, (0 if self.totals else size, 0))
+            if size < last:
+                del self.sites[site]
+                self.shrunk.add(site)
+            else:
+                self.sites[site] = (first, size)
+        self.totals.append(sum(sizes.values()))
+
+        if self.threshold is not None and self.growth() > self.threshold:
+            raise MemoryGrowthError(
+                f"Memory grew by more than {self.threshold} bytes.\n{self.report()}"
+            )
+
+    def growth(self) -> int:
+        """Growth of all traced memory in bytes since the first snapshot."""
+        return self.totals[-1] - self.totals[0] if self.totals else 0
+
+    def growing(self) -> List[Tuple[str, int]]:
+        """The sites that grew without ever shrinking, and their growth in bytes, largest first."""
+        if len(self.totals) < 2:
+            return []
+        growing = [
+            (site, last - first)
+            for site, (first, last) in self.sites.items()
+            if last > first
+        ]
+        growing.sort(key=lambda item: item[1], reverse=True)
+        return [(_location(site), growth) for site, growth in growing[: self.top]]
+
+    def report(self) -> str:
+        snapshots = len(self.totals)
+        lines = [
+            f"Traced memory grew by {_kib(self.growth())} over {max(snapshots - 1, 0)} episodes"
+        ]
+        lines += [f"{_kib(growth):>14}  {site}" for site, growth in self.growing()]
+        return "\n".join(lines)
+
+
+def _location(site: tracemalloc.Traceback) -> str:
+    # The most recent frame first
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(site))
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:+.1f} KiB"
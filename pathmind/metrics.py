@@ -0,0 +1,202 @@
+import bisect
+import contextlib
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from pathmind.data import _atomic_write
+
+__all__ = ["Metrics"]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+_current: Optional["Metrics"] = None
+
+
+class Metrics:
+    """Collects metrics of running rollouts and exports them to Prometheus or StatsD.
+
+    Pass it to `Simulation.run` as "metrics" to record steps and episodes completed, steps
+    per second, policy call latencies per policy type, HTTP status codes of Server policies
+    and aggregates of all reward terms. Then either
+
+    - scrape it with Prometheus from an HTTP endpoint started with "serve",
+    - let Prometheus' node exporter pick up a text file, written after each episode if you
+      specify "textfile", or
+    - push every event to a StatsD server at "statsd_address".
+
+    Metrics of policy calls are only recorded in the process that runs "run", not in the
+    worker processes used with "processes".
+
+    :param textfile: optional file to write the metrics to in Prometheus' text format.
+    :param statsd_address: optional (host, port) of a StatsD server to send metrics to over UDP.
+    :param prefix: prefix of all metric names.
+    """
+
+    def __init__(
+        self,
+        textfile: Optional[str] = None,
+        statsd_address: Optional[Tuple[str, int]] = None,
+        prefix: str = "pathmind",
+    ):
+        self.textfile = textfile
+        self.statsd_address = statsd_address
+        self.prefix = prefix
+        self.counters: Dict[Tuple[str, tuple], float] = {}
+        self.gauges: Dict[Tuple[str, tuple], float] = {}
+        self.histograms: Dict[Tuple[str, tuple], list] = {}
+        self._lock = threading.Lock()
+        self._socket = None
+        if statsd_address:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def inc(
+        self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Increase a counter."""
+        key = self._key(name, "counter", labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        self._send(key, value, "c")
+
+    def set(
+        self, name: str, value: float, labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Set a gauge."""
+        key = self._key(name, "gauge", labels)
+        with self._lock:
+            self.gauges[key] = value
+        self._send(key, value, "g")
+
+    def observe(
+        self, name: str, seconds: float, labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Add a duration in seconds to a histogram."""
+        key = self._key(name, "histogram", labels)
+        with self._lock:
+            histogram = self.histograms.setdefault(
+                key, [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+            )
+            histogram[0][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram[1] += seconds
+        self._send(key, seconds * 1000, "ms")
+
+    @contextlib.contextmanager
+    def timer(self, name: str, labels: Optional[Dict[str, str]] = None):
+        """Observe the duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def prometheus_text(self) -> str:
+        """All metrics in Prometheus' text exposition format."""
+        lines = []
+        with self._lock:
+            metrics = [
+                *[(key, "counter", value) for key, value in self.counters.items()],
+                *[(key, "gauge", value) for key, value in self.gauges.items()],
+                *[(key, "histogram", value) for key, value in self.histograms.items()],
+            ]
+            metrics.sort(key=lambda metric: metric[0])
+            written = set()
+            for (name, labels), kind, value in metrics:
+                if name not in written:
+                    written.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                if kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {value}")
+                    continue
+                counts, total = value
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), counts):
+                    cumulative += count
+                    le = labels + (("le", str(bound)),)
+                    lines.append(f"{name}_bucket{_labels(le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {total}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: Optional[str] = None) -> None:
+        """Write all metrics to a file, atomically, so that scrapers never see partial files."""
+        path = path or self.textfile
+        text = self.prometheus_text().encode()
+        folder = os.path.dirname(os.path.abspath(path))
+        _atomic_write(path, lambda f: f.write(text), folder)
+
+    def serve(self, port: int = 9100, host: str = "") -> ThreadingHTTPServer:
+        """Serve the metrics for Prometheus at "/metrics" from a background thread.
+
+        :param port: the port to listen on, 0 picks a free one.
+        :param host: the interface to listen on, defaults to all.
+        :return: the running server, call "shutdown" on it to stop it.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+
+    def _key(self, name: str, kind: str, labels: Optional[Dict[str, str]]):
+        return f"{self.prefix}_{name}", tuple(sorted((labels or {}).items()))
+
+    def _send(self, key, value: float, kind: str) -> None:
+        if self._socket is None:
+            return
+        name, labels = key
+        # StatsD has no labels, append their values to the metric name instead
+        suffix = "".join(f".{_statsd_safe(v)}" for _, v in labels)
+        try:
+            self._socket.sendto(
+                f"{name}{suffix}:{value}|{kind}".encode(), self.statsd_address
+            )
+        except OSError:
+            # Metrics must never break a rollout
+            pass
+
+
+def current() -> Optional[Metrics]:
+    """The Metrics of the rollout currently running, if any."""
+    return _current
+
+
+@contextlib.contextmanager
+def recording(metrics: Optional[Metrics]):
+    """Make "metrics" the current Metrics for the enclosed block."""
+    global _current
+    previous, _current = _current, metrics
+    try:
+        yield metrics
+    finally:
+        _current = previous
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = [
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    ]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _statsd_safe(value) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(value))
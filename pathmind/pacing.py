@@ -0,0 +1,116 @@
+import time
+from typing import Callable, Optional
+
+from pathmind.metrics import current
+
+__all__ = ["Pacer"]
+
+# Sleep until this close to a deadline, then yield until it passes, since sleeping
+# usually overshoots by a fraction of a millisecond
+_SPIN = 0.001
+
+
+class Pacer:
+    """Paces "Simulation.run" in real time, e.g. for hardware in the loop or live demos.
+
+    Either run a fixed number of steps per second, or keep simulated time at a fixed
+    ratio to wall-clock time:
+
+        simulation.run(policy, pacing=Pacer(frequency=10))
+        simulation.run(policy, pacing=Pacer(time_ratio=60, step_duration=30))
+        simulation.run(policy, pacing=Pacer(time_ratio=60, clock=lambda sim: sim.minutes * 60))
+
+    Every step starts at a deadline relative to the start of its episode, rather than a
+    fixed time after the previous step, so that the time the simulation and the policy take,
+    and the inaccuracy of sleeping, don't add up. A step that starts later than its deadline
+    by more than "tolerance" is an overrun: the simulation or the policy couldn't keep up.
+    After an overrun, the schedule is shifted to continue at the target pace from then on,
+    unless "catch_up" is set, in which case the following steps run without pause until
+    they are back on schedule.
+
+    :param frequency: the number of steps per second.
+    :param time_ratio: the number of simulated seconds per wall-clock second.
+    :param step_duration: the simulated seconds per step, for "time_ratio".
+    :param clock: Alternatively, returns the simulated time of the simulation in seconds, for
+        simulations whose steps take varying simulated time.
+    :param catch_up: run late steps without pause, to get back on the original schedule.
+    :param tolerance: the lateness in seconds up to which a step isn't an overrun.
+    """
+
+    def __init__(
+        self,
+        frequency: Optional[float] = None,
+        time_ratio: Optional[float] = None,
+        step_duration: Optional[float] = None,
+        clock: Optional[Callable] = None,
+        catch_up: bool = False,
+        tolerance: float = 0.001,
+    ):
+        if (frequency is None) == (time_ratio is None):
+            raise ValueError("Specify exactly one of 'frequency' or 'time_ratio'.")
+        if time_ratio is not None and (step_duration is None) == (clock is None):
+            raise ValueError(
+                "Specify exactly one of 'step_duration' or 'clock' to pace by 'time_ratio'."
+            )
+        if time_ratio is not None and step_duration is not None:
+            frequency = time_ratio / step_duration
+        if (frequency is not None and frequency <= 0) or (
+            time_ratio is not None and time_ratio <= 0
+        ):
+            raise ValueError("The pace has to be positive.")
+        self.frequency = frequency
+        self.time_ratio = time_ratio
+        self.clock = clock if frequency is None else None
+        self.catch_up = catch_up
+        self.tolerance = tolerance
+
+        self.steps = 0
+        self.overruns = 0
+        self.total_lateness = 0.0
+        self.max_lateness = 0.0
+        self.origin = 0.0
+        self.simulated_origin = 0.0
+        self.step = 0
+
+    def start(self, simulation) -> None:
+        """Start the schedule of an episode."""
+        self.origin = time.perf_counter()
+        if self.clock is not None:
+            self.simulated_origin = self.clock(simulation)
+        self.step = 0
+
+    def wait(self, simulation) -> None:
+        """Wait for the deadline of the next step."""
+        if self.clock is None:
+            offset = self.step / self.frequency
+        else:
+            offset = (self.clock(simulation) - self.simulated_origin) / self.time_ratio
+        deadline = self.origin + offset
+        self.step += 1
+        self.steps += 1
+
+        lateness = time.perf_counter() - deadline
+        if lateness > self.tolerance:
+            self.overruns += 1
+            self.total_lateness += lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            metrics = current()
+            if metrics is not None:
+                metrics.inc("pacing_overruns_total")
+            if not self.catch_up:
+                self.origin += lateness
+            return
+
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            time.sleep(max(remaining - _SPIN, 0))
+
+    def report(self) -> str:
+        share = self.overruns / self.steps if self.steps else 0.0
+        line = f"{self.overruns} of {self.steps} steps overran ({share:.1%})"
+        if self.overruns:
+            mean = self.total_lateness / self.overruns
+            line += f", by {mean * 1000:.1f} ms on average and {self.max_lateness * 1000:.1f} ms at most"
+        return line
@@ -0,0 +1,138 @@
+import gzip
+import json
+import struct
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+JSON = "application/json"
+FLOAT32 = "application/x-pathmind-float32"
+MSGPACK = "application/msgpack"
+
+_MAGIC = b"PMF1"
+# Types of values in float32 payloads, by numpy dtype kind
+_TYPES = {"i": "int", "u": "int", "b": "bool"}
+_HEADER = struct.Struct("<4sI")
+
+
+def content_types() -> List[str]:
+    """Payload formats available in this installation, the most compact first."""
+    return [FLOAT32] + ([MSGPACK] if msgpack is not None else []) + [JSON]
+
+
+def encodings() -> List[str]:
+    """Compression schemes available in this installation, the most effective first."""
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def encode(payload: Dict, content_type: str) -> bytes:
+    """Serialize a dictionary of numbers or lists of numbers.
+
+    The "application/x-pathmind-float32" format is a small header, holding the names and
+    shapes of all values as JSON, followed by all values as one array of little-endian
+    float32 numbers. The header also lists integer and boolean values, e.g. discrete
+    actions, which are decoded to their type again.
+    """
+    if content_type == JSON:
+        return json.dumps(_to_python(payload)).encode()
+    if content_type == MSGPACK and msgpack is not None:
+        return msgpack.packb(_to_python(payload))
+    if content_type == FLOAT32:
+        originals = [np.asarray(v) for v in payload.values()]
+        arrays = [a.astype("<f4") for a in originals]
+        header = {"names": list(payload.keys()), "shapes": [a.shape for a in arrays]}
+        types = {
+            name: _TYPES[a.dtype.kind]
+            for name, a in zip(payload.keys(), originals)
+            if a.dtype.kind in _TYPES
+        }
+        if types:
+            header["types"] = types
+        header = json.dumps(header).encode()
+        values = np.concatenate([a.ravel() for a in arrays]) if arrays else []
+        return _HEADER.pack(_MAGIC, len(header)) + header + np.asarray(values).tobytes()
+    raise ValueError(f"Unsupported content type '{content_type}'.")
+
+
+def decode(data: bytes, content_type: str) -> Dict:
+    """Deserialize a dictionary written by "encode"."""
+    if content_type == JSON:
+        return json.loads(data)
+    if content_type == MSGPACK and msgpack is not None:
+        return msgpack.unpackb(data)
+    if content_type == FLOAT32:
+        magic, size = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a float32 payload.")
+        header = json.loads(data[_HEADER.size : _HEADER.size + size])
+        values = np.frombuffer(data, dtype="<f4", offset=_HEADER.size + size)
+        types = header.get("types", {})
+        payload, start = {}, 0
+        for name, shape in zip(header["names"], header["shapes"]):
+            count = int(np.prod(shape))
+            value = values[start : start + count].reshape(shape)
+            kind = types.get(name)
+            if kind == "int":
+                value = np.rint(value).astype(np.int64)
+            elif kind == "bool":
+                value = value.astype(bool)
+            payload[name] = value.tolist()
+            start += count
+        return payload
+    raise ValueError(f"Unsupported content type '{content_type}'.")
+
+
+def compress(data: bytes, encoding: Optional[str]) -> bytes:
+    if not encoding or encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=1)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+    raise ValueError(f"Unsupported content encoding '{encoding}'.")
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    if not encoding or encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unsupported content encoding '{encoding}'.")
+
+
+def accept_header(options: List[str]) -> str:
+    """An Accept(-Encoding) header preferring the given options in order."""
+    return ", ".join(
+        f"{option};q={1 - i / 10:.1f}" if i else option
+        for i, option in enumerate(options)
+    )
+
+
+def negotiate(header: Optional[str], supported: List[str]) -> Optional[str]:
+    """Pick the supported option the client prefers most in an Accept(-Encoding) header."""
+    preferences = []
+    for i, part in enumerate((header or "").split(",")):
+        option, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                quality = float(param[2:])
+        if option in supported and quality > 0:
+            preferences.append((-quality, i, option))
+    return min(preferences)[2] if preferences else None
+
+
+def _to_python(payload: Dict) -> Dict:
+    return {name: np.asarray(value).tolist() for name, value in payload.items()}
@@ -1,13 +1,22 @@
+import hashlib
 import json
-from typing import Dict
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
 
 import numpy as np
 import requests
 import tensorflow as tf
 
-from pathmind.simulation import Discrete, Simulation
+from pathmind import payload
+from pathmind.data import directory_hash
+from pathmind.metrics import current
+from pathmind.simulation import Discrete, ObservationFilter, Simulation
 
-__all__ = ["Server", "Local", "Random"]
+__all__ = ["Server", "Local", "Random", "ModelRegistry", "configure_tensorflow"]
 
 
 class Policy:
@@ -16,29 +25,64 @@ class Policy:
     def get_actions(self, simulation: Simulation) -> Dict[int, np.ndarray]:
         raise NotImplementedError
 
+    def seed(self, seed: int) -> None:
+        """Seed the policy's random number generator, if it has one."""
+
+    def cache_key(self) -> str:
+        """Identifies the policy for a RolloutCache, so two policies with the same key
+        have to produce the same actions."""
+        state = hashlib.sha256(pickle.dumps(vars(self))).hexdigest()
+        return f"{type(self).__qualname__}:{state}"
+
 
 class Server(Policy):
-    """Connect to an existing Pathmind policy server for your simulation."""
+    """Connect to an existing Pathmind policy server for your simulation.
+
+    The first request is sent as JSON and offers the binary formats in `pathmind.payload`,
+    e.g. raw float32 arrays. If the server answers in one of them, all further requests use
+    it, compressed with the best encoding the server accepts. Servers that don't know these
+    formats keep getting JSON.
+
+    :param url: the URL of the policy server.
+    :param api_key: your Pathmind API key.
+    :param content_type: "json", "auto", or a content type from `pathmind.payload` to use right away.
+    :param compression: compress binary requests with the best encoding the server accepts, if True.
+    """
 
-    def __init__(self, url, api_key):
+    def __init__(
+        self, url, api_key, content_type: str = "auto", compression: bool = True
+    ):
         self.url = url + "/predict/"
         self.headers = {"access-token": api_key}
+        self.observation_filter = ObservationFilter()
+        self.compression = compression
+        self.negotiating = content_type == "auto"
+        self.content_type = (
+            payload.JSON if content_type in ["json", "auto"] else content_type
+        )
+        self.encoding = None
+
+    def cache_key(self) -> str:
+        return f"Server:{self.url}"
 
     def get_actions(self, simulation: Simulation) -> Dict[int, np.ndarray]:
         actions = {}
-        for i in range(simulation.number_of_agents()):
-            obs: dict = simulation.get_observation(i)
-
-            response = requests.post(url=self.url, json=obs, headers=self.headers)
+        observations = simulation.get_observations()
+        for i, obs in zip(simulation.deciding_agents(), observations):
+            obs = self.observation_filter(obs)
+            response = self._post(obs)
             code = response.status_code
+            metrics = current()
+            if metrics is not None:
+                metrics.inc("server_responses_total", labels={"code": str(code)})
             if code == 200:
-                payload = json.loads(response.content)
-                actions[i] = np.asarray(payload.get("actions"))
+                content = self._decode(response)
+                actions[i] = np.asarray(content.get("actions"))
             elif code == 422:
-                payload = json.loads(response.content)
+                content = self._decode(response)
                 raise ValueError(
                     f"The provided observations didn't pass validation.\n"
-                    f"Please check the following validation message: {payload}"
+                    f"Please check the following validation message: {content}"
                 )
             elif code == 401:
                 raise ValueError(
@@ -53,11 +97,236 @@ class Server(Policy):
                 )
         return actions
 
+    def _post(self, obs: Dict) -> requests.Response:
+        if self.content_type == payload.JSON and not self.negotiating:
+            return requests.post(url=self.url, json=obs, headers=self.headers)
+
+        headers = dict(self.headers, **{"Content-Type": self.content_type})
+        if self.negotiating:
+            headers["Accept"] = payload.accept_header(payload.content_types())
+        else:
+            headers["Accept"] = self.content_type
+        if self.encoding:
+            headers["Content-Encoding"] = self.encoding
+        body = payload.compress(payload.encode(obs, self.content_type), self.encoding)
+        response = requests.post(url=self.url, data=body, headers=headers)
+
+        if response.status_code == 415:
+            # The server doesn't understand this format after all, fall back to JSON
+            self.content_type, self.encoding = payload.JSON, None
+            self.negotiating = False
+            return self._post(obs)
+        if self.negotiating and response.status_code == 200:
+            self.negotiating = False
+            self.content_type = _media_type(response) or payload.JSON
+            if self.content_type not in payload.content_types():
+                self.content_type = payload.JSON
+            if self.compression and self.content_type != payload.JSON:
+                accepted = response.headers.get("Accept-Encoding")
+                self.encoding = payload.negotiate(
+                    payload.accept_header(payload.encodings()), _split(accepted)
+                )
+        return response
+
+    def _decode(self, response: requests.Response) -> Dict:
+        content_type = _media_type(response)
+        if content_type in payload.content_types():
+            return payload.decode(response.content, content_type)
+        return json.loads(response.content)
+
+
+def _media_type(response: requests.Response) -> Optional[str]:
+    content_type = response.headers.get("Content-Type")
+    return content_type.split(";")[0].strip() if content_type else None
+
+
+def _split(header: Optional[str]) -> List[str]:
+    return [part.split(";")[0].strip() for part in (header or "").split(",")]
+
+
+def configure_tensorflow(
+    intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None
+) -> None:
+    """Set the size of TensorFlow's thread pools used by Local policies.
+
+    "intra_op_threads" parallelizes single operations and lowers the latency of each
+    policy call, while "inter_op_threads" lets independent operations, e.g. calls from
+    several rollout threads, run side by side, which raises aggregate throughput. Call
+    this before creating any Local policy, TensorFlow fixes these settings on first use.
+
+    :param intra_op_threads: threads per operation, 0 lets TensorFlow decide.
+    :param inter_op_threads: threads for running operations concurrently, 0 lets TensorFlow decide.
+    """
+    try:
+        if intra_op_threads is not None:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads is not None:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    except RuntimeError as e:
+        raise ValueError(
+            "TensorFlow threads can only be configured before TensorFlow is used, "
+            "call 'configure_tensorflow' before creating any Local policy."
+        ) from e
+
+
+def _load_saved_model(model_file: str):
+    tf_trackable = tf.saved_model.load(model_file)
+    return tf_trackable.signatures.get("serving_default")
+
+
+def _directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+class ModelRegistry:
+    """Keeps exported policy models in memory, shared by all `Local` policies.
+
+    Models are loaded on first use, and every Local policy pointing at the same model
+    folder uses the same loaded model. If you specify a memory budget, the least recently
+    used models are evicted once the models in memory exceed it. The memory of a model is
+    estimated by the size of its folder on disk.
+
+    :param memory_budget: optional maximum number of bytes of models to keep in memory.
+    :param loader: optional callable loading a model from its folder, defaults to loading
+        the "serving_default" signature of a TensorFlow SavedModel.
+    """
+
+    def __init__(
+        self,
+        memory_budget: Optional[int] = None,
+        loader: Optional[Callable] = None,
+    ):
+        self.memory_budget = memory_budget
+        self.loader = loader or _load_saved_model
+        self._models = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._loading: Dict[str, Future] = {}
+        self._lock = threading.RLock()
+        self._executor = None
+
+    def __contains__(self, model_file: str) -> bool:
+        return os.path.abspath(model_file) in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def get(self, model_file: str):
+        """Return the loaded model, loading it first if it's not in memory yet."""
+        key = os.path.abspath(model_file)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+            future = self._loading.get(key)
+            is_loading = future is not None
+            if not is_loading:
+                future = self._loading[key] = Future()
+
+        if not is_loading:
+            self._load(key, future)
+        return future.result()
+
+    def preload(self, model_file: str) -> Future:
+        """Load a model in a background thread, e.g. while your simulation is being set up."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="pathmind-preload"
+                )
+        return self._executor.submit(self.get, model_file)
+
+    def evict(self, model_file: str) -> None:
+        key = os.path.abspath(model_file)
+        with self._lock:
+            self._models.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+
+    def _load(self, key: str, future: Future) -> None:
+        try:
+            model = self.loader(key)
+            size = _directory_size(key)
+        except Exception as e:
+            with self._lock:
+                self._loading.pop(key, None)
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._models[key] = model
+            self._sizes[key] = size
+            self._loading.pop(key, None)
+            if self.memory_budget is not None:
+                # Always keep the model that was just requested
+                while len(self._models) > 1 and (
+                    sum(self._sizes.values()) > self.memory_budget
+                ):
+                    evicted, _ = self._models.popitem(last=False)
+                    self._sizes.pop(evicted)
+        future.set_result(model)
+
+
+default_registry = ModelRegistry()
+
+
+_LOCAL_UNPICKLED = (
+    "registry",
+    "is_training_tensor",
+    "prev_reward_tensor",
+    "prev_action_tensor",
+    "seq_lens_tensor",
+    "timestep",
+)
+
 
 class Local(Policy):
-    """Load a policy from a locally stored model file and use it to predict actions."""
+    """Load a policy from a locally stored model file and use it to predict actions.
+
+    The model is loaded on first use and kept in a `ModelRegistry`, so that all Local
+    policies for the same model folder share it.
+
+    :param model_file: the folder of the exported policy.
+    :param is_tuple: whether the policy has tuple actions.
+    :param is_discrete: whether the policy has discrete actions.
+    :param registry: optional ModelRegistry, defaults to one shared by all Local policies.
+    :param preload: start loading the model in a background thread right away.
+    :param observation_yaml: optional obs.yaml the policy was trained with. Only the observations
+        selected there are fed to the model, and lazy observations are only computed if selected.
 
-    def __init__(self, model_file="./saved_model", is_tuple=False, is_discrete=True):
+    Local policies can be pickled, e.g. to run them in worker "processes". The registry and
+    the loaded model stay behind, and the copy loads the model into the default registry of
+    its process on first use. Neither preload nor use a policy before running it in
+    "processes" though, since TensorFlow hangs in processes forked after it started.
+    """
+
+    def __init__(
+        self,
+        model_file="./saved_model",
+        is_tuple=False,
+        is_discrete=True,
+        registry: Optional[ModelRegistry] = None,
+        preload: bool = False,
+        observation_yaml: Optional[str] = None,
+    ):
+        self.model_file = model_file
+        self.registry = registry if registry is not None else default_registry
+        if preload:
+            self.registry.preload(model_file)
+        self.is_tuple = is_tuple
+        self.is_discrete = is_discrete
+        self.observation_filter = ObservationFilter.from_yaml(observation_yaml)
+
+    def _create_tensors(self) -> None:
+        # Created on first use, since TensorFlow hangs in processes forked after it
+        # started its runtime, e.g. the workers of a run with "processes"
         self.is_training_tensor = tf.constant(False, dtype=tf.bool)
         self.prev_reward_tensor = tf.constant([0], dtype=tf.float32)
         self.prev_action_tensor = tf.constant([0], dtype=tf.int64)
@@ -66,26 +335,51 @@ class Local(Policy):
             tf.zeros((), dtype=tf.int64), (), name="timestep"
         )
 
-        tf_trackable = tf.saved_model.load(model_file)
-        self.model = tf_trackable.signatures.get("serving_default")
-        self.is_tuple = is_tuple
-        self.is_discrete = is_discrete
+    def __getstate__(self) -> dict:
+        # The registry holds a lock and loaded models, neither of which can be pickled,
+        # and the tensors are created again in the process unpickling the policy
+        state = self.__dict__.copy()
+        for key in _LOCAL_UNPICKLED:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.registry = default_registry
+
+    def __copy__(self) -> "Local":
+        # Copies in the same process, e.g. per thread of a run, keep sharing the registry
+        policy = type(self).__new__(type(self))
+        policy.__dict__.update(self.__dict__)
+        return policy
+
+    @property
+    def model(self):
+        return self.registry.get(self.model_file)
+
+    def cache_key(self) -> str:
+        return (
+            f"Local:{directory_hash(self.model_file)}:{self.is_tuple}:{self.is_discrete}:"
+            f"{self.observation_filter.names}"
+        )
 
     def get_actions(self, simulation: Simulation) -> Dict[int, np.ndarray]:
         """Compute an action by passing observations through a downloaded
         policy_file.zip"""
         action_type = int if self.is_discrete else float
 
+        model = self.model
+        if "timestep" not in self.__dict__:
+            self._create_tensors()
         actions = {}
-        for i in range(simulation.number_of_agents()):
-            obs: dict = simulation.get_observation(i)
-            obs_values: list = [*obs.values()]
-            observation = np.asarray(obs_values).reshape((1, -1))
+        observations = simulation.get_observations()
+        for i, obs in zip(simulation.deciding_agents(), observations):
+            observation = self.observation_filter.vector(obs).reshape((1, -1))
             tensors = tf.convert_to_tensor(
                 observation, dtype=tf.float32, name="observations"
             )
 
-            result = self.model(
+            result = model(
                 observations=tensors,
                 is_training=self.is_training_tensor,
                 seq_lens=self.seq_lens_tensor,
@@ -112,16 +406,28 @@ class Local(Policy):
 class Random(Policy):
     """Generate random actions for a simulaton."""
 
+    def __init__(self, seed: Optional[int] = None):
+        # Kept apart from the seeds of episodes, so that the cache key doesn't change
+        self.initial_seed = seed
+        self.seed(seed)
+
+    def seed(self, seed: Optional[int]) -> None:
+        self.rng = np.random.default_rng(seed)
+
+    def cache_key(self) -> str:
+        cls = type(self)
+        return f"{cls.__module__}.{cls.__qualname__}:{self.initial_seed}"
+
     def get_actions(self, simulation: Simulation):
         """Generate a random action independent of the observation"""
         actions = {}
-        for i in range(simulation.number_of_agents()):
-            action_space = simulation.action_space(i)
+        action_spaces = simulation.action_spaces()
+        for i, action_space in zip(simulation.deciding_agents(), action_spaces):
             if isinstance(action_space, Discrete):
-                action = np.random.randint(action_space.choices, size=action_space.size)
+                action = self.rng.integers(action_space.choices, size=action_space.size)
             else:
                 action = (
-                    np.random.rand(*action_space.shape)
+                    self.rng.random(action_space.shape)
                     * (action_space.high - action_space.low)
                     + action_space.low
                 )
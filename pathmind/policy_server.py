@@ -0,0 +1,135 @@
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from pathmind import payload
+from pathmind.simulation import Simulation, _ObservedSimulation
+
+__all__ = ["PolicyServer"]
+
+
+class PolicyServer:
+    """A local stand-in for a Pathmind policy server, e.g. to test `Server` offline.
+
+    It serves any Policy at "{url}/predict/", speaks the same payload formats and
+    compressions as `Server`, and answers like the hosted policy servers: 401 for a wrong
+    API key, 422 if observations are missing, and 415 for unknown formats.
+
+        with PolicyServer(Random(), MySim()) as server:
+            MySim().run(Server(server.url, api_key="local"))
+
+    :param policy: the Policy to compute actions with.
+    :param simulation: a Simulation providing the action space of agent 0.
+    :param api_key: optional API key clients have to send.
+    :param observations: optional names of the observations every request needs to contain.
+    :param content_types: the payload formats to support, defaults to all available ones.
+    :param encodings: the compressions of request bodies to support, defaults to all available ones.
+    :param host: the interface to listen on.
+    :param port: the port to listen on, 0 picks a free one.
+    """
+
+    def __init__(
+        self,
+        policy,
+        simulation: Simulation,
+        api_key: Optional[str] = None,
+        observations: Optional[List[str]] = None,
+        content_types: Optional[List[str]] = None,
+        encodings: Optional[List[str]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.policy = policy
+        self.simulation = simulation
+        self.api_key = api_key
+        self.observations = observations
+        self.content_types = content_types or payload.content_types()
+        self.encodings = payload.encodings() if encodings is None else encodings
+        # Number of requests per (content type, encoding), to check what clients negotiated
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), _handler(self))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def shutdown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "PolicyServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def predict(self, observation: dict) -> dict:
+        with self.lock:
+            state = _ObservedSimulation(self.simulation, [observation], [0])
+            actions = self.policy.get_actions(state)
+        return {"actions": actions[0]}
+
+
+def _handler(server: PolicyServer):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("predict"):
+                return self.respond(404, {"detail": "Not Found"})
+            if server.api_key and self.headers.get("access-token") != server.api_key:
+                return self.respond(401, {"detail": "Invalid access token"})
+
+            content_type = (self.headers.get("Content-Type") or payload.JSON).split(
+                ";"
+            )[0]
+            encoding = self.headers.get("Content-Encoding")
+            if content_type not in self.supported_types() or (
+                encoding and encoding not in server.encodings
+            ):
+                return self.respond(415, {"detail": "Unsupported Media Type"})
+
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            observation = payload.decode(
+                payload.decompress(body, encoding), content_type
+            )
+            with server.lock:
+                server.requests[content_type, encoding] += 1
+
+            missing = [
+                name for name in server.observations or [] if name not in observation
+            ]
+            if missing:
+                detail = [
+                    {"loc": ["body", name], "msg": "field required"} for name in missing
+                ]
+                return self.respond(422, {"detail": detail})
+
+            self.respond(200, server.predict(observation))
+
+        def respond(self, code: int, content: dict):
+            # Error details are text, which only JSON can hold
+            content_type = payload.JSON
+            if code == 200:
+                accept = self.headers.get("Accept")
+                content_type = (
+                    payload.negotiate(accept, self.supported_types()) or payload.JSON
+                )
+            body = payload.encode(content, content_type)
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if server.encodings:
+                self.send_header("Accept-Encoding", ", ".join(server.encodings))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def supported_types(self) -> List[str]:
+            return [t for t in server.content_types if t in payload.content_types()]
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
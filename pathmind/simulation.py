@@ -1,10 +1,16 @@
+import copy
 import csv
+import functools
 import math
 import os
+import pickle
+import random
 import shutil
 import subprocess
+import threading
 import time
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
 
 import numpy as np
 import prettytable
@@ -15,7 +21,24 @@ from gym.spaces import Discrete as GymDiscrete
 from or_gym import Env as OrEnv
 from prettytable import PrettyTable
 
-__all__ = ["Discrete", "Continuous", "Simulation"]
+from pathmind.cache import RolloutCache
+from pathmind.memory import MemoryMonitor
+from pathmind.metrics import Metrics, current, recording
+from pathmind.pacing import Pacer
+from pathmind.store import EpisodeStore, _SummaryLog, flatten_rows
+from pathmind.transport import StepLayout, _Channel
+
+if TYPE_CHECKING:
+    from pathmind.evaluation import StoppingRule
+
+__all__ = [
+    "Discrete",
+    "Continuous",
+    "Simulation",
+    "BatchSimulation",
+    "Snapshot",
+    "ObservationFilter",
+]
 
 
 class Discrete:
@@ -49,7 +72,57 @@ class Continuous:
         self.high = high
 
 
-class Simulation:
+class Snapshot:
+    """The frozen state of a Simulation, as returned by `Simulation.snapshot`.
+
+    The state is pickled with protocol 5 where available. Large contiguous
+    buffers, such as NumPy arrays, are kept out-of-band, so that they're copied
+    exactly once when taking the snapshot and once per `restore`, instead of
+    additionally being serialized into the pickle stream.
+    """
+
+    def __init__(self, data: bytes, buffers: Optional[List[bytes]] = None):
+        self.data = data
+        self.buffers = buffers or []
+
+    def load(self):
+        """Reconstruct a fresh copy of the stored state."""
+        if not self.buffers:
+            return pickle.loads(self.data)
+        # Restored arrays are backed by these buffers, so hand out copies to keep
+        # the snapshot itself untouched when the simulation mutates its state.
+        return pickle.loads(self.data, buffers=[bytearray(b) for b in self.buffers])
+
+
+class _Generators:
+    """The random number generators of a simulation, which "seed_episode" seeds. Unseeded,
+    they are created on first use."""
+
+    _np_random: Optional[np.random.Generator] = None
+    _py_random: Optional[random.Random] = None
+
+    @property
+    def np_random(self) -> np.random.Generator:
+        if self._np_random is None:
+            self._np_random = np.random.default_rng()
+        return self._np_random
+
+    @np_random.setter
+    def np_random(self, generator: np.random.Generator) -> None:
+        self._np_random = generator
+
+    @property
+    def py_random(self) -> random.Random:
+        if self._py_random is None:
+            self._py_random = random.Random()
+        return self._py_random
+
+    @py_random.setter
+    def py_random(self, generator: random.Random) -> None:
+        self._py_random = generator
+
+
+class Simulation(_Generators):
     """Pathmind's Python interface for multiple agents. Make sure to initialize
     all parameters you need for your simulation here, so that e.g. the `reset`
     method can restart a new simulation.
@@ -58,6 +131,10 @@ class Simulation:
     a single value for agent 0, then action[0] will be a float value, otherwise
     a numpy array with specified shape. You use "action" to apply the next actions
     to your agents in the "step" function.
+
+    "np_random" and "py_random" are a numpy Generator and a random.Random of your
+    simulation, which "run" seeds for every episode it seeds. Draw from these rather than
+    the global random number generators to keep rollouts reproducible with "threads".
     """
 
     action: Dict[int, Union[float, np.ndarray]] = None
@@ -95,13 +172,73 @@ class Simulation:
 
     def get_observation(self, agent_id: int) -> Dict[str, Union[float, List[float]]]:
         """Get a dictionary of observations for the current state of the simulation per agent. Each
-        observation can either be a single numeric value or a list thereof."""
+        observation can either be a single numeric value or a list thereof. For observations that
+        are expensive to compute, return a function without arguments instead, which is only
+        called if the observation is selected, e.g. in your obs.yaml."""
         raise NotImplementedError
 
     def is_done(self, agent_id: int) -> bool:
         """Has this agent reached its target?"""
         raise NotImplementedError
 
+    def decision_mask(self) -> Optional[List[bool]]:
+        """Which agents need a decision in the current step, e.g. in event-driven simulations
+        where agents act at different times. By default, all agents that aren't done yet do.
+
+        Only agents that need a decision get observed and passed to the policy, so that
+        'self.action' in the next "step" only holds their actions."""
+        return None
+
+    def deciding_agents(self) -> List[int]:
+        """Ids of the agents a policy computes actions for. In a rollout, these are the
+        agents that need a decision in the current step."""
+        return list(range(self.number_of_agents()))
+
+    def action_spaces(
+        self, agent_ids: Optional[List[int]] = None
+    ) -> List[Union[Continuous, Discrete]]:
+        """Action spaces of all agents, or of the given ones. Override this and the following bulk
+        methods if your simulation can compute all agents at once, by default they call the
+        per-agent methods."""
+        return [self.action_space(i) for i in _agent_ids(self, agent_ids)]
+
+    def get_observations(
+        self, agent_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Union[float, List[float]]]]:
+        """Observations of all agents, or of the given ones."""
+        return [self.get_observation(i) for i in _agent_ids(self, agent_ids)]
+
+    def get_rewards(
+        self, agent_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, float]]:
+        """Reward terms of all agents, or of the given ones."""
+        return [self.get_reward(i) for i in _agent_ids(self, agent_ids)]
+
+    def get_dones(self, agent_ids: Optional[List[int]] = None) -> List[bool]:
+        """Done flags of all agents, or of the given ones."""
+        return [self.is_done(i) for i in _agent_ids(self, agent_ids)]
+
+    def snapshot(self) -> Snapshot:
+        """Capture the current state of your simulation, e.g. in the middle of an episode,
+        so that you can later continue from exactly this state with `restore`.
+
+        By default this copies all instance attributes. Override this together with
+        `restore` if your simulation keeps state elsewhere, for instance in class
+        attributes or in external resources."""
+        if pickle.HIGHEST_PROTOCOL < 5:
+            return Snapshot(
+                pickle.dumps(self.__dict__, protocol=pickle.HIGHEST_PROTOCOL)
+            )
+        buffers = []
+        data = pickle.dumps(self.__dict__, protocol=5, buffer_callback=buffers.append)
+        return Snapshot(data, [bytes(b.raw()) for b in buffers])
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """Set the state of your simulation to a previously taken snapshot."""
+        state = snapshot.load()
+        self.__dict__.clear()
+        self.__dict__.update(state)
+
     def run(
         self,
         policy=None,
@@ -109,6 +246,20 @@ class Simulation:
         summary_csv: Optional[str] = None,
         num_episodes: int = 1,
         sleep: Optional[int] = None,
+        snapshot: Optional[Snapshot] = None,
+        processes: Optional[int] = None,
+        threads: Optional[int] = None,
+        stopping: Optional["StoppingRule"] = None,
+        seed: Optional[int] = None,
+        store: Optional[str] = None,
+        observation_yaml: Optional[str] = None,
+        cache: Optional[Union[str, RolloutCache]] = None,
+        metrics: Optional[Metrics] = None,
+        transport: Optional[str] = None,
+        resume: bool = False,
+        fsync: Optional[int] = None,
+        memory: Optional[MemoryMonitor] = None,
+        pacing: Optional[Pacer] = None,
     ) -> None:
         """
         Runs a simulation with a given policy. In Reinforcement Learning terms this creates a
@@ -119,7 +270,43 @@ class Simulation:
         :param summary_csv: If you specify a summary CSV file, a summary of reward terms over all episodes will be
             stored in that file.
         :param num_episodes: the number of episodes to run rollouts for.
-        :param sleep: Optionally sleep for "sleep" seconds to make debugging easier.
+        :param sleep: Optionally sleep for "sleep" seconds before every step to make debugging easier. Use
+            "pacing" to run at a steady pace instead.
+        :param snapshot: Optionally start every episode from this snapshot instead of calling "reset",
+            which branches "num_episodes" rollouts off the same intermediate state.
+        :param processes: Optionally run episodes in parallel in this many worker processes. Your simulation
+            and policy need to be picklable to do so.
+        :param threads: Optionally run episodes in parallel in this many threads instead. Each thread steps its own
+            copy of your simulation, while all threads share the policy, e.g. one Local model. This pays off if
+            your simulation or the policy release the GIL, like TensorFlow inference does.
+        :param stopping: Optionally stop early, once the reward terms selected by this StoppingRule are estimated
+            precisely enough. "num_episodes" is then the maximum number of episodes to run.
+        :param seed: Optionally seed every episode with a seed derived from this one and the episode number, which
+            makes rollouts reproducible. With "threads", only random numbers drawn from "self.np_random" and
+            "self.py_random" are, since the global random number generators are then left alone.
+        :param store: Optionally append the complete results of every episode to an EpisodeStore in this folder,
+            as soon as the episode completes.
+        :param observation_yaml: Optionally only compute, record and pass to the policy the observations
+            selected in this obs.yaml, e.g. the one you trained your policy with.
+        :param cache: Optionally a RolloutCache, or the folder of one. If this rollout ran before with identical
+            simulation code and configuration, policy and arguments, its results are taken from the cache.
+        :param metrics: Optionally record throughput, policy latencies and reward terms of this run in these
+            Metrics, e.g. to export them to Prometheus or StatsD while the run progresses.
+        :param transport: Optionally stream every step from the worker "processes" while episodes run, instead
+            of sending all steps of an episode at its end. "shared_memory" writes steps as fixed-size records into
+            a shared memory ring buffer, which avoids pickling, and falls back to a queue for steps whose
+            observations change their shape. "queue" always uses a queue.
+        :param resume: Continue a run that crashed or was stopped, instead of starting over. The episodes already
+            in "summary_csv", and in "store" if you specify one, are kept, and the run continues with the next
+            episode and its seed. Complete results in "out_csv" only hold the episodes of the resumed part.
+        :param fsync: Optionally flush the summary, which is appended to "summary_csv" as soon as each episode
+            completes, to disk every "fsync" episodes, and every episode appended to "store". Without, completed
+            episodes survive a crash of the process, but not necessarily of the machine.
+        :param memory: Optionally trace memory allocations with this MemoryMonitor, which reports allocation sites
+            that grow in every episode, and can fail the run once memory grew by more than its threshold.
+        :param pacing: Optionally run steps in real time with this Pacer, at a fixed frequency or ratio of simulated
+            to wall-clock time. It reports the steps that started late, because the simulation or the policy
+            couldn't keep up. Episodes are then run one after the other.
         """
 
         if not policy:
@@ -131,56 +318,101 @@ class Simulation:
 
         # Only debug single episodes
         debug_mode = True if num_episodes == 1 else False
-        done = False
-        self.reset()
 
-        agents = range(self.number_of_agents())
-        table, summary = _define_tables(self, agents)
-
-        for episode in range(num_episodes):
-
-            step = 0
-            done = False
+        if snapshot is None:
             self.reset()
-            while not done:
-                row = [episode, step]
-                if sleep:
-                    # Optionally sleep for "sleep" seconds for easier debugging.
-                    time.sleep(sleep)
-
-                # Observations are "initial", i.e. before the action
-                row += [self.get_observation(agent_id) for agent_id in agents]
-
-                actions = policy.get_actions(self)
-                self.action = actions
-
-                self.step()
-
-                dones = [self.is_done(agent_id) for agent_id in agents]
-                row += [self.action[agent_id] for agent_id in agents]
-                row += [self.get_reward(agent_id) for agent_id in agents]
-                row += dones
-                table.add_row(row)
-
-                step += 1
-                done = all(dones)
-
-            # add reward terms in order after episode completion
-            terms = [
-                v for agent_id in agents for v in self.get_reward(agent_id).values()
-            ]
-            summary.add_row([episode] + terms)
-
-            if debug_mode:
-                print(">>> Complete table:\n")
-                print(table)
-                print(">>> Summary table:\n")
-                print(summary)
+        else:
+            self.restore(snapshot)
 
-            print(f"--------Finished episode {episode}--------")
+        if pacing is not None and ((processes or 0) > 1 or (threads or 0) > 1):
+            raise ValueError("Paced episodes can only run one after the other.")
+        if resume and not summary_csv:
+            raise ValueError("Specify the summary_csv of the run to resume.")
+        if resume and cache is not None:
+            raise ValueError(
+                "A resumed run can't be cached, as it's only partially run."
+            )
 
+        agents = range(self.number_of_agents())
+        table, summary = _define_tables(self, agents)
+        observation_filter = ObservationFilter.from_yaml(observation_yaml)
+        log = None
+        if summary_csv:
+            log = _SummaryLog(summary_csv, summary.field_names, resume, fsync)
+        collector = _EpisodeCollector(
+            table,
+            summary,
+            num_agents=len(agents),
+            debug_mode=debug_mode,
+            stopping=stopping,
+            store=EpisodeStore(store, fsync=bool(fsync)) if store else None,
+            metrics=metrics,
+            log=log,
+            memory=memory,
+            keep_results=cache is not None,
+            store_template=_row_template(self, observation_filter) if store else None,
+        )
+        start = collector.resume(log.rows) if resume else 0
+        if start:
+            print(f">>> Resuming after {start} completed episodes")
+
+        if cache is not None:
+            cache = RolloutCache(cache) if isinstance(cache, str) else cache
+            key = cache.key(
+                self,
+                policy,
+                num_episodes=num_episodes,
+                seed=seed,
+                snapshot=snapshot,
+                stopping=stopping,
+                observation_yaml=observation_yaml,
+            )
+            cached = cache.get(key)
+
+        if cache is not None and cached is not None:
+            print(">>> Using cached results")
+            collector.collect(cached)
+        elif start is not None:
+            results = _episode_results(
+                self,
+                policy,
+                num_episodes,
+                start=start,
+                processes=processes,
+                threads=threads,
+                transport=transport,
+                sleep=sleep,
+                pacing=pacing,
+                snapshot=snapshot,
+                seed=seed,
+                observation_filter=observation_filter,
+            )
+            if memory is not None:
+                memory.start()
+            try:
+                with recording(metrics):
+                    collector.collect(results, start)
+            finally:
+                results.close()
+                collector.close()
+                if memory is not None:
+                    memory.stop()
+            if cache is not None:
+                cache.put(key, collector.results)
+        collector.close()
+
+        if stopping:
+            print(f">>> Estimated reward terms after {len(summary.rows)} episodes:")
+            print(stopping.report())
+        if memory is not None:
+            print(">>> Memory growth:")
+            print(memory.report())
+        if pacing is not None:
+            print(">>> Pacing:")
+            print(pacing.report())
+
+        # The summary log already holds every episode, rewriting it would risk losing them
         write_table(table=table, out_csv=out_csv)
-        write_table(table=summary, out_csv=summary_csv)
 
     def train(
         self,
@@ -244,6 +476,191 @@ class Simulation:
         return
 
 
+class BatchSimulation(Simulation):
+    """A Simulation that computes all agents at once with NumPy arrays, instead of one
+    agent at a time.
+
+    Instead of the per-agent methods of `Simulation`, implement "batch_reset", "batch_step",
+    "batch_observations", "batch_rewards" and "batch_dones". Observations and rewards are
+    structured arrays with one entry per agent, e.g. with dtype
+    [("mouse_row", float), ("mouse_col", float)], whose field names are the observation and
+    reward term names. Their per-agent view, which `run` and all policies use, is derived
+    from these arrays, and computed only once per step.
+    """
+
+    def batch_reset(self) -> None:
+        """Reset your simulation parameters."""
+        raise NotImplementedError
+
+    def batch_step(self, actions: np.ndarray) -> None:
+        """Carry out the next time-step of your simulation for all agents, given an
+        array of shape (agents, action size), with one row of actions per agent. Rows of
+        agents that didn't need a decision are zero, and "self.decided" is False for them."""
+        raise NotImplementedError
+
+    def batch_observations(self) -> np.ndarray:
+        """Structured array of observations, with one entry per agent."""
+        raise NotImplementedError
+
+    def batch_rewards(self) -> np.ndarray:
+        """Structured array of reward terms, with one entry per agent."""
+        raise NotImplementedError
+
+    def batch_dones(self) -> np.ndarray:
+        """Boolean array, which is True for agents that reached their target."""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        self._batch_cache = {}
+        self.batch_reset()
+
+    def step(self) -> None:
+        self._batch_cache = {}
+        num_agents = self.number_of_agents()
+        if len(self.action) == num_agents:
+            self.decided = np.ones(num_agents, dtype=bool)
+            self.batch_step(
+                np.stack([np.ravel(self.action[i]) for i in range(num_agents)])
+            )
+            return
+
+        # Only some agents decided, the rows of all others are zero
+        self.decided = np.zeros(num_agents, dtype=bool)
+        self.decided[list(self.action)] = True
+        width = max((np.size(a) for a in self.action.values()), default=1)
+        actions = np.zeros((num_agents, width))
+        for i, action in self.action.items():
+            actions[i] = np.ravel(action)
+        self.batch_step(actions)
+
+    def get_observation(self, agent_id: int) -> Dict[str, Union[float, List[float]]]:
+        return _record_to_dict(self._cached("observations")[agent_id])
+
+    def get_reward(self, agent_id: int) -> Dict[str, float]:
+        return _record_to_dict(self._cached("rewards")[agent_id])
+
+    def is_done(self, agent_id: int) -> bool:
+        return bool(self._cached("dones")[agent_id])
+
+    def get_observations(
+        self, agent_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, Union[float, List[float]]]]:
+        return [_record_to_dict(r) for r in self._cached("observations", agent_ids)]
+
+    def get_rewards(
+        self, agent_ids: Optional[List[int]] = None
+    ) -> List[Dict[str, float]]:
+        return [_record_to_dict(r) for r in self._cached("rewards", agent_ids)]
+
+    def get_dones(self, agent_ids: Optional[List[int]] = None) -> List[bool]:
+        return self._cached("dones", agent_ids).tolist()
+
+    def _cached(self, name: str, agent_ids: Optional[List[int]] = None) -> np.ndarray:
+        cache = self.__dict__.setdefault("_batch_cache", {})
+        if name not in cache:
+            cache[name] = getattr(self, f"batch_{name}")()
+        return cache[name] if agent_ids is None else cache[name][agent_ids]
+
+
+def _agent_ids(simulation: Simulation, agent_ids: Optional[List[int]]):
+    return range(simulation.number_of_agents()) if agent_ids is None else agent_ids
+
+
+def _record_to_dict(record: np.void) -> Dict[str, Union[float, List[float]]]:
+    return {name: record[name].tolist() for name in record.dtype.names}
+
+
+class ObservationFilter:
+    """Selects observations by name, e.g. the ones listed in an obs.yaml, and computes
+    lazy observations, i.e. functions returned by "get_observation", only if selected.
+
+    :param names: the observations to select in this order, defaults to all observations.
+    """
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self.names = names
+
+    @classmethod
+    def from_yaml(cls, observation_yaml: Optional[str]) -> "ObservationFilter":
+        """Select the observations listed in an obs.yaml, or all if no file is given."""
+        return cls(
+            read_observation_yaml(observation_yaml) if observation_yaml else None
+        )
+
+    def __call__(
+        self, observation: Dict[str, Union[float, List[float], Callable]]
+    ) -> Dict[str, Union[float, List[float]]]:
+        if self.names is None:
+            return {name: _compute(value) for name, value in observation.items()}
+        try:
+            return {name: _compute(observation[name]) for name in self.names}
+        except KeyError as e:
+            raise ValueError(
+                f"Selected observation {e} is not provided by the simulation, "
+                f"which has {list(observation.keys())}."
+            ) from e
+
+    def vector(self, observation: Dict[str, Union[float, List[float]]]) -> np.ndarray:
+        """Selected observations, flattened into a single array."""
+        values = self(observation).values()
+        return np.concatenate([np.ravel(value) for value in values]).astype(np.float32)
+
+
+def _compute(value):
+    return value() if callable(value) else value
+
+
+class _ObservedSimulation:
+    """The view of a simulation a policy gets in a rollout. "deciding_agents" and
+    "get_observations" only cover the agents that need a decision, with the observations
+    already computed for them in the current step. Everything else, e.g. the number of
+    agents or the observations of other agents, defers to the simulation."""
+
+    def __init__(
+        self,
+        simulation,
+        observations: List[Dict[str, Union[float, List[float]]]],
+        agent_ids: Optional[List[int]] = None,
+        observation_filter: Optional[ObservationFilter] = None,
+    ):
+        self.simulation = simulation
+        self.observations = observations
+        self.agent_ids = agent_ids
+        self.observation_filter = observation_filter or ObservationFilter()
+        ids = range(len(observations)) if agent_ids is None else agent_ids
+        self.observations_by_id = dict(zip(ids, observations))
+
+    def __getattr__(self, name):
+        return getattr(self.simulation, name)
+
+    def deciding_agents(self) -> List[int]:
+        return list(self.observations_by_id)
+
+    def action_spaces(self) -> List[Union[Continuous, Discrete]]:
+        if self.agent_ids is None:
+            return self.simulation.action_spaces()
+        return self.simulation.action_spaces(self.agent_ids)
+
+    def get_observation(self, agent_id: int) -> Dict[str, Union[float, List[float]]]:
+        if agent_id in self.observations_by_id:
+            return self.observations_by_id[agent_id]
+        # Policies that loop over all agents also ask for agents without a decision
+        return self.observation_filter(self.simulation.get_observation(agent_id))
+
+    def get_observations(self) -> List[Dict[str, Union[float, List[float]]]]:
+        """The observations of the agents in "deciding_agents", in that order."""
+        return self.observations
+
+
+def read_observation_yaml(observation_yaml: str) -> List[str]:
+    """Reads the observation names from an obs.yaml, as written by write_observation_yaml.
+
+    :param observation_yaml: path to the obs.yaml file
+    """
+    with open(observation_yaml) as f:
+        return yaml.safe_load(f).get("observations")
+
+
 def write_observation_yaml(simulation: Simulation, folder) -> None:
     """Writes a YAML file with observation names that will be used by
     the training program to select which observation values are used for
@@ -282,6 +699,420 @@ def write_table(
             writer.writerows(result)
 
 
+def _run_episode(
+    simulation: Simulation,
+    policy,
+    episode: int,
+    sleep: Optional[int] = None,
+    snapshot: Optional[Snapshot] = None,
+    seed: Optional[int] = None,
+    observation_filter: Optional[ObservationFilter] = None,
+    on_step: Optional[Callable[[list], None]] = None,
+    pacing: Optional[Pacer] = None,
+    global_state: bool = True,
+):
+    """Roll out a single episode and return its table rows and final reward terms. If
+    "on_step" is given, it receives every row instead, and no rows are returned."""
+    observation_filter = observation_filter or ObservationFilter()
+    if seed is not None:
+        seed_episode(policy, seed, episode, simulation, global_state)
+
+    if snapshot is None:
+        simulation.reset()
+    else:
+        simulation.restore(snapshot)
+    if pacing is not None:
+        pacing.start(simulation)
+
+    num_agents = simulation.number_of_agents()
+    metrics = current()
+    policy_labels = {"policy": type(policy).__name__}
+    active = np.ones(num_agents, dtype=bool)
+    dones = [False] * num_agents
+    rewards = [None] * num_agents
+    rows = []
+    step = 0
+    while active.any():
+        row = [episode, step]
+        if pacing is not None:
+            pacing.wait(simulation)
+        if sleep:
+            # Optionally sleep for "sleep" seconds for easier debugging.
+            time.sleep(sleep)
+
+        # Only agents that aren't done and need a decision get observed and acted for
+        mask = simulation.decision_mask()
+        deciding = active if mask is None else active & np.asarray(mask, dtype=bool)
+        agent_ids = None if deciding.all() else np.flatnonzero(deciding).tolist()
+
+        # Observations are "initial", i.e. before the action
+        if agent_ids is None:
+            observations = simulation.get_observations()
+        else:
+            observations = simulation.get_observations(agent_ids) if agent_ids else []
+        observations = [observation_filter(o) for o in observations]
+
+        actions = {}
+        if observations:
+            state = _ObservedSimulation(
+                simulation, observations, agent_ids, observation_filter
+            )
+            if metrics is None:
+                actions = policy.get_actions(state)
+            else:
+                with metrics.timer("policy_latency_seconds", policy_labels):
+                    actions = policy.get_actions(state)
+            if agent_ids is not None:
+                actions = {i: actions[i] for i in agent_ids if i in actions}
+        simulation.action = actions
+
+        simulation.step()
+
+        # Agents that are done keep their last rewards and aren't asked again
+        if active.all():
+            dones = simulation.get_dones()
+            rewards = simulation.get_rewards()
+        else:
+            active_ids = np.flatnonzero(active).tolist()
+            for i, done, reward in zip(
+                active_ids,
+                simulation.get_dones(active_ids),
+                simulation.get_rewards(active_ids),
+            ):
+                dones[i], rewards[i] = done, reward
+
+        if agent_ids is None:
+            row += observations
+        else:
+            by_id = dict(zip(agent_ids, observations))
+            row += [by_id.get(i) for i in range(num_agents)]
+        row += [simulation.action.get(i) for i in range(num_agents)]
+        row += list(rewards)
+        row += list(dones)
+        if on_step is None:
+            rows.append(row)
+        else:
+            on_step(row)
+
+        step += 1
+        active = ~np.asarray(dones, dtype=bool)
+
+    # add reward terms in order after episode completion
+    terms = [v for reward in simulation.get_rewards() for v in reward.values()]
+    return rows, terms
+
+
+def _episode_results(
+    simulation: Simulation,
+    policy,
+    num_episodes: int,
+    start: int = 0,
+    processes: Optional[int] = None,
+    threads: Optional[int] = None,
+    transport: Optional[str] = None,
+    **kwargs,
+):
+    """Yield the results of the episodes from "start" on in order, computed one after the
+    other, or in a pool of processes or threads. Closing the generator cancels pending
+    episodes."""
+    episodes = range(start, num_episodes)
+    if processes and processes > 1:
+        if kwargs.get("seed") is None:
+            # Workers would otherwise start from identical copies of the random state
+            kwargs["seed"] = random.getrandbits(32)
+        if transport is not None:
+            yield from _streamed_episode_results(
+                simulation, policy, episodes, processes, transport, **kwargs
+            )
+            return
+        pool = ProcessPoolExecutor(max_workers=processes)
+        run_episode = functools.partial(_run_episode, simulation, policy)
+    elif threads and threads > 1:
+        pool = ThreadPoolExecutor(max_workers=threads)
+        run_episode = _ThreadedEpisodes(simulation, policy)
+    else:
+        for episode in episodes:
+            yield _run_episode(simulation, policy, episode, **kwargs)
+        return
+
+    with pool:
+        futures = [pool.submit(run_episode, episode, **kwargs) for episode in episodes]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _streamed_episode_results(
+    simulation: Simulation,
+    policy,
+    episodes: range,
+    processes: int,
+    transport: str,
+    **kwargs,
+):
+    """Like "_episode_results" with processes, but workers stream every step to this
+    process while they run, instead of pickling all rows of an episode at its end."""
+    if transport not in ["shared_memory", "queue"]:
+        raise ValueError(
+            f"Unknown transport '{transport}', choose 'shared_memory' or 'queue'."
+        )
+    layout = None
+    if transport == "shared_memory":
+        layout = _step_layout(simulation, kwargs.get("observation_filter"))
+    channel = _Channel(layout)
+    steps: Dict[int, Dict[int, list]] = {}
+
+    try:
+        pool = ProcessPoolExecutor(
+            max_workers=processes, initializer=_open_channel, initargs=(channel,)
+        )
+        with pool:
+            futures = [
+                pool.submit(_stream_episode, simulation, policy, episode, **kwargs)
+                for episode in episodes
+            ]
+            try:
+                for episode, future in zip(episodes, futures):
+                    received = steps.setdefault(episode, {})
+                    while not future.done() or len(received) < future.result()[0]:
+                        for row in channel.receive(timeout=0.05):
+                            steps.setdefault(row[0], {})[row[1]] = row
+                    count, terms = future.result()
+                    del steps[episode]
+                    yield [received[step] for step in range(count)], terms
+            finally:
+                for future in futures:
+                    future.cancel()
+                # Keep reading, so that running workers aren't blocked by a full buffer
+                while not all(future.done() for future in futures):
+                    channel.receive(timeout=0.05)
+    finally:
+        channel.close()
+
+
+def _row_template(
+    simulation: Simulation, observation_filter: Optional[ObservationFilter]
+) -> list:
+    """A row with values for all agents, from which an EpisodeStore derives the same
+    columns for every episode, whichever agents decide in it."""
+    observation_filter = observation_filter or ObservationFilter()
+    observations = [observation_filter(o) for o in simulation.get_observations()]
+    actions = [
+        np.zeros(space.size if isinstance(space, Discrete) else space.shape)
+        for space in simulation.action_spaces()
+    ]
+    num_agents = simulation.number_of_agents()
+    return (
+        [0, 0]
+        + observations
+        + actions
+        + simulation.get_rewards()
+        + [False] * num_agents
+    )
+
+
+def _step_layout(
+    simulation: Simulation, observation_filter: Optional[ObservationFilter]
+) -> Optional[StepLayout]:
+    observation_filter = observation_filter or ObservationFilter()
+    observations = [observation_filter(o) for o in simulation.get_observations()]
+    actions = []
+    for space in simulation.action_spaces():
+        if isinstance(space, Discrete):
+            actions.append((space.size, np.int64))
+        else:
+            actions.append((int(np.prod(space.shape)), np.float64))
+    return StepLayout.infer(observations, actions, simulation.get_rewards())
+
+
+_channel: Optional[_Channel] = None
+
+
+def _open_channel(channel: _Channel) -> None:
+    global _channel
+    _channel = channel
+
+
+def _stream_episode(simulation: Simulation, policy, episode: int, **kwargs):
+    count = 0
+
+    def send(row: list) -> None:
+        nonlocal count
+        _channel.send(row)
+        count += 1
+
+    _, terms = _run_episode(simulation, policy, episode, on_step=send, **kwargs)
+    return count, terms
+
+
+class _ThreadedEpisodes:
+    """Runs episodes on a private copy of the simulation per thread. Policies are only
+    copied shallowly, so that e.g. all threads share one loaded Local model, but each
+    thread can seed its own copy."""
+
+    def __init__(self, simulation: Simulation, policy):
+        self.simulation = simulation
+        self.policy = policy
+        self.local = threading.local()
+
+    def __call__(self, episode: int, **kwargs):
+        if not hasattr(self.local, "simulation"):
+            self.local.simulation = copy.deepcopy(self.simulation)
+            self.local.policy = copy.copy(self.policy)
+        # Threads share the global random number generators, so only seed their own
+        return _run_episode(
+            self.local.simulation,
+            self.local.policy,
+            episode,
+            global_state=False,
+            **kwargs,
+        )
+
+
+class _EpisodeCollector:
+    """Adds the rows and reward terms of finished episodes to the result tables, and
+    hands them to the optional consumers of a run."""
+
+    def __init__(
+        self,
+        table: PrettyTable,
+        summary: PrettyTable,
+        num_agents: int,
+        debug_mode: bool = False,
+        stopping=None,
+        store: Optional[EpisodeStore] = None,
+        metrics: Optional[Metrics] = None,
+        log: Optional[_SummaryLog] = None,
+        memory: Optional[MemoryMonitor] = None,
+        keep_results: bool = False,
+        store_template: Optional[list] = None,
+    ):
+        self.table = table
+        self.summary = summary
+        self.num_agents = num_agents
+        self.debug_mode = debug_mode
+        self.stopping = stopping
+        self.store = store
+        self.metrics = metrics
+        self.log = log
+        self.memory = memory
+        self.keep_results = keep_results
+        self.store_template = store_template
+        self.results = []
+        self.episodes = 0
+        self.steps = 0
+        self.reward_sums: Dict[str, float] = {}
+        self.start = time.perf_counter()
+
+    def resume(self, summaries: List[list]) -> Optional[int]:
+        """Add the summaries of the episodes a previous run completed. Returns the episode
+        to continue with, or None if the stopping rule is already satisfied."""
+        for row in summaries:
+            self.summary.add_row(row)
+            if self.stopping:
+                self.stopping.update(dict(zip(self.summary.field_names[1:], row[1:])))
+        if self.store is not None:
+            # Drop episodes stored after the last recorded summary
+            self.store.truncate(len(summaries))
+        if summaries and self.stopping and self.stopping.is_satisfied():
+            return None
+        return len(summaries)
+
+    def collect(self, results, start: int = 0) -> None:
+        for episode, (rows, terms) in enumerate(results, start):
+            self.episodes += 1
+            # Only kept for a cache, since they hold all steps of all episodes
+            if self.keep_results:
+                self.results.append((rows, terms))
+            for row in rows:
+                self.table.add_row(row)
+            self.summary.add_row([episode] + terms)
+
+            # Store the steps first, so that the summary only lists completely stored episodes
+            if self.store is not None:
+                self.store.append(
+                    episode,
+                    *flatten_rows(rows, self.num_agents, self.store_template),
+                )
+            if self.log is not None:
+                self.log.append([episode] + terms)
+
+            if self.metrics is not None:
+                self._record(rows, terms)
+            if self.memory is not None:
+                self.memory.update()
+
+            if self.debug_mode:
+                print(">>> Complete table:\n")
+                print(self.table)
+                print(">>> Summary table:\n")
+                print(self.summary)
+
+            print(f"--------Finished episode {episode}--------")
+
+            if self.stopping:
+                self.stopping.update(dict(zip(self.summary.field_names[1:], terms)))
+                if self.stopping.is_satisfied():
+                    break
+
+    def close(self) -> None:
+        if self.log is not None and not self.log.file.closed:
+            self.log.close()
+
+    def _record(self, rows, terms) -> None:
+        metrics = self.metrics
+        self.steps += len(rows)
+        metrics.inc("episodes_total")
+        metrics.inc("steps_total", len(rows))
+        elapsed = time.perf_counter() - self.start
+        metrics.set("steps_per_second", self.steps / elapsed if elapsed > 0 else 0.0)
+
+        for term, value in zip(self.summary.field_names[1:], terms):
+            labels = {"term": term}
+            self.reward_sums[term] = self.reward_sums.get(term, 0.0) + float(value)
+            metrics.inc("reward_sum", float(value), labels)
+            metrics.set("reward_mean", self.reward_sums[term] / self.episodes, labels)
+            metrics.set("reward_last", float(value), labels)
+
+        if metrics.textfile:
+            metrics.write_textfile()
+
+
+def seed_episode(
+    policy,
+    seed: int,
+    episode: int,
+    simulation: Optional[Simulation] = None,
+    global_state: bool = True,
+) -> None:
+    """Seed the random number generators of the simulation and the policy with
+    independent streams derived from "seed" and the episode number. Two rollouts of the
+    same episode then see the same random numbers in the simulation, regardless of how
+    many random numbers their policies draw.
+
+    :param policy: the policy, seeded if it has a "seed" method.
+    :param seed: the seed of the rollout.
+    :param episode: the episode number.
+    :param simulation: Optionally the simulation, whose "np_random" and "py_random" are
+        replaced by generators seeded for this episode.
+    :param global_state: also seed the global random number generators, used by most
+        simulations. Leave them alone when several episodes run in threads at once.
+    """
+    simulation_seed, policy_seed = np.random.SeedSequence([seed, episode]).spawn(2)
+    state = int(simulation_seed.generate_state(1)[0])
+    if simulation is not None:
+        simulation.np_random = np.random.default_rng(simulation_seed)
+        simulation.py_random = random.Random(state)
+    if global_state:
+        np.random.seed(state)
+        random.seed(state)
+    if hasattr(policy, "seed"):
+        policy.seed(int(policy_seed.generate_state(1)[0]))
+
+
 def _define_tables(simulation, agents):
     table = PrettyTable()
     table.field_names = (
@@ -293,13 +1124,15 @@ def _define_tables(simulation, agents):
     )
 
     summary = PrettyTable()
-    summary.field_names = ["Episode"] + [
-        f"reward_{i}_{name}" for i in agents for name in simulation.get_reward(i).keys()
-    ]
+    summary.field_names = ["Episode"] + _summary_fields(simulation.get_rewards())
 
     return table, summary
 
 
+def _summary_fields(rewards: List[Dict[str, float]]) -> List[str]:
+    return [f"reward_{i}_{name}" for i, reward in enumerate(rewards) for name in reward]
+
+
 def from_gym(gym_instance: Union[Env, OrEnv]) -> Simulation:
     """
 
@@ -0,0 +1,288 @@
+import csv
+import io
+import os
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import yaml
+
+from pathmind.data import _atomic_write
+
+__all__ = ["EpisodeStore"]
+
+
+class EpisodeStore:
+    """Append-only binary store of rollout data, with random access by episode.
+
+    Every episode is one ".npy" file holding a (steps, columns) float array with the
+    flattened observations, actions, reward terms and done flags of all agents per step,
+    and a small "index.csv" lists the stored episodes. Episodes are appended as soon as
+    they complete, and reading an episode memory-maps just its file, so that you can
+    inspect e.g. episode 4812 of a long run without loading any other episode.
+
+    Pass the folder of a store as "store" to `Simulation.run` to write one, and open the
+    same folder with EpisodeStore to read it:
+
+        store = EpisodeStore("rollouts")
+        rewards = store.load(4812, columns=["reward_0_found_cheese"])
+
+    :param path: the folder of the store, which is created if it doesn't exist.
+    :param fsync: flush every appended episode to disk before returning, so that it survives
+        a crash of the machine, not just of the process.
+    """
+
+    def __init__(self, path: str, fsync: bool = False):
+        self.path = path
+        self.fsync = fsync
+        os.makedirs(path, exist_ok=True)
+        self.columns: List[str] = []
+        self.index: Dict[int, int] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-read the index, e.g. to pick up episodes a running rollout appended since."""
+        columns_file = os.path.join(self.path, "columns.yaml")
+        if os.path.exists(columns_file):
+            with open(columns_file) as f:
+                self.columns = yaml.safe_load(f).get("columns")
+
+        index_file = os.path.join(self.path, "index.csv")
+        if os.path.exists(index_file):
+            with open(index_file) as f:
+                self.index = {
+                    int(row["episode"]): int(row["steps"]) for row in csv.DictReader(f)
+                }
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def episodes(self) -> List[int]:
+        return sorted(self.index)
+
+    def append(self, episode: int, columns: List[str], data: np.ndarray) -> None:
+        """Store the (steps, columns) data of a completed episode."""
+        if episode in self.index:
+            raise ValueError(f"Episode {episode} is already stored in {self.path}.")
+        if not self.columns:
+            self.columns = list(columns)
+            content = yaml.dump({"columns": self.columns}).encode()
+            _atomic_write(
+                os.path.join(self.path, "columns.yaml"),
+                lambda f: f.write(content),
+                self.path,
+                fsync=self.fsync,
+            )
+        elif list(columns) != self.columns:
+            raise ValueError(
+                f"Episode {episode} has different columns than the episodes stored in {self.path}."
+            )
+
+        data = np.asarray(data, dtype=np.float64)
+        _atomic_write(
+            self._file(episode), lambda f: np.save(f, data), self.path, self.fsync
+        )
+
+        index_file = os.path.join(self.path, "index.csv")
+        is_new = not os.path.exists(index_file)
+        with open(index_file, "a", newline="") as f:
+            writer = csv.writer(f)
+            if is_new:
+                writer.writerow(["episode", "steps", "file"])
+            writer.writerow([episode, len(data), os.path.basename(self._file(episode))])
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self.index[episode] = len(data)
+
+    def truncate(self, num_episodes: int) -> None:
+        """Remove all episodes from "num_episodes" on, e.g. those a crashed rollout stored
+        after the last episode it recorded as complete."""
+        self.refresh()
+        stale = [episode for episode in self.index if episode >= num_episodes]
+        if not stale:
+            return
+        self.index = {e: s for e, s in self.index.items() if e < num_episodes}
+        rows = [["episode", "steps", "file"]] + [
+            [episode, steps, os.path.basename(self._file(episode))]
+            for episode, steps in sorted(self.index.items())
+        ]
+        content = "".join(f"{a},{b},{c}\r\n" for a, b, c in rows).encode()
+        _atomic_write(
+            os.path.join(self.path, "index.csv"),
+            lambda f: f.write(content),
+            self.path,
+            fsync=self.fsync,
+        )
+        for episode in stale:
+            if os.path.exists(self._file(episode)):
+                os.remove(self._file(episode))
+
+    def load(
+        self,
+        episode: int,
+        columns: Optional[Sequence[Union[str, int]]] = None,
+        steps: Optional[slice] = None,
+    ) -> np.ndarray:
+        """Memory-map the data of an episode, read-only.
+
+        :param episode: the episode to load.
+        :param columns: optional column names or positions to select, defaults to all columns.
+        :param steps: optional slice of steps to select, defaults to all steps.
+        :return: a (steps, columns) array backed by the episode's file.
+        """
+        if episode not in self.index:
+            self.refresh()
+        if episode not in self.index:
+            raise KeyError(f"Episode {episode} is not stored in {self.path}.")
+
+        data = np.load(self._file(episode), mmap_mode="r")
+        if steps is not None:
+            data = data[steps]
+        if columns is not None:
+            positions = [self._position(c) for c in columns]
+            if positions == list(range(positions[0], positions[-1] + 1)):
+                data = data[:, positions[0] : positions[-1] + 1]
+            else:
+                data = data[:, positions]
+        return data
+
+    def _position(self, column: Union[str, int]) -> int:
+        if isinstance(column, str):
+            if column not in self.columns:
+                raise KeyError(f"Unknown column '{column}'.")
+            return self.columns.index(column)
+        return column
+
+    def _file(self, episode: int) -> str:
+        return os.path.join(self.path, f"episode_{episode}.npy")
+
+
+class _SummaryLog:
+    """The summary CSV of a run, which every episode's summary is appended to as soon as
+    the episode completes, so that a crashed run can resume after the last complete one.
+
+    :param path: the summary CSV file.
+    :param field_names: the columns of the summary, starting with the episode.
+    :param resume: keep the episodes already in the file, instead of starting over.
+    :param fsync: flush the file to disk every this many episodes. Without, it is only handed
+        to the operating system, which survives a crash of the process, but not of the machine.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        field_names: List[str],
+        resume: bool = False,
+        fsync: Optional[int] = None,
+    ):
+        self.path = path
+        self.fsync = fsync
+        self.rows: List[list] = []
+        header = self._read(field_names) if resume and os.path.exists(path) else False
+        self.file = open(path, "a" if header else "w", newline="")
+        self.writer = csv.writer(self.file)
+        if not header:
+            self.writer.writerow(field_names)
+        self.count = 0
+
+    def _read(self, field_names: List[str]) -> bool:
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # A crash can leave the last line half-written, drop it
+        complete = data[: data.rfind(b"\n") + 1]
+        if len(complete) < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(len(complete))
+        lines = list(csv.reader(io.StringIO(complete.decode())))
+        if not lines:
+            return False
+        if lines[0] != list(field_names):
+            raise ValueError(
+                f"Can't resume, {self.path} summarizes other reward terms: {lines[0]}."
+            )
+        for episode, line in enumerate(lines[1:]):
+            if int(line[0]) != episode:
+                raise ValueError(
+                    f"Can't resume, {self.path} doesn't list episodes 0 to {len(lines) - 2} in order."
+                )
+            self.rows.append([episode] + [_number(value) for value in line[1:]])
+        return True
+
+    def append(self, row: list) -> None:
+        self.writer.writerow(row)
+        self.file.flush()
+        self.count += 1
+        if self.fsync and self.count % self.fsync == 0:
+            os.fsync(self.file.fileno())
+
+    def close(self) -> None:
+        if self.fsync:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self.file.close()
+
+
+def _number(value: str):
+    for parse in (int, float):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return value
+
+
+def flatten_rows(rows: list, num_agents: int, template: Optional[list] = None):
+    """Flatten the rows "Simulation.run" records per step into column names and a float array.
+
+    Each row holds the episode and step, followed by the observation dictionaries, actions,
+    reward dictionaries and done flags of all agents. Observations and actions of agents that
+    didn't need a decision in a step are None, and stored as NaN.
+
+    :param rows: the rows of an episode.
+    :param num_agents: the number of agents.
+    :param template: Optionally a row with values for all agents, e.g. recorded after "reset",
+        to derive the columns from. Otherwise they are derived from the first value at every
+        position, so agents that never decide in an episode get no columns.
+    """
+    columns = ["episode", "step"]
+    if template is None:
+        first = [_first_value(rows, position) for position in range(len(rows[0]))]
+    else:
+        first = template
+    observations = first[2 : 2 + num_agents]
+    actions = first[2 + num_agents : 2 + 2 * num_agents]
+    rewards = first[2 + 2 * num_agents : 2 + 3 * num_agents]
+    for i, obs in enumerate(observations):
+        for name, value in (obs or {}).items():
+            size = np.size(value)
+            columns += (
+                [f"obs_{i}_{name}"]
+                if np.ndim(value) == 0
+                else [f"obs_{i}_{name}_{k}" for k in range(size)]
+            )
+    for i, action in enumerate(actions):
+        columns += [f"action_{i}_{k}" for k in range(np.size(action))]
+    for i, reward in enumerate(rewards):
+        columns += [f"reward_{i}_{name}" for name in reward]
+    columns += [f"done_{i}" for i in range(num_agents)]
+
+    widths = [len(_flatten_row([item])) for item in first]
+    data = np.asarray([_flatten_row(row, widths) for row in rows], dtype=np.float64)
+    return columns, data
+
+
+def _first_value(rows: list, position: int):
+    return next((row[position] for row in rows if row[position] is not None), None)
+
+
+def _flatten_row(row: list, widths: Optional[List[int]] = None) -> List[float]:
+    values = []
+    for position, item in enumerate(row):
+        if item is None:
+            values.extend([np.nan] * (widths[position] if widths else 0))
+        elif isinstance(item, dict):
+            for value in item.values():
+                values.extend(np.ravel(value).tolist())
+        else:
+            values.extend(np.ravel(item).tolist())
+    return values
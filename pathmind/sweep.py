@@ -0,0 +1,219 @@
+import inspect
+import itertools
+import math
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Type, Union
+
+import numpy as np
+from prettytable import PrettyTable
+
+from pathmind.cache import RolloutCache
+from pathmind.simulation import (
+    Simulation,
+    _run_episode,
+    _summary_fields,
+    seed_episode,
+    write_table,
+)
+
+__all__ = ["grid", "random_search", "sweep"]
+
+
+def grid(**values: list) -> List[Dict]:
+    """All combinations of the given parameter values, e.g. grid(L=[...], c=[...])."""
+    names = list(values)
+    return [
+        dict(zip(names, combination))
+        for combination in itertools.product(*values.values())
+    ]
+
+
+def random_search(num_configs: int, seed: int = 0, **distributions) -> List[Dict]:
+    """Randomly sampled parameter configurations.
+
+    Each distribution is either a list to choose from uniformly, or a function that takes a
+    NumPy Generator and returns a value, e.g. lambda rng: rng.uniform(0.9, 1.0).
+    """
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(num_configs):
+        config = {}
+        for name, distribution in distributions.items():
+            if callable(distribution):
+                config[name] = distribution(rng)
+            else:
+                config[name] = distribution[rng.integers(len(distribution))]
+        configs.append(config)
+    return configs
+
+
+def sweep(
+    simulation_class: Type[Simulation],
+    configs: Union[Dict[str, list], List[Dict]],
+    policy_factory: Optional[Callable] = None,
+    num_episodes: int = 10,
+    seed: int = 0,
+    processes: Optional[int] = None,
+    cache: Optional[Union[str, RolloutCache]] = None,
+    summary_csv: Optional[str] = None,
+) -> PrettyTable:
+    """Evaluate a policy on many configurations of a simulation.
+
+    Every (configuration, episode) pair is a separate work item, so that a pool of worker
+    processes stays busy even if some configurations take much longer than others. All
+    configurations run the same episode seeds, so their differences don't stem from e.g.
+    different demand samples. With a "cache", configurations already evaluated before
+    are taken from it, and only new ones are run.
+
+        table = sweep(InventorySim, grid(L=[[3, 5, 10], [1, 2, 3]], c=[[100, 90, 80]]),
+                      policy_factory=lambda config: Random(), num_episodes=100, processes=8)
+
+    :param simulation_class: your Simulation class. Parameters its constructor takes are passed
+        to it, all other parameters have to be attributes of it, and are set after construction.
+        Anything the constructor derives from such an attribute then keeps its default, so make
+        parameters that other state depends on constructor parameters.
+    :param configs: a list of parameter dictionaries, e.g. from `grid` or `random_search`, or a
+        dictionary of parameter values to build a grid from.
+    :param policy_factory: returns the Policy to evaluate for a configuration. Default is random.
+        It needs to be picklable to use "processes", e.g. a module-level function.
+    :param num_episodes: the number of episodes per configuration.
+    :param seed: the seed from which all episode seeds are derived.
+    :param processes: Optionally spread all work items over this many worker processes.
+    :param cache: Optionally a RolloutCache, or the folder of one, for the results per configuration.
+    :param summary_csv: If you specify a summary CSV file, the table is stored in that file.
+    :return: a table with one row per configuration, holding the mean and standard error of every
+        summary reward term.
+    """
+    if isinstance(configs, dict):
+        configs = grid(**configs)
+    if not configs:
+        raise ValueError("Specify at least one configuration to sweep over.")
+    if isinstance(cache, str):
+        cache = RolloutCache(cache)
+
+    results: Dict[int, List[Optional[list]]] = {}
+    keys = {}
+    for index, config in enumerate(configs):
+        results[index] = [None] * num_episodes
+        if cache is None:
+            continue
+        # Seed like the first episode, so that the state of simulations which draw random
+        # numbers on construction or reset is the same every time
+        policy = _make_policy(policy_factory, config)
+        simulation = _configure(simulation_class, config)
+        seed_episode(policy, seed, 0, simulation)
+        simulation.reset()
+        keys[index] = cache.key(
+            simulation,
+            policy,
+            config=config,
+            num_episodes=num_episodes,
+            seed=seed,
+        )
+        cached = cache.get(keys[index])
+        if cached is not None:
+            results[index] = cached
+
+    items = [
+        (index, episode)
+        for index in results
+        for episode in range(num_episodes)
+        if results[index][episode] is None
+    ]
+    arguments = [
+        (simulation_class, configs[index], policy_factory, episode, seed)
+        for index, episode in items
+    ]
+    remaining = Counter(index for index, _ in items)
+
+    def complete(item, terms) -> None:
+        index, episode = item
+        results[index][episode] = terms
+        remaining[index] -= 1
+        # Cache every configuration as soon as it's complete, so a crash doesn't lose it
+        if cache is not None and remaining[index] == 0:
+            cache.put(keys[index], results[index])
+
+    if processes and processes > 1 and items:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {
+                pool.submit(_sweep_episode, *args): item
+                for args, item in zip(arguments, items)
+            }
+            try:
+                for future in as_completed(futures):
+                    complete(futures[future], future.result())
+            finally:
+                for future in futures:
+                    future.cancel()
+    else:
+        for args, item in zip(arguments, items):
+            complete(item, _sweep_episode(*args))
+
+    simulation = _configure(simulation_class, configs[0])
+    simulation.reset()
+    terms = _summary_fields(simulation.get_rewards())
+    table = _sweep_table(configs, terms, results)
+    write_table(table=table, out_csv=summary_csv)
+    return table
+
+
+def _sweep_episode(simulation_class, config, policy_factory, episode, seed) -> list:
+    simulation = _configure(simulation_class, config)
+    policy = _make_policy(policy_factory, config)
+    _, terms = _run_episode(simulation, policy, episode, seed=seed)
+    return terms
+
+
+def _configure(simulation_class, config: Dict) -> Simulation:
+    accepted = inspect.signature(simulation_class).parameters
+    takes_kwargs = any(p.kind == p.VAR_KEYWORD for p in accepted.values())
+    arguments = {
+        name: value
+        for name, value in config.items()
+        if name in accepted or takes_kwargs
+    }
+    simulation = simulation_class(**arguments)
+    for name, value in config.items():
+        if name in arguments:
+            continue
+        if not hasattr(simulation, name):
+            raise ValueError(
+                f"'{name}' is neither a parameter of {simulation_class.__name__} "
+                f"nor one of its attributes."
+            )
+        setattr(simulation, name, value)
+    return simulation
+
+
+def _make_policy(policy_factory, config: Dict):
+    if policy_factory is None:
+        # Don't move the import statement. This prevents a circular import.
+        from pathmind.policy import Random
+
+        return Random()
+    return policy_factory(config)
+
+
+def _sweep_table(configs: List[Dict], terms: List[str], results: Dict) -> PrettyTable:
+    names = list(dict.fromkeys(name for config in configs for name in config))
+    table = PrettyTable()
+    table.field_names = (
+        names
+        + ["Episodes"]
+        + [f"{term}_{stat}" for term in terms for stat in ("mean", "std_error")]
+    )
+    for index, config in enumerate(configs):
+        values = np.asarray(results[index], dtype=np.float64)
+        means = values.mean(axis=0)
+        errors = (
+            values.std(axis=0, ddof=1) / math.sqrt(len(values))
+            if len(values) > 1
+            else np.full(len(terms), math.nan)
+        )
+        row = [config.get(name) for name in names] + [len(values)]
+        for mean, error in zip(means, errors):
+            row += [mean, error]
+        table.add_row(row)
+    return table
@@ -0,0 +1,273 @@
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+__all__ = ["RingBuffer", "StepLayout"]
+
+
+class StepLayout:
+    """Fixed layout of the rows `Simulation.run` records per step as flat float64 records:
+    episode, step, per agent whether it has observations and whether it has actions, i.e.
+    whether it decided in this step, then the observations, actions, reward terms and done
+    flags of all agents, in the order of `pathmind.store.flatten_rows`.
+
+    :param observations: per agent, the name, shape and NumPy dtype kind of every observation.
+    :param actions: per agent, the size and dtype of its actions.
+    :param rewards: per agent, the name and NumPy dtype kind of every reward term.
+    """
+
+    def __init__(
+        self,
+        observations: List[List[Tuple[str, tuple, str]]],
+        actions: List[Tuple[int, np.dtype]],
+        rewards: List[List[Tuple[str, str]]],
+    ):
+        self.observations = observations
+        self.actions = actions
+        self.rewards = rewards
+        self.num_agents = len(actions)
+        self.width = (
+            2
+            + 2 * self.num_agents
+            + sum(int(np.prod(shape)) for obs in observations for _, shape, _ in obs)
+            + sum(size for size, _ in actions)
+            + sum(len(terms) for terms in rewards)
+            + self.num_agents
+        )
+
+    @classmethod
+    def infer(
+        cls,
+        observations: List[Dict],
+        actions: List[Tuple[int, np.dtype]],
+        rewards: List[Dict[str, float]],
+    ) -> Optional["StepLayout"]:
+        """The layout of steps with observations and rewards like the given ones, or None
+        if they aren't all numbers or arrays of numbers."""
+        specs = []
+        for obs in observations:
+            spec = []
+            for name, value in obs.items():
+                array = np.asarray(value)
+                if _kind(array) is None:
+                    return None
+                spec.append((name, array.shape, _kind(array)))
+            specs.append(spec)
+        terms = []
+        for reward in rewards:
+            kinds = []
+            for name, value in reward.items():
+                array = np.asarray(value)
+                if _kind(array) is None or array.shape:
+                    return None
+                kinds.append((name, _kind(array)))
+            terms.append(kinds)
+        return cls(specs, actions, terms)
+
+    def write(self, row: list, out: np.ndarray) -> bool:
+        """Flatten a row into "out". Returns False, without a complete record, if the row
+        doesn't fit this layout, e.g. because an observation changed its shape or type."""
+        n = self.num_agents
+        try:
+            out[0], out[1] = row[0], row[1]
+            out[2 : 2 + n] = [obs is not None for obs in row[2 : 2 + n]]
+            out[2 + n : 2 + 2 * n] = [a is not None for a in row[2 + n : 2 + 2 * n]]
+            position = 2 + 2 * n
+            for spec, obs in zip(self.observations, row[2 : 2 + n]):
+                if obs is not None and len(obs) != len(spec):
+                    return False
+                for name, shape, kind in spec:
+                    size = int(np.prod(shape))
+                    if obs is None:
+                        out[position : position + size] = np.nan
+                    else:
+                        value = np.asarray(obs[name])
+                        if value.shape != shape or _kind(value) != kind:
+                            return False
+                        out[position : position + size] = value.ravel()
+                    position += size
+            for (size, _), action in zip(self.actions, row[2 + n : 2 + 2 * n]):
+                if action is None:
+                    out[position : position + size] = np.nan
+                else:
+                    out[position : position + size] = np.ravel(action)
+                position += size
+            for terms, reward in zip(self.rewards, row[2 + 2 * n : 2 + 3 * n]):
+                if len(reward) != len(terms):
+                    return False
+                for name, kind in terms:
+                    value = np.asarray(reward[name])
+                    if value.shape != () or _kind(value) != kind:
+                        return False
+                    out[position] = value
+                    position += 1
+            out[position : position + n] = row[2 + 3 * n : 2 + 4 * n]
+        except (KeyError, ValueError, TypeError):
+            return False
+        return True
+
+    def read(self, record: np.ndarray) -> list:
+        """Rebuild the row of a record, with the same dictionaries and types as the original."""
+        n = self.num_agents
+        row = [int(record[0]), int(record[1])]
+        has_observations = record[2 : 2 + n].astype(bool)
+        has_actions = record[2 + n : 2 + 2 * n].astype(bool)
+        position = 2 + 2 * n
+        for spec, present in zip(self.observations, has_observations):
+            # Agents that didn't need a decision have no observations
+            if not present:
+                row.append(None)
+                position += sum(int(np.prod(shape)) for _, shape, _ in spec)
+                continue
+            obs = {}
+            for name, shape, kind in spec:
+                size = int(np.prod(shape))
+                value = record[position : position + size].astype(_DTYPES[kind])
+                obs[name] = value.reshape(shape).tolist()
+                position += size
+            row.append(obs)
+        for (size, dtype), present in zip(self.actions, has_actions):
+            chunk = record[position : position + size]
+            row.append(chunk.astype(dtype) if present else None)
+            position += size
+        for terms in self.rewards:
+            reward = {}
+            for name, kind in terms:
+                reward[name] = record[position].astype(_DTYPES[kind]).item()
+                position += 1
+            row.append(reward)
+        row += [bool(done) for done in record[position : position + self.num_agents]]
+        return row
+
+
+_DTYPES = {"b": np.bool_, "i": np.int64, "u": np.uint64, "f": np.float64}
+
+
+def _kind(array: np.ndarray) -> Optional[str]:
+    return array.dtype.kind if array.dtype.kind in _DTYPES else None
+
+
+class RingBuffer:
+    """A fixed-size queue of float64 records in shared memory, which several processes
+    write to and one process reads from without pickling.
+
+    Writers block while the buffer is full, so a slow reader throttles them instead of
+    letting memory grow. Create it in the reading process, and pass it to writer processes
+    on their creation, e.g. through a pool's "initargs".
+
+    :param width: the number of values per record.
+    :param capacity: the number of records the buffer holds.
+    """
+
+    def __init__(self, width: int, capacity: int = 4096):
+        self.width = width
+        self.capacity = capacity
+        self.memory = shared_memory.SharedMemory(
+            create=True, size=max(width * capacity * 8, 8)
+        )
+        self.name = self.memory.name
+        self.lock = multiprocessing.Lock()
+        self.free = multiprocessing.Semaphore(capacity)
+        self.filled = multiprocessing.Semaphore(0)
+        self.head = multiprocessing.Value("q", 0, lock=False)
+        self.tail = 0
+        self.owner = True
+        self._attach()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["memory"], state["records"]
+        state["owner"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.memory = shared_memory.SharedMemory(name=self.name)
+        self._attach()
+
+    def _attach(self):
+        self.records = np.ndarray(
+            (self.capacity, self.width), dtype=np.float64, buffer=self.memory.buf
+        )
+
+    def reserve(self) -> None:
+        """Wait until there is room for one more record."""
+        self.free.acquire()
+
+    def commit(self, record: np.ndarray) -> None:
+        """Append a record, after reserving room for it."""
+        with self.lock:
+            self.records[self.head.value % self.capacity] = record
+            self.head.value += 1
+        self.filled.release()
+
+    def put(self, record: np.ndarray) -> None:
+        self.reserve()
+        self.commit(record)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """A view of the oldest record, or None if none arrives within "timeout". The view
+        stays valid until "release" is called."""
+        if not self.filled.acquire(timeout=timeout):
+            return None
+        return self.records[self.tail % self.capacity]
+
+    def release(self) -> None:
+        """Free the record returned by the last "get"."""
+        self.tail += 1
+        self.free.release()
+
+    def close(self) -> None:
+        del self.records
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+class _Channel:
+    """What workers send steps and finished episodes through: a ring buffer for steps
+    that fit the layout, and a queue for all other steps."""
+
+    def __init__(self, layout: Optional[StepLayout], capacity: int = 4096):
+        self.layout = layout
+        self.ring = RingBuffer(layout.width, capacity) if layout else None
+        self.queue = multiprocessing.Queue()
+        self.record = np.empty(layout.width) if layout else None
+
+    def send(self, row: list) -> None:
+        if self.ring is not None:
+            self.ring.reserve()
+            if self.layout.write(row, self.record):
+                self.ring.commit(self.record)
+                return
+            self.ring.free.release()
+        self.queue.put(row)
+
+    def receive(self, timeout: float) -> List[list]:
+        """All rows that arrived, waiting up to "timeout" for the first one."""
+        rows = []
+        if self.ring is not None:
+            record = self.ring.get(timeout=timeout)
+            while record is not None:
+                rows.append(self.layout.read(record))
+                self.ring.release()
+                record = self.ring.get(timeout=0)
+            timeout = 0
+        try:
+            while True:
+                if timeout:
+                    rows.append(self.queue.get(timeout=timeout))
+                else:
+                    rows.append(self.queue.get_nowait())
+                timeout = 0
+        except queue.Empty:
+            pass
+        return rows
+
+    def close(self) -> None:
+        if self.ring is not None:
+            self.ring.close()
+        self.queue.close()
@@ -17,7 +17,9 @@ setup(
         "or-gym",
     ],
     extras_require={
-        "tests": ["pytest", "flake8", "flake8-debugger", "pre-commit", "pandas"]
+        "tests": ["pytest", "flake8", "flake8-debugger", "pre-commit", "pandas"],
+        "numba": ["numba"],
+        "payloads": ["msgpack", "zstandard"],
     },
     packages=find_packages(),
     license="MIT",
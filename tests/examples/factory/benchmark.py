@@ -0,0 +1,50 @@
+"""Compare the cost of a single price lookup with a boolean scan over a DataFrame,
+as the factory example used to do, to a lookup on a sorted TimeSeries index.
+
+Run from this folder with "python benchmark.py". The scan grows linearly with the
+size of the data set, whereas the indexed lookup stays at O(log n).
+"""
+import contextlib
+import datetime
+import io
+import timeit
+
+import numpy as np
+import pandas as pd
+from factory_env_pathmind import EnergyFactory
+
+from pathmind.data import TimeSeries
+from pathmind.policy import Random
+
+
+def lookups(size: int, number: int = 200):
+    dates = pd.date_range("2020-01-01", periods=size, freq="5min")
+    prices = np.random.rand(size)
+    data = pd.DataFrame({"Date": dates, "Price": prices})
+    series = TimeSeries(dates, prices)
+    time = dates[size // 2].to_pydatetime() + datetime.timedelta(minutes=5)
+
+    def scan():
+        filtered = data[data.Date == time]
+        return float(filtered.Price.iloc[0]) if len(filtered) > 0 else 0.0
+
+    scan_time = timeit.timeit(scan, number=number) / number
+    index_time = timeit.timeit(lambda: series.at(time), number=number) / number
+    return scan_time, index_time
+
+
+def episode():
+    simulation = EnergyFactory()
+    start = timeit.default_timer()
+    # A single episode runs in debug mode, which prints the complete table
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulation.run(Random())
+    return timeit.default_timer() - start
+
+
+if __name__ == "__main__":
+    print(f"{'rows':>10} {'scan (us)':>12} {'index (us)':>12}")
+    for size in [10**3, 10**4, 10**5, 10**6]:
+        scan_time, index_time = lookups(size)
+        print(f"{size:>10} {scan_time * 1e6:>12.1f} {index_time * 1e6:>12.1f}")
+    print(f"Full factory episode: {episode():.2f}s")
@@ -1,8 +1,10 @@
 import datetime
 import typing
 
+import numpy as np
 import pandas as pd
 
+from pathmind.data import TimeSeries, load_columns
 from pathmind.simulation import Continuous, Discrete, Simulation
 
 
@@ -34,26 +36,33 @@ class EnergyFactory(Simulation):
     def action_space(self, agent_id) -> typing.Union[Continuous, Discrete]:
         return Discrete(self.number_of_actions)
 
-    def __init__(self, energy_data="./data/prices.xls", only_positive_prices=True):
+    def __init__(
+        self,
+        energy_data="./data/prices.xls",
+        only_positive_prices=True,
+        weekly_production_target=5000,
+        buying_window=30,
+        max_changes_per_day=12,
+        price_update_window=5,
+    ):
 
         # Factory parameters from config
         self.only_positive_prices = only_positive_prices
-        self.weekly_production_target = 5000
-        self.buying_window = 30
-        self.max_changes_per_day = 12
-        self.price_update_window = 5
+        self.weekly_production_target = weekly_production_target
+        self.buying_window = buying_window
+        self.max_changes_per_day = max_changes_per_day
+        self.price_update_window = price_update_window
         self.normalize_to_window = 60 / self.buying_window
         self.historic_voltage_estimation = 435
 
         self.start_time = datetime.datetime(2020, 5, 11, 8, 50, 0)
         self.current_time = self.start_time
 
-        data = pd.read_excel(energy_data)
-        self.data = data.sort_values(by="Date", ascending=True)
-        if self.only_positive_prices:
-            self.data.Price[self.data.Price < 0] = 0
-        last_timestamp = list(self.data.Date)[-1]
-        self.end_time = last_timestamp.to_pydatetime()
+        # Parsed once, then memory-mapped by every further instance or worker process.
+        # Negative prices are clipped per lookup, to keep the prices memory-mapped.
+        data = load_columns(energy_data)
+        self.price_series = TimeSeries(data["Date"], data["Price"])
+        self.end_time = pd.Timestamp(self.price_series.timestamps[-1]).to_pydatetime()
 
         weeks_between = (self.end_time - self.start_time).days / 7.0
         self.adjusted_target = weeks_between * self.weekly_production_target
@@ -64,6 +73,13 @@ class EnergyFactory(Simulation):
         self.previous_reward = [0 for _ in range(10)]
         self.total_cost = 0.0
         self.total_production = 0.0
+        self.cost_of_action = 0.0
+        self.cell_control_power = 0.0
+        self.price = 0.0
+        self.number_changes_per_day = 0
+        self.steps = 0
+        self.previous_cell_control_power = None
+        self.previous_day_of_year = None
 
     def step(self) -> None:
         self.steps += 1
@@ -148,17 +164,18 @@ class EnergyFactory(Simulation):
         ]
 
     def estimate_cost_of_action(self):
-        sum_cost_of_action = 0
-        for minutes in range(
-            self.price_update_window, self.buying_window + 1, self.price_update_window
-        ):
-            action_price = self.price_at_date_time(
-                self.current_time + datetime.timedelta(minutes=minutes)
+        look_ahead = [
+            self.current_time + datetime.timedelta(minutes=minutes)
+            for minutes in range(
+                self.price_update_window,
+                self.buying_window + 1,
+                self.price_update_window,
             )
-            sum_cost_of_action += (
-                action_price * self.total_milli_watts() / self.normalize_to_window
-            )
-        self.cost_of_action = sum_cost_of_action
+        ]
+        action_prices = self.clip_price(self.price_series.at(look_ahead, default=0.0))
+        self.cost_of_action = float(
+            np.sum(action_prices * self.total_milli_watts() / self.normalize_to_window)
+        )
 
     def update_change_counter(self):
         if self.previous_day_of_year == self.day_of_year():
@@ -182,8 +199,10 @@ class EnergyFactory(Simulation):
         return self.current_time.timetuple().tm_yday
 
     def price_at_date_time(self, time) -> float:
-        filtered = self.data[self.data.Date == time]
-        return float(filtered.Price) if len(filtered) > 0 else 0.0
+        return self.clip_price(self.price_series.at(time, default=0.0))
+
+    def clip_price(self, price):
+        return np.maximum(price, 0) if self.only_positive_prices else price
 
     def total_milli_watts(self) -> float:
         return self.historic_voltage_estimation * self.cell_control_power / 1000.0
@@ -0,0 +1,45 @@
+"""Compare episodes of the reference InvManagementMasterEnv with its vectorized port
+FastInvManagementEnv, and with CompiledInvManagementEnv. Run from the "tests" folder with
+"python -m examples.inventory_management.benchmark".
+"""
+import contextlib
+import io
+import timeit
+
+import numpy as np
+from examples.inventory_management.compiled_inventory_env_pathmind import (
+    CompiledInvManagementEnv,
+)
+from examples.inventory_management.fast_inventory_env_pathmind import (
+    FastInvManagementEnv,
+)
+from examples.inventory_management.inventory_env_pathmind import InvManagementMasterEnv
+
+
+def episode(simulation, actions: np.ndarray):
+    simulation.reset()
+    for action in actions:
+        simulation.step(action)
+        simulation.get_observation(0)
+        simulation.get_reward(0)
+
+
+def per_episode(function, number: int = 200) -> float:
+    return timeit.timeit(function, number=number) / number
+
+
+if __name__ == "__main__":
+    actions = np.random.default_rng(0).integers(0, 100, size=(30, 3))
+
+    reference = InvManagementMasterEnv()
+    # Swallow the reference's per-step prints, but still pay for them
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds = per_episode(lambda: episode(reference, actions))
+    print(f"InvManagementMasterEnv: {seconds * 1e3:.2f} ms/episode")
+
+    for cls in [FastInvManagementEnv, CompiledInvManagementEnv]:
+        simulation = cls(seed=0)
+        # Compile outside of the measurement
+        episode(simulation, actions)
+        seconds = per_episode(lambda: episode(simulation, actions))
+        print(f"{cls.__name__}: {seconds * 1e3:.2f} ms/episode")
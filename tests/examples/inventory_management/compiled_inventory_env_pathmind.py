@@ -0,0 +1,119 @@
+"""
+Multi-period inventory management, with the state transition of each period compiled
+into a single step kernel. Falls back to running the kernel as Python without Numba.
+"""
+import numpy as np
+from examples.inventory_management.fast_inventory_env_pathmind import (
+    FastInvManagementEnv,
+)
+
+from pathmind.kernels import step_kernel
+
+
+@step_kernel
+def inventory_step(
+    n,
+    action,
+    I,
+    T,
+    R,
+    S,
+    B,
+    LS,
+    P,
+    action_log,
+    D,
+    capacity,
+    lead_time,
+    unit_price,
+    unit_cost,
+    demand_cost,
+    holding_cost,
+    discounts,
+    backlog,
+):
+    """Advance all history arrays by period "n", in place. See FastInvManagementEnv.step
+    for the sequence of events."""
+    stages = len(capacity)
+    requested = np.empty(stages)
+    received = np.zeros(stages)
+    inventory = np.empty(stages)
+
+    for i in range(stages):
+        # place replenishment orders, limited by capacity and the supplier's inventory
+        order = np.floor(max(action[i], 0))
+        action_log[n, i] = order
+        if n >= 1:
+            order += B[n - 1, i + 1]
+        requested[i] = order
+        available = I[n, i + 1] if i + 1 < stages else np.inf
+        R[n, i] = min(order, capacity[i], available)
+
+    for i in range(stages):
+        # receive replenishments placed lead time periods ago
+        if n >= lead_time[i]:
+            received[i] = R[n - lead_time[i], i]
+        inventory[i] = I[n, i] + received[i]
+
+    demand = D[n]
+    if n >= 1:
+        demand += B[n - 1, 0]
+
+    S[n, 0] = min(inventory[0], demand)
+    for i in range(stages):
+        S[n, i + 1] = R[n, i]
+        I[n + 1, i] = inventory[i] - S[n, i]
+        T[n + 1, i] = T[n, i] - received[i] + R[n, i]
+
+    profit = 0.0
+    for j in range(stages + 1):
+        sold = S[n, j]
+        ordered = R[n, j] if j < stages else sold
+        unfulfilled = (demand if j == 0 else requested[j - 1]) - sold
+        on_hand = I[n + 1, j] if j < stages else 0.0
+        if backlog:
+            B[n, j] = unfulfilled
+        else:
+            LS[n, j] = unfulfilled
+        profit += unit_price[j] * sold - (
+            unit_cost[j] * ordered
+            + demand_cost[j] * unfulfilled
+            + holding_cost[j] * on_hand
+        )
+    P[n] = discounts[n] * profit
+
+
+class CompiledInvManagementEnv(FastInvManagementEnv):
+    """FastInvManagementEnv, advancing each period in one compiled kernel call."""
+
+    def step(self, action=None):
+        if action is None:
+            action = self.action.get(0)
+        n = self.period
+        inventory_step(
+            n,
+            np.asarray(action, dtype=np.float64),
+            self.I,
+            self.T,
+            self.R,
+            self.S,
+            self.B,
+            self.LS,
+            self.P,
+            self.action_log,
+            self.D,
+            self.supply_capacity,
+            self.lead_time,
+            self.unit_price,
+            self.unit_cost,
+            self.demand_cost,
+            self.holding_cost,
+            self.discounts,
+            self.backlog,
+        )
+
+        self.period += 1
+        self._update_state()
+        self.reward = self.P[n]
+        self.done = self.period >= self.num_periods
+        return self.state, self.reward, self.done, {}
@@ -0,0 +1,214 @@
+"""
+Multi-period inventory management, vectorized.
+
+The same supply chain as InvManagementMasterEnv in inventory_env_pathmind.py, written as a
+template for fast supply-chain simulations:
+
+- customer demand for all periods is drawn in one vectorized call at reset, from a random
+  number generator owned by the instance, so that several instances can run side by side,
+- all stages are updated at once with array operations, and
+- stepping does no I/O.
+"""
+from typing import Optional
+
+import numpy as np
+
+from pathmind.simulation import Discrete, Simulation
+
+
+class FastInvManagementEnv(Simulation):
+    """
+    See InvManagementMasterEnv for the sequence of events in each period. The parameters
+    have the same meaning and defaults, and "dist" selects the demand distribution:
+
+        1: poisson, dist_param {"mu": <mean>}
+        2: binomial, dist_param {"n": <trials>, "p": <success probability>}
+        3: uniform random integer, dist_param {"low": <lower bound>, "high": <exclusive upper bound>}
+        4: geometric, dist_param {"p": <success probability>}
+        5: user supplied demand "user_D" per period
+
+    :param seed: seed of the demand generator. Without one, every reset derives the demand of
+        the episode from "self.np_random", so that "run(seed=...)" reproduces it, also with
+        "threads".
+    """
+
+    def __init__(
+        self,
+        periods: int = 30,
+        I0=(100, 100, 200),
+        p: float = 2,
+        r=(1.5, 1.0, 0.75, 0.5),
+        k=(0.10, 0.075, 0.05, 0.025),
+        h=(0.15, 0.10, 0.05),
+        c=(100, 90, 80),
+        L=(3, 5, 10),
+        backlog: bool = True,
+        dist: int = 1,
+        dist_param: Optional[dict] = None,
+        alpha: float = 0.97,
+        seed: Optional[int] = None,
+        user_D=None,
+    ):
+        self.num_periods = periods
+        self.init_inv = np.asarray(I0, dtype=float)
+        self.unit_price = np.append(p, r[:-1])  # cost to stage 1 is price to stage 2
+        self.unit_cost = np.asarray(r, dtype=float)
+        self.demand_cost = np.asarray(k, dtype=float)
+        self.holding_cost = np.append(h, 0)  # holding cost at last stage is 0
+        self.supply_capacity = np.asarray(c, dtype=float)
+        self.lead_time = np.asarray(L, dtype=int)
+        self.backlog = backlog
+        self.dist = dist
+        self.dist_param = {"mu": 20} if dist_param is None else dist_param
+        self.discount = alpha
+        self.user_D = None if user_D is None else np.asarray(user_D, dtype=float)
+        self.num_stages = len(self.init_inv) + 1
+
+        m = self.num_stages
+        if m < 2:
+            raise ValueError("The minimum number of stages is 2.")
+        for name, values, size in [
+            ("r", self.unit_cost, m),
+            ("k", self.demand_cost, m),
+            ("h", self.holding_cost, m),
+            ("c", self.supply_capacity, m - 1),
+            ("L", self.lead_time, m - 1),
+        ]:
+            if len(values) != size:
+                raise ValueError(f"The length of {name} has to be {size}.")
+        if dist not in [1, 2, 3, 4, 5]:
+            raise ValueError("dist must be one of 1, 2, 3, 4, 5.")
+        if dist == 5 and (self.user_D is None or len(self.user_D) != periods):
+            raise ValueError("user_D needs one demand value per period.")
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in the range (0,1].")
+
+        self.seed_int = seed
+        self.rng = np.random.default_rng(seed)
+        self.stages = np.arange(m - 1)
+        self.lt_max = self.lead_time.max()
+        self.discounts = alpha ** np.arange(periods)
+
+        self.reset()
+
+    def action_space(self, agent_id):
+        return Discrete(100, 3)  # Decision for 3 stages, Actions 0 - 99
+
+    def number_of_agents(self) -> int:
+        return 1
+
+    def is_done(self, agent_id) -> bool:
+        return self.done
+
+    def get_reward(self, agent_id):
+        return {"reward": self.reward}
+
+    def get_observation(self, agent_id):
+        return {f"current_state_{k}": v for k, v in enumerate(self.state)}
+
+    def sample_demand(self, periods: int) -> np.ndarray:
+        """Draw the customer demand of "periods" periods at once."""
+        if self.dist == 5:
+            return self.user_D[:periods].copy()
+        param = self.dist_param
+        if self.dist == 1:
+            demand = self.rng.poisson(param["mu"], periods)
+        elif self.dist == 2:
+            demand = self.rng.binomial(param["n"], param["p"], periods)
+        elif self.dist == 3:
+            demand = self.rng.integers(param["low"], param["high"], periods)
+        else:
+            demand = self.rng.geometric(param["p"], periods)
+        return demand.astype(float)
+
+    def reset(self):
+        periods = self.num_periods
+        m = self.num_stages
+
+        if self.seed_int is None:
+            self.rng = np.random.default_rng(self.np_random.integers(2**32))
+        self.D = self.sample_demand(periods)  # demand at retailer
+
+        self.I = np.zeros([periods + 1, m - 1])  # inventory at start of each period
+        self.T = np.zeros([periods + 1, m - 1])  # pipeline inventory
+        self.R = np.zeros([periods, m - 1])  # replenishment orders
+        self.S = np.zeros([periods, m])  # units sold
+        self.B = np.zeros([periods, m])  # backlog
+        self.LS = np.zeros([periods, m])  # lost sales
+        self.P = np.zeros(periods)  # profit
+        self.action_log = np.zeros((periods, m - 1))
+
+        self.period = 0
+        self.I[0] = self.init_inv
+        self.done = False
+        self._update_state()
+        return self.state
+
+    def step(self, action=None):
+        if action is None:
+            action = self.action.get(0)
+        R = np.maximum(action, 0).astype(int)
+
+        n = self.period
+        I = self.I[n].copy()  # inventory at start of period n
+        self.action_log[n] = R
+
+        # place replenishment orders, including backlogged ones, limited by the capacity
+        # and by the inventory available at the supplier (last stage has unlimited supply)
+        if n >= 1:
+            R = R + self.B[n - 1, 1:]
+        requested = R
+        available = np.append(I[1:], np.inf)
+        R = np.minimum(np.minimum(R, self.supply_capacity), available)
+        self.R[n] = R
+
+        # receive replenishments placed lead time periods ago
+        placed = n - self.lead_time
+        arrived = placed >= 0
+        received = np.zeros(self.num_stages - 1)
+        received[arrived] = self.R[placed[arrived], self.stages[arrived]]
+        I += received
+
+        # demand is realized, including backlogged demand
+        D = self.D[n]
+        if n >= 1:
+            D = D + self.B[n - 1, 0]
+
+        S = np.append(min(I[0], D), R)  # units sold at each stage
+        self.S[n] = S
+
+        I -= S[:-1]
+        self.I[n + 1] = I
+        self.T[n + 1] = self.T[n] - received + R
+
+        # unfulfilled demand and replenishment orders
+        U = np.append(D, requested) - S
+        if self.backlog:
+            self.B[n] = U
+        else:
+            self.LS[n] = U
+
+        costs = (
+            self.unit_cost * np.append(R, S[-1])
+            + self.demand_cost * U
+            + self.holding_cost * np.append(I, 0)
+        )
+        self.P[n] = self.discounts[n] * np.sum(self.unit_price * S - costs)
+
+        self.period += 1
+        self._update_state()
+        self.reward = self.P[n]
+        self.done = self.period >= self.num_periods
+        return self.state, self.reward, self.done, {}
+
+    def _update_state(self):
+        """Inventory on hand, followed by the orders of the last "lt_max" periods."""
+        m = self.num_stages - 1
+        t = self.period
+        state = np.zeros(m * (self.lt_max + 1))
+        state[:m] = self.I[t]
+        recent = self.action_log[max(t - self.lt_max, 0) : t].ravel()
+        if len(recent):
+            state[-len(recent) :] = recent
+        self.state = state
+        self.reward = 0
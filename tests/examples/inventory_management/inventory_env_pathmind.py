@@ -313,7 +313,7 @@ class InvManagementMasterEnv(Simulation):
         c = self.supply_capacity  # capacity
         self.action_log[n] = R.copy()
         # available inventory at the m+1 stage (note: last stage has unlimited supply)
-        Im1 = np.append(I[1:], np.Inf)
+        Im1 = np.append(I[1:], np.inf)
 
         # place replenishment order
         if n >= 1:  # add backlogged replenishment orders to current request
@@ -433,7 +433,7 @@ class InvManagementMasterEnv(Simulation):
         R = z - IP  # replenishmet order to reach zopt
 
         # check if R can actually be fulfilled (capacity and inventory constraints)
-        Im1 = np.append(self.I[n, 1:], np.Inf)  # available inventory at the m+1 stage
+        Im1 = np.append(self.I[n, 1:], np.inf)  # available inventory at the m+1 stage
         # NOTE: last stage has unlimited raw materials
         Rpos = np.column_stack(
             (np.zeros(len(R)), R)
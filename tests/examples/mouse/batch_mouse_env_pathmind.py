@@ -0,0 +1,77 @@
+import typing
+
+import numpy as np
+
+from pathmind.simulation import BatchSimulation, Continuous, Discrete
+
+
+class BatchMouseAndCheese(BatchSimulation):
+    """Vectorized version of MultiMouseAndCheese, which moves all mouses with array
+    operations and supports any number of them."""
+
+    observation_dtype = np.dtype(
+        [
+            ("mouse_row", float),
+            ("mouse_col", float),
+            ("mouse_row_dist", float),
+            ("mouse_col_dist", float),
+        ]
+    )
+    reward_dtype = np.dtype([("found_cheese", float)])
+    # up, right, down, left
+    moves = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]])
+
+    def __init__(self, mouses=None, cheeses=None):
+        if mouses is None:
+            mouses = [(0, 0), (1, 1), (5, 5)]
+        if cheeses is None:
+            cheeses = [(4, 4), (3, 2), (0, 1)]
+        self.initial_mouses = np.array(mouses)
+        self.cheeses = np.array(cheeses)
+        self.batch_reset()
+
+    @classmethod
+    def with_random_agents(cls, num_agents: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        return cls(
+            mouses=rng.integers(6, size=(num_agents, 2)),
+            cheeses=rng.integers(6, size=(num_agents, 2)),
+        )
+
+    def number_of_agents(self) -> int:
+        return len(self.cheeses)
+
+    def action_space(self, agent_id) -> typing.Union[Continuous, Discrete]:
+        return Discrete(4)
+
+    def batch_reset(self) -> None:
+        self.mouses = self.initial_mouses.copy()
+        self.moved = np.zeros(len(self.mouses), dtype=bool)
+        self.steps = 0
+
+    def batch_step(self, actions: np.ndarray) -> None:
+        self.steps += 1
+        self.moved = ~self.batch_dones()
+
+        action = actions[self.moved, 0].astype(int)
+        if np.any((action < 0) | (action > 3)):
+            raise ValueError("Invalid action")
+        self.mouses[self.moved] = np.clip(
+            self.mouses[self.moved] + self.moves[action], 0, 5
+        )
+
+    def batch_observations(self) -> np.ndarray:
+        obs = np.empty(len(self.mouses), dtype=self.observation_dtype)
+        obs["mouse_row"] = self.mouses[:, 0] / 5.0
+        obs["mouse_col"] = self.mouses[:, 1] / 5.0
+        obs["mouse_row_dist"] = np.abs(self.cheeses[:, 0] - self.mouses[:, 0]) / 5.0
+        obs["mouse_col_dist"] = np.abs(self.cheeses[:, 1] - self.mouses[:, 1]) / 5.0
+        return obs
+
+    def batch_rewards(self) -> np.ndarray:
+        rewards = np.empty(len(self.mouses), dtype=self.reward_dtype)
+        rewards["found_cheese"] = self.batch_dones() & self.moved
+        return rewards
+
+    def batch_dones(self) -> np.ndarray:
+        return np.all(self.mouses == self.cheeses, axis=1)
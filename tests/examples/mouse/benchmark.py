@@ -0,0 +1,54 @@
+"""Compare stepping and observing the loop-based MultiMouseAndCheese with its vectorized
+port BatchMouseAndCheese, and with CompiledBatchMouseAndCheese. Run from the "tests" folder with
+"python -m examples.mouse.benchmark".
+"""
+import timeit
+
+import numpy as np
+from examples.mouse.batch_mouse_env_pathmind import BatchMouseAndCheese
+from examples.mouse.compiled_mouse_env_pathmind import CompiledBatchMouseAndCheese
+from examples.mouse.multi_mouse_env_pathmind import MultiMouseAndCheese
+
+
+def step_multi(simulation: MultiMouseAndCheese):
+    simulation.step()
+    for i in range(simulation.number_of_agents()):
+        simulation.get_observation(i)
+        simulation.get_reward(i)
+        simulation.is_done(i)
+    if simulation.steps % 10 == 0:
+        simulation.reset()
+
+
+def step_batch(simulation: BatchMouseAndCheese, actions: np.ndarray):
+    simulation.batch_step(actions)
+    simulation.batch_observations()
+    simulation.batch_rewards()
+    simulation.batch_dones()
+    if simulation.steps % 10 == 0:
+        simulation.batch_reset()
+
+
+def per_step(function, number: int = 2000) -> float:
+    return timeit.timeit(function, number=number) / number
+
+
+if __name__ == "__main__":
+    multi = MultiMouseAndCheese()
+    multi.reset()
+    multi.set_action({i: np.array([1]) for i in range(3)})
+    print(
+        f"MultiMouseAndCheese, 3 agents: {per_step(lambda: step_multi(multi)) * 1e6:.1f} us/step"
+    )
+
+    for cls in [BatchMouseAndCheese, CompiledBatchMouseAndCheese]:
+        for num_agents in [3, 100, 10000]:
+            batch = cls.with_random_agents(num_agents)
+            actions = np.random.randint(4, size=(num_agents, 1))
+            # Compile outside of the measurement
+            step_batch(batch, actions)
+            seconds = per_step(lambda: step_batch(batch, actions))
+            print(
+                f"{cls.__name__}, {num_agents} agents: {seconds * 1e6:.1f} us/step, "
+                f"{seconds / num_agents * 1e9:.1f} ns/agent"
+            )
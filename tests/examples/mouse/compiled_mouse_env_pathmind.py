@@ -0,0 +1,32 @@
+import numpy as np
+from examples.mouse.batch_mouse_env_pathmind import BatchMouseAndCheese
+
+from pathmind.kernels import step_kernel
+
+
+@step_kernel
+def move_mouses(mouses, cheeses, moved, actions):
+    """Move every mouse that hasn't found its cheese yet, in place."""
+    for i in range(len(mouses)):
+        moved[i] = mouses[i, 0] != cheeses[i, 0] or mouses[i, 1] != cheeses[i, 1]
+        if not moved[i]:
+            continue
+        action = int(actions[i, 0])
+        if action == 0:  # move up
+            mouses[i, 0] = min(mouses[i, 0] + 1, 5)
+        elif action == 1:  # move right
+            mouses[i, 1] = min(mouses[i, 1] + 1, 5)
+        elif action == 2:  # move down
+            mouses[i, 0] = max(mouses[i, 0] - 1, 0)
+        elif action == 3:  # move left
+            mouses[i, 1] = max(mouses[i, 1] - 1, 0)
+        else:
+            raise ValueError("Invalid action")
+
+
+class CompiledBatchMouseAndCheese(BatchMouseAndCheese):
+    """BatchMouseAndCheese, stepping all mouses in a single compiled kernel call."""
+
+    def batch_step(self, actions: np.ndarray) -> None:
+        self.steps += 1
+        move_mouses(self.mouses, self.cheeses, self.moved, actions)
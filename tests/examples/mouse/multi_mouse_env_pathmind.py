@@ -19,6 +19,7 @@ class MultiMouseAndCheese(Simulation):
     def reset(self) -> None:
         self.mouses = [(0, 0), (1, 1), (5, 5)]
         self.cheeses = [(4, 4), (3, 2), (0, 1)]
+        self.moved = [False, False, False]
         self.steps = 0
 
     def step(self) -> None:
@@ -0,0 +1,137 @@
+import asyncio
+
+import pandas as pd
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind.async_simulation import AsyncSimulation, run_async
+from pathmind.policy import Policy, Random
+from pathmind.simulation import Discrete
+
+
+class Overlap:
+    """Counts the simulations stepping at once, and lets steps complete only once two of
+    them stepped at the same time."""
+
+    def __init__(self):
+        self.stepping = 0
+        self.overlapped = asyncio.Event()
+
+
+class SlowCounter(AsyncSimulation):
+    """Waits on a fake external service in every step."""
+
+    def __init__(self, overlap: Overlap):
+        self.overlap = overlap
+        self.steps = 0
+
+    def number_of_agents(self) -> int:
+        return 1
+
+    def action_space(self, agent_id):
+        return Discrete(2)
+
+    async def reset(self) -> None:
+        self.steps = 0
+
+    async def step(self) -> None:
+        self.overlap.stepping += 1
+        if self.overlap.stepping > 1:
+            self.overlap.overlapped.set()
+        try:
+            # Run one after the other, no step would ever complete
+            await asyncio.wait_for(self.overlap.overlapped.wait(), timeout=10)
+        finally:
+            self.overlap.stepping -= 1
+        self.steps += 1
+
+    async def get_observation(self, agent_id):
+        return {"steps": self.steps}
+
+    async def get_reward(self, agent_id):
+        return {"steps": self.steps}
+
+    async def is_done(self, agent_id) -> bool:
+        return self.steps >= 2
+
+
+def test_async_rollout_overlaps_simulations():
+    overlap = Overlap()
+    simulations = [SlowCounter(overlap) for _ in range(4)]
+    summary = run_async(simulations, Random(), num_episodes=4)
+    assert overlap.overlapped.is_set()
+    assert [row[0] for row in summary.rows] == [0, 1, 2, 3]
+    assert all(row[1] == 2 for row in summary.rows)
+
+
+class TakingTurns(AsyncSimulation):
+    """Two agents, the second one only decides every other step and is done first."""
+
+    def __init__(self):
+        self.steps = 0
+        self.seen_actions = []
+
+    def number_of_agents(self) -> int:
+        return 2
+
+    def action_space(self, agent_id):
+        return Discrete(2)
+
+    async def reset(self) -> None:
+        self.steps = 0
+
+    async def step(self) -> None:
+        self.seen_actions.append(sorted(self.action))
+        self.steps += 1
+
+    async def decision_mask(self):
+        return [True, self.steps % 2 == 0]
+
+    async def get_observation(self, agent_id):
+        return {"steps": float(self.steps), "agent": float(agent_id)}
+
+    async def get_reward(self, agent_id):
+        return {"noise": self.np_random.random()}
+
+    async def is_done(self, agent_id) -> bool:
+        return self.steps >= 5 - agent_id
+
+
+class LoopingPolicy(Policy):
+    """Asks for the observations of all agents, like policies written for simulations
+    where all agents decide in every step."""
+
+    def __init__(self):
+        self.deciding = []
+
+    def get_actions(self, simulation):
+        self.deciding.append(simulation.deciding_agents())
+        observations = [
+            simulation.get_observation(i) for i in range(simulation.number_of_agents())
+        ]
+        return {int(obs["agent"]): 0 for obs in observations}
+
+
+def test_async_rollout_only_acts_for_deciding_agents():
+    simulation = TakingTurns()
+    policy = LoopingPolicy()
+    run_async([simulation], policy, num_episodes=1)
+    assert policy.deciding == [[0, 1], [0], [0, 1], [0], [0]]
+    assert simulation.seen_actions == [[0, 1], [0], [0, 1], [0], [0]]
+
+
+def test_seeded_async_rollouts_are_reproducible(tmp_path):
+    def summary(name):
+        out = str(tmp_path / name)
+        run_async(
+            [TakingTurns() for _ in range(3)], num_episodes=6, summary_csv=out, seed=4
+        )
+        return pd.read_csv(out)
+
+    pd.testing.assert_frame_equal(summary("first.csv"), summary("second.csv"))
+
+
+def test_async_rollout_with_sync_simulations():
+    simulations = [MouseAndCheese() for _ in range(2)]
+    summary = run_async(simulations, Random(), num_episodes=3)
+    assert summary.field_names == ["Episode", "reward_0_found_cheese"]
+    assert all(row[1] == 1 for row in summary.rows)
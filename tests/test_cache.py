@@ -0,0 +1,72 @@
+import os
+
+import pandas as pd
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind.cache import RolloutCache
+from pathmind.policy import Random
+
+
+class CountingRandom(Random):
+    calls = 0
+
+    def get_actions(self, simulation):
+        CountingRandom.calls += 1
+        return super().get_actions(simulation)
+
+
+def test_run_reuses_cached_results(tmp_path):
+    cache = RolloutCache(str(tmp_path / "cache"))
+
+    MouseAndCheese().run(
+        CountingRandom(), num_episodes=3, seed=7, cache=cache, summary_csv="first.csv"
+    )
+    calls = CountingRandom.calls
+    assert calls > 0
+
+    MouseAndCheese().run(
+        CountingRandom(), num_episodes=3, seed=7, cache=cache, summary_csv="second.csv"
+    )
+    assert CountingRandom.calls == calls
+    assert pd.read_csv("first.csv").equals(pd.read_csv("second.csv"))
+
+    MouseAndCheese().run(CountingRandom(), num_episodes=3, seed=8, cache=cache)
+    assert CountingRandom.calls > calls
+
+    os.remove("first.csv")
+    os.remove("second.csv")
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = RolloutCache(str(tmp_path), max_bytes=2500)
+    for key in "ab":
+        cache.put(key, [b"0" * 1000])
+        os.utime(cache._file(key), (0, ord(key)))
+    cache.get("a")
+    cache.put("c", [b"0" * 1000])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_random_cache_keys_identify_class_and_constructor_seed(tmp_path):
+    policy = Random(seed=1)
+    key = policy.cache_key()
+    policy.seed(12345)
+    assert policy.cache_key() == key
+    assert CountingRandom(seed=1).cache_key() != key
+
+    # A reused policy instance hits the cache of its previous run
+    cache = RolloutCache(str(tmp_path))
+    MouseAndCheese().run(policy, num_episodes=2, seed=3, cache=cache)
+    assert len(os.listdir(tmp_path)) == 1
+    MouseAndCheese().run(policy, num_episodes=2, seed=3, cache=cache)
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_reused_simulations_hit_the_cache(tmp_path):
+    simulation = MouseAndCheese()
+    cache = RolloutCache(str(tmp_path))
+    simulation.run(Random(seed=1), num_episodes=2, seed=3, cache=cache)
+    simulation.run(Random(seed=1), num_episodes=2, seed=3, cache=cache)
+    assert len(os.listdir(tmp_path)) == 1
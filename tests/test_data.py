@@ -0,0 +1,73 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pathmind.data import TimeSeries, load_columns
+
+
+def test_load_columns_is_cached(tmp_path):
+    data_file = tmp_path / "prices.csv"
+    pd.DataFrame({"Hour": [0, 1, 2], "Price": [1.5, -2.0, 3.0]}).to_csv(
+        data_file, index=False
+    )
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        return pd.read_csv(path)
+
+    first = load_columns(str(data_file), loader=loader, cache_dir=str(tmp_path))
+    second = load_columns(str(data_file), loader=loader, cache_dir=str(tmp_path))
+
+    assert len(calls) == 1
+    assert list(second.keys()) == ["Hour", "Price"]
+    np.testing.assert_array_equal(first["Price"], [1.5, -2.0, 3.0])
+    assert isinstance(second["Price"], np.memmap)
+    with pytest.raises(ValueError):
+        second["Price"][0] = 0.0
+
+
+def test_time_series_lookups():
+    dates = pd.date_range("2020-05-11 08:00", periods=4, freq="30min")
+    series = TimeSeries(dates[::-1], [3.0, 2.0, 1.0, 0.0])
+
+    assert series.at(dates[1].to_pydatetime()) == 1.0
+    assert series.at(datetime.datetime(2020, 5, 11, 8, 10), default=0.0) == 0.0
+    assert series.asof(datetime.datetime(2020, 5, 11, 8, 40)) == 1.0
+    assert np.isnan(series.asof(datetime.datetime(2020, 5, 11, 7, 0)))
+    assert series.interpolate(datetime.datetime(2020, 5, 11, 8, 45)) == 1.5
+    np.testing.assert_array_equal(series.at(dates[2:]), [2.0, 3.0])
+
+    timestamps, values = series.window(dates[1], dates[3])
+    np.testing.assert_array_equal(timestamps, dates[1:3].values)
+    np.testing.assert_array_equal(values, [1.0, 2.0])
+
+
+def test_time_series_keeps_memory_mapped_timestamps(tmp_path):
+    data_file = tmp_path / "prices.csv"
+    dates = pd.date_range("2020-05-11 08:00", periods=3, freq="30min")
+    pd.DataFrame({"Date": dates, "Price": [1.5, -2.0, 3.0]}).to_csv(
+        data_file, index=False
+    )
+
+    def loader(path):
+        data = pd.read_csv(path, parse_dates=["Date"])
+        return data.astype({"Date": "datetime64[ns]"})
+
+    columns = load_columns(str(data_file), loader=loader, cache_dir=str(tmp_path))
+    series = TimeSeries(columns["Date"], columns["Price"], assume_sorted=True)
+
+    assert np.shares_memory(series.keys, columns["Date"])
+    assert series.at(dates[1].to_pydatetime()) == -2.0
+
+
+def test_interpolating_short_time_series():
+    dates = pd.date_range("2020-05-11 08:00", periods=2, freq="30min")
+    single = TimeSeries(dates[:1], [2.5])
+    assert single.interpolate(dates[1]) == 2.5
+    np.testing.assert_array_equal(single.interpolate(dates), [2.5, 2.5])
+
+    with pytest.raises(ValueError, match="empty"):
+        TimeSeries(dates[:0], []).interpolate(dates[0])
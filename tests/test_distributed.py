@@ -0,0 +1,132 @@
+import multiprocessing
+import os
+
+import pytest
+import tensorflow as tf
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind.distributed import Coordinator, _WorkerManager, run_worker
+from pathmind.policy import Local, Random
+
+
+def _lease_and_die(address, authkey):
+    manager = _WorkerManager(address=address, authkey=authkey)
+    manager.connect()
+    manager.work_queue().lease("doomed")
+    os._exit(1)
+
+
+def test_workers_complete_all_episodes():
+    with Coordinator(MouseAndCheese, Random(), num_episodes=6, seed=3) as coordinator:
+        address = coordinator.address
+        workers = [
+            multiprocessing.Process(
+                target=run_worker, args=(address, coordinator.authkey)
+            )
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        summary = coordinator.run()
+        for worker in workers:
+            worker.join(timeout=30)
+            assert worker.exitcode == 0
+
+    assert [row[0] for row in summary.rows] == list(range(6))
+
+    local = MouseAndCheese()
+    local.run(Random(), num_episodes=6, seed=3, summary_csv="local_summary.csv")
+    with open("local_summary.csv") as f:
+        expected = [line.split(",")[1:] for line in f.read().splitlines()[1:]]
+    os.remove("local_summary.csv")
+    assert [[str(v) for v in row[1:]] for row in summary.rows] == expected
+
+
+def test_episodes_of_lost_workers_are_rescheduled():
+    with Coordinator(
+        MouseAndCheese, Random(), num_episodes=3, seed=3, timeout=1.0
+    ) as coordinator:
+        address = coordinator.address
+        doomed = multiprocessing.Process(
+            target=_lease_and_die, args=(address, coordinator.authkey)
+        )
+        doomed.start()
+        doomed.join()
+
+        worker = multiprocessing.Process(
+            target=run_worker, args=(address, coordinator.authkey)
+        )
+        worker.start()
+        summary = coordinator.run()
+        worker.join(timeout=30)
+
+    assert [row[0] for row in summary.rows] == [0, 1, 2]
+
+
+def test_run_fails_once_all_workers_are_lost():
+    with Coordinator(
+        MouseAndCheese, Random(), num_episodes=3, seed=3, timeout=0.5
+    ) as coordinator:
+        address = coordinator.address
+        doomed = multiprocessing.Process(
+            target=_lease_and_die, args=(address, coordinator.authkey)
+        )
+        doomed.start()
+        doomed.join()
+
+        with pytest.raises(RuntimeError, match="Lost all workers"):
+            coordinator.run()
+
+
+def test_run_fails_after_its_deadline():
+    with Coordinator(MouseAndCheese, Random(), num_episodes=3) as coordinator:
+        with pytest.raises(TimeoutError):
+            coordinator.run(deadline=0.5)
+
+
+class _MoveToCheese(tf.Module):
+    @tf.function(
+        input_signature=[
+            tf.TensorSpec([None, None], tf.float32),
+            tf.TensorSpec([], tf.bool),
+            tf.TensorSpec([None], tf.int32),
+            tf.TensorSpec([None], tf.int64),
+            tf.TensorSpec([None], tf.float32),
+            tf.TensorSpec([], tf.int64),
+        ]
+    )
+    def __call__(
+        self, observations, is_training, seq_lens, prev_action, prev_reward, timestep
+    ):
+        # Move up until reaching the cheese's row, then move right
+        up = observations[:, 0] < 0.8
+        return {"actions_0": tf.where(up, tf.constant(0, tf.int64), 1)}
+
+
+def test_workers_run_local_policies(tmp_path):
+    model = _MoveToCheese()
+    tf.saved_model.save(model, str(tmp_path), signatures=model.__call__)
+
+    with Coordinator(
+        MouseAndCheese, Local(str(tmp_path)), num_episodes=2
+    ) as coordinator:
+        address = coordinator.address
+        # TensorFlow can't run in processes forked after it started in this one
+        worker = multiprocessing.get_context("spawn").Process(
+            target=run_worker, args=(address, coordinator.authkey)
+        )
+        worker.start()
+        summary = coordinator.run(deadline=120)
+        worker.join(timeout=30)
+
+    assert [row[1] for row in summary.rows] == [1, 1]
+
+
+def test_coordinators_listen_locally_with_random_authkeys():
+    with Coordinator(MouseAndCheese, Random()) as first, Coordinator(
+        MouseAndCheese, Random()
+    ) as second:
+        assert first.address[0] == "127.0.0.1"
+        assert first.authkey != second.authkey
+        with pytest.raises(multiprocessing.AuthenticationError):
+            run_worker(first.address, b"pathmind")
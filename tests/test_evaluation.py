@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind.evaluation import StoppingRule, compare_policies
+from pathmind.policy import Policy, Random
+from pathmind.simulation import Discrete, Simulation
+
+
+class NoisyChoice(Simulation):
+    """Single-step simulation whose reward is the action plus random noise."""
+
+    reward = 0.0
+
+    def number_of_agents(self) -> int:
+        return 1
+
+    def action_space(self, agent_id):
+        return Discrete(2)
+
+    def reset(self) -> None:
+        self.reward = 0.0
+
+    def step(self) -> None:
+        self.reward = float(self.action[0][0]) + np.random.normal(scale=10.0)
+
+    def get_observation(self, agent_id):
+        return {"constant": 1.0}
+
+    def get_reward(self, agent_id):
+        return {"reward": self.reward}
+
+    def is_done(self, agent_id) -> bool:
+        return True
+
+
+class StateFromReset(NoisyChoice):
+    """Only creates its reward terms in "reset"."""
+
+    def reset(self) -> None:
+        self.terms = {"reward": 0.0}
+
+    def step(self) -> None:
+        super().step()
+        self.terms["reward"] = self.reward
+
+    def get_reward(self, agent_id):
+        return dict(self.terms)
+
+
+class Constant(Policy):
+    def __init__(self, action):
+        self.action = action
+
+    def get_actions(self, simulation):
+        return {0: np.asarray([self.action])}
+
+
+def test_stopping_rule():
+    rule = StoppingRule(ci_width=1.0, min_episodes=3)
+    for value in [1.0, 2.0]:
+        rule.update({"reward_0_profit": value})
+        assert not rule.is_satisfied()
+    rule.update({"reward_0_profit": 1.5})
+    mean, half_width = rule.intervals()["reward_0_profit"]
+    assert mean == 1.5
+    assert rule.is_satisfied() == (2 * half_width <= 1.0)
+
+    with pytest.raises(ValueError):
+        StoppingRule(terms=["unknown"], relative_error=0.1).update({"reward": 1})
+
+
+def test_run_stops_early():
+    simulation = MouseAndCheese()
+    stopping = StoppingRule(terms=["reward_0_found_cheese"], relative_error=0.01)
+    simulation.run(
+        Random(), num_episodes=1000, summary_csv="summary.csv", stopping=stopping
+    )
+    actual = pd.read_csv("summary.csv")
+    assert len(actual) == stopping.min_episodes
+    assert stopping.intervals()["reward_0_found_cheese"] == (1.0, 0.0)
+    os.remove("summary.csv")
+
+
+def test_compare_policies_with_common_random_numbers():
+    policies = {"zero": Constant(0), "one": Constant(1), "random": Random()}
+    comparison = compare_policies(
+        NoisyChoice(), policies, num_episodes=8, seed=1, processes=2
+    )
+
+    differences = comparison.paired_differences(baseline="zero")
+    mean, std_error = differences["one"]["reward_0_reward"]
+    assert mean == pytest.approx(1.0)
+    assert std_error == pytest.approx(0.0)
+    assert comparison.episodes_for_power("zero", effect=0.5)["one"] == {
+        "reward_0_reward": 2
+    }
+    assert comparison.means()["zero"]["reward_0_reward"] != 0.0
+
+
+def test_compare_policies_resets_the_simulation_it_names_terms_with():
+    policies = {"zero": Constant(0), "one": Constant(1)}
+    comparison = compare_policies(
+        StateFromReset(), policies, num_episodes=4, seed=1, processes=2
+    )
+    mean, _ = comparison.paired_differences(baseline="zero")["one"]["reward_0_reward"]
+    assert mean == pytest.approx(1.0)
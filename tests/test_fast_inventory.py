@@ -0,0 +1,58 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+from examples.inventory_management.fast_inventory_env_pathmind import (
+    FastInvManagementEnv,
+)
+from examples.inventory_management.inventory_env_pathmind import InvManagementMasterEnv
+
+from pathmind.policy import Random
+
+
+def test_fast_inventory_matches_reference_on_fixed_seeds():
+    for seed in [0, 1, 2]:
+        fast = FastInvManagementEnv(seed=seed)
+        reference = InvManagementMasterEnv()
+        # Replay the demand drawn by the fast version in the reference version
+        reference.dist = 5
+        reference.demand_dist = fast.D.copy()
+
+        actions = np.random.default_rng(seed).integers(0, 100, size=(30, 3))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for action in actions:
+                expected = reference.step(action)
+                actual = fast.step(action)
+                np.testing.assert_allclose(actual[0], expected[0])
+                assert np.isclose(actual[1], expected[1])
+                assert actual[2] == expected[2]
+
+        np.testing.assert_allclose(fast.I, reference.I)
+        np.testing.assert_allclose(fast.B, reference.B)
+        np.testing.assert_allclose(fast.P, reference.P)
+
+
+def test_fast_inventory_instances_have_independent_demand():
+    first, second = FastInvManagementEnv(seed=5), FastInvManagementEnv(seed=5)
+    np.random.seed(0)
+    other = FastInvManagementEnv(seed=6)
+
+    np.testing.assert_array_equal(first.D, second.D)
+    assert not np.array_equal(first.D, other.D)
+
+    first.reset()
+    assert not np.array_equal(first.D, second.D)
+
+
+def test_unseeded_fast_inventory_reproduces_threaded_runs(tmp_path):
+    def summary(name):
+        out = str(tmp_path / name)
+        FastInvManagementEnv().run(
+            Random(), num_episodes=4, threads=2, seed=3, summary_csv=out
+        )
+        return pd.read_csv(out)
+
+    first, second = summary("first.csv"), summary("second.csv")
+    pd.testing.assert_frame_equal(first, second)
+    assert first.iloc[:, 1].nunique() > 1
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+from examples.mouse.multi_mouse_env_pathmind import MultiMouseAndCheese
+
+from pathmind.gym_env import MultiAgentEnv, SimulationEnv, to_gym, to_gym_space
+from pathmind.simulation import Continuous, Discrete
+
+
+def test_action_spaces_map_to_gym_spaces():
+    assert to_gym_space(Discrete(4)).n == 4
+    assert list(to_gym_space(Discrete(3, 2)).nvec) == [3, 3]
+    box = to_gym_space(Continuous([2, 3], 0, 1))
+    assert box.shape == (2, 3) and box.low.min() == 0 and box.high.max() == 1
+
+
+def test_single_agent_env_steps_simulation():
+    env = to_gym(MouseAndCheese)
+    assert isinstance(env, SimulationEnv)
+    observation, info = env.reset(seed=1)
+    assert observation.dtype == np.float32
+    assert env.observation_space.contains(observation)
+    assert env.layout.keys == list(MouseAndCheese().get_observation(0))
+
+    terminated, steps = False, 0
+    while not terminated:
+        observation, reward, terminated, truncated, info = env.step(
+            env.action_space.sample()
+        )
+        steps += 1
+    assert reward == 1 and info["reward_terms"] == {"found_cheese": 1}
+    assert steps == env.simulation.steps
+
+
+def test_multi_agent_env_batches_agents():
+    env = to_gym(MultiMouseAndCheese)
+    assert isinstance(env, MultiAgentEnv)
+    observations, _ = env.reset(seed=0)
+    assert observations.shape == (3, env.layout.width)
+
+    observations, rewards, terminated, truncated, info = env.step([0, 1, 2])
+    assert rewards.shape == (3,) and info["dones"].shape == (3,)
+    assert terminated == info["dones"].all()
+
+
+class NoisyMouse(MouseAndCheese):
+    def get_reward(self, agent_id):
+        return {"noise": self.np_random.normal() + self.py_random.random()}
+
+
+def test_reset_seeds_the_simulations_generators():
+    env = to_gym(NoisyMouse)
+
+    def trajectory(seed):
+        env.reset(seed=seed)
+        return [env.step(step % 2)[1] for step in range(10)]
+
+    assert trajectory(3) == trajectory(3)
+    assert trajectory(3) != trajectory(4)
+
+
+def test_vector_env_steps_in_subprocesses():
+    env = to_gym(MouseAndCheese, n_envs=2)
+    observations, _ = env.reset(seed=[0, 1])
+    assert observations.shape == (2, env.single_observation_space.shape[0])
+    observations, rewards, terminated, truncated, _ = env.step([0, 3])
+    assert rewards.shape == terminated.shape == (2,)
+    env.close()
+
+    with pytest.raises(ValueError):
+        to_gym(MouseAndCheese, n_envs=0)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from examples.inventory_management.compiled_inventory_env_pathmind import (
+    CompiledInvManagementEnv,
+)
+from examples.inventory_management.fast_inventory_env_pathmind import (
+    FastInvManagementEnv,
+)
+from examples.mouse.batch_mouse_env_pathmind import BatchMouseAndCheese
+from examples.mouse.compiled_mouse_env_pathmind import CompiledBatchMouseAndCheese
+
+import pathmind.kernels
+from pathmind.kernels import is_compiled, step_kernel
+
+
+def test_step_kernel_falls_back_to_python(monkeypatch):
+    monkeypatch.setattr(pathmind.kernels, "numba", None)
+
+    def double(values):
+        values *= 2
+
+    assert step_kernel(double) is double
+    assert step_kernel(cache=False)(double) is double
+    assert not is_compiled(double)
+
+
+def test_compiled_mouse_matches_batch_mouse():
+    compiled = CompiledBatchMouseAndCheese.with_random_agents(50, seed=1)
+    batch = BatchMouseAndCheese.with_random_agents(50, seed=1)
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        actions = rng.integers(4, size=(50, 1))
+        compiled.batch_step(actions)
+        batch.batch_step(actions)
+        np.testing.assert_array_equal(compiled.mouses, batch.mouses)
+        np.testing.assert_array_equal(compiled.batch_rewards(), batch.batch_rewards())
+
+    with pytest.raises(ValueError):
+        compiled.batch_step(np.full((50, 1), 4))
+
+
+@pytest.mark.parametrize("backlog", [True, False])
+def test_compiled_inventory_matches_fast_inventory(backlog):
+    for seed in [0, 1]:
+        compiled = CompiledInvManagementEnv(seed=seed, backlog=backlog)
+        fast = FastInvManagementEnv(seed=seed, backlog=backlog)
+        np.testing.assert_array_equal(compiled.D, fast.D)
+
+        for action in np.random.default_rng(seed).integers(0, 100, size=(30, 3)):
+            actual, expected = compiled.step(action), fast.step(action)
+            np.testing.assert_allclose(actual[0], expected[0])
+            assert np.isclose(actual[1], expected[1])
+            assert actual[2] == expected[2]
+
+        np.testing.assert_allclose(compiled.T, fast.T)
+        np.testing.assert_allclose(compiled.LS, fast.LS)
@@ -0,0 +1,32 @@
+import pytest
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind.memory import MemoryGrowthError, MemoryMonitor
+from pathmind.policy import Random
+
+
+class LeakyMouseAndCheese(MouseAndCheese):
+    history = []
+
+    def step(self) -> None:
+        super().step()
+        self.history.append(bytearray(1000))  # never cleared on reset
+
+
+def test_monitor_reports_growing_sites():
+    monitor = MemoryMonitor(top=3)
+    LeakyMouseAndCheese().run(Random(), num_episodes=5, seed=0, memory=monitor)
+
+    sites = monitor.growing()
+    assert len(sites) <= 3
+    assert "test_memory.py:13" in sites[0][0]
+    assert sites[0][1] > 1000
+    assert monitor.growth() > 0
+    assert "test_memory.py:13" in monitor.report()
+
+
+def test_monitor_fails_runs_above_threshold():
+    with pytest.raises(MemoryGrowthError):
+        LeakyMouseAndCheese().run(
+            Random(), num_episodes=20, memory=MemoryMonitor(threshold=1000)
+        )
@@ -0,0 +1,59 @@
+import socket
+import urllib.request
+
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind.metrics import Metrics
+from pathmind.policy import Random
+
+
+def test_run_exports_metrics_to_prometheus(tmp_path):
+    textfile = str(tmp_path / "pathmind.prom")
+    metrics = Metrics(textfile=textfile)
+    server = metrics.serve(port=0, host="127.0.0.1")
+    try:
+        MouseAndCheese().run(Random(), num_episodes=3, seed=1, metrics=metrics)
+
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            scraped = response.read().decode()
+    finally:
+        server.shutdown()
+
+    lines = scraped.splitlines()
+    assert "pathmind_episodes_total 3" in lines
+    assert "# TYPE pathmind_policy_latency_seconds histogram" in lines
+    assert any(
+        line.startswith('pathmind_policy_latency_seconds_count{policy="Random"}')
+        for line in lines
+    )
+    assert any(
+        line.startswith('pathmind_reward_mean{term="reward_0_found_cheese"}')
+        for line in lines
+    )
+
+    steps = next(line for line in lines if line.startswith("pathmind_steps_total"))
+    latencies = next(
+        line
+        for line in lines
+        if line.startswith("pathmind_policy_latency_seconds_count")
+    )
+    assert float(steps.split()[-1]) == float(latencies.split()[-1])
+
+    with open(textfile) as f:
+        assert "pathmind_episodes_total 3" in f.read().splitlines()
+
+
+def test_metrics_are_sent_to_statsd():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5)
+    try:
+        metrics = Metrics(statsd_address=receiver.getsockname())
+        metrics.inc("server_responses_total", labels={"code": "200"})
+        metrics.observe("policy_latency_seconds", 0.25, {"policy": "Server"})
+
+        assert receiver.recv(1024) == b"pathmind_server_responses_total.200:1|c"
+        assert receiver.recv(1024) == b"pathmind_policy_latency_seconds.Server:250.0|ms"
+    finally:
+        receiver.close()
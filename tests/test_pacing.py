@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from pathmind.pacing import Pacer
+from pathmind.policy import Random
+from pathmind.simulation import Discrete, Simulation
+
+
+class Countdown(Simulation):
+    """Runs a fixed number of steps, each taking "step_seconds" of wall-clock time."""
+
+    steps = 0
+    num_steps = 10
+    step_seconds = 0.0
+
+    def number_of_agents(self) -> int:
+        return 1
+
+    def action_space(self, agent_id: int) -> Discrete:
+        return Discrete(2)
+
+    def reset(self) -> None:
+        self.steps = 0
+
+    def step(self) -> None:
+        time.sleep(self.step_seconds)
+        self.steps += 1
+
+    def get_observation(self, agent_id: int):
+        return {"steps": self.steps}
+
+    def get_reward(self, agent_id: int):
+        return {"steps": self.steps}
+
+    def is_done(self, agent_id: int) -> bool:
+        return self.steps >= self.num_steps
+
+
+def timed_run(simulation, pacer) -> float:
+    start = time.perf_counter()
+    simulation.run(Random(), num_episodes=1, pacing=pacer)
+    return time.perf_counter() - start
+
+
+def test_pacer_runs_steps_at_frequency():
+    pacer = Pacer(frequency=100)
+    duration = timed_run(Countdown(), pacer)
+    # The first step starts right away, the last one 90 ms later
+    assert 0.09 <= duration < 0.5
+    assert pacer.steps == 10
+
+
+def test_pacer_compensates_for_step_time():
+    simulation = Countdown()
+    simulation.step_seconds = 0.005
+    # Tolerate scheduling jitter, but not the 5 ms per step of a fixed pause between steps
+    pacer = Pacer(frequency=100, tolerance=0.004)
+    duration = timed_run(simulation, pacer)
+    assert 0.09 <= duration < 0.5
+    assert pacer.overruns == 0
+
+
+def test_pacer_follows_simulated_time():
+    pacer = Pacer(time_ratio=100, clock=lambda simulation: simulation.steps * 2)
+    assert 0.18 <= timed_run(Countdown(), pacer) < 0.6
+
+    assert Pacer(time_ratio=100, step_duration=2).frequency == 50
+
+
+def test_pacer_reports_overruns():
+    simulation = Countdown()
+    simulation.step_seconds = 0.02
+    pacer = Pacer(frequency=1000)
+    timed_run(simulation, pacer)
+    assert pacer.overruns == 9
+    assert pacer.max_lateness >= 0.018
+    assert pacer.report().startswith("9 of 10 steps overran")
+
+
+def test_pacer_arguments_are_validated():
+    with pytest.raises(ValueError):
+        Pacer()
+    with pytest.raises(ValueError):
+        Pacer(frequency=10, time_ratio=2, step_duration=1)
+    with pytest.raises(ValueError):
+        Pacer(time_ratio=2)
+    with pytest.raises(ValueError):
+        Countdown().run(
+            Random(), num_episodes=2, processes=2, pacing=Pacer(frequency=1)
+        )
@@ -0,0 +1,125 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind.policy import Local, ModelRegistry, default_registry
+
+
+def fake_model_folder(tmp_path, name, size):
+    folder = tmp_path / name
+    folder.mkdir()
+    (folder / "variables").write_bytes(b"0" * size)
+    return str(folder)
+
+
+class CountingLoader:
+    def __init__(self):
+        self.loaded = []
+        self.lock = threading.Lock()
+
+    def __call__(self, model_file):
+        with self.lock:
+            self.loaded.append(model_file)
+        return lambda **inputs: {"actions_0": tf.constant([1], dtype=tf.int64)}
+
+
+def test_registry_shares_models_and_evicts_least_recently_used(tmp_path):
+    a, b, c = [fake_model_folder(tmp_path, name, 100) for name in "abc"]
+    loader = CountingLoader()
+    registry = ModelRegistry(memory_budget=250, loader=loader)
+
+    first, second = Local(a, registry=registry), Local(a, registry=registry)
+    assert loader.loaded == []
+    assert first.model is second.model
+    assert len(loader.loaded) == 1
+
+    registry.get(b)
+    registry.get(a)
+    registry.get(c)
+    assert a in registry and c in registry and b not in registry
+
+
+def test_registry_preloads_in_background(tmp_path):
+    folder = fake_model_folder(tmp_path, "model", 10)
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+
+    registry.preload(folder).result()
+    policy = Local(folder, registry=registry, preload=True)
+    simulation = MouseAndCheese()
+    actions = policy.get_actions(simulation)
+
+    assert len(loader.loaded) == 1
+    np.testing.assert_array_equal(actions[0], [1])
+
+
+def test_threaded_rollouts_share_one_local_model(tmp_path):
+    folder = fake_model_folder(tmp_path, "model", 10)
+    calls = []
+
+    def loader(model_file):
+        calls.append(model_file)
+
+        def model(observations, **inputs):
+            # Move up until reaching the cheese's row, then move right
+            up = observations.numpy()[0, 0] < 0.8
+            return {"actions_0": tf.constant([0 if up else 1], dtype=tf.int64)}
+
+        return model
+
+    policy = Local(folder, registry=ModelRegistry(loader=loader))
+    simulation = MouseAndCheese()
+    simulation.run(policy, num_episodes=8, threads=4, summary_csv="threads.csv")
+
+    summary = pd.read_csv("threads.csv")
+    assert list(summary.Episode) == list(range(8))
+    assert all(summary.reward_0_found_cheese == 1)
+    assert len(calls) == 1
+    os.remove("threads.csv")
+
+
+def test_local_feeds_selected_observations(tmp_path):
+    folder = fake_model_folder(tmp_path, "model", 10)
+    obs_yaml = tmp_path / "obs.yaml"
+    obs_yaml.write_text("observations:\n  - cheese_row\n  - mouse_row\n")
+    inputs = []
+
+    def loader(model_file):
+        def model(observations, **kwargs):
+            inputs.append(observations.numpy())
+            return {"actions_0": tf.constant([0], dtype=tf.int64)}
+
+        return model
+
+    registry = ModelRegistry(loader=loader)
+    policy = Local(folder, registry=registry, observation_yaml=str(obs_yaml))
+    policy.get_actions(MouseAndCheese())
+    np.testing.assert_allclose(inputs[0], [[0.8, 0.0]])
+
+
+def test_local_pickles_without_registry_and_loads_lazily(tmp_path, monkeypatch):
+    folder = fake_model_folder(tmp_path, "model", 10)
+    obs_yaml = tmp_path / "obs.yaml"
+    obs_yaml.write_text("observations:\n  - mouse_row\n")
+    loader = CountingLoader()
+    registry = ModelRegistry(loader=loader)
+    policy = Local(folder, registry=registry, observation_yaml=str(obs_yaml))
+    policy.get_actions(MouseAndCheese())
+
+    default_loader = CountingLoader()
+    monkeypatch.setattr(default_registry, "loader", default_loader)
+    copy = pickle.loads(pickle.dumps(policy))
+    assert copy.registry is default_registry
+    assert copy.model_file == folder
+    assert copy.observation_filter.names == ["mouse_row"]
+    assert default_loader.loaded == []
+
+    actions = copy.get_actions(MouseAndCheese())
+    np.testing.assert_array_equal(actions[0], [1])
+    assert default_loader.loaded == [folder]
+    assert loader.loaded == [folder]
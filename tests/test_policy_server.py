@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from examples.mouse.mouse_env_pathmind import MouseAndCheese
+
+from pathmind import payload
+from pathmind.policy import Random, Server
+from pathmind.policy_server import PolicyServer
+
+
+def test_float32_payload_round_trip():
+    obs = {"mouse_row": 0.25, "grid": [[1.0, 2.0], [3.0, 4.0]], "empty": []}
+    data = payload.encode(obs, payload.FLOAT32)
+    assert len(data) < len(payload.encode(obs, payload.JSON)) + 64
+    assert payload.decode(data, payload.FLOAT32) == obs
+    assert (
+        payload.decode(
+            payload.decompress(payload.compress(data, "gzip"), "gzip"), payload.FLOAT32
+        )
+        == obs
+    )
+
+
+def test_float32_payload_keeps_integers():
+    actions = {"actions": np.array([3, 0]), "done": True, "value": [0.5]}
+    decoded = payload.decode(payload.encode(actions, payload.FLOAT32), payload.FLOAT32)
+    assert decoded == {"actions": [3, 0], "done": True, "value": [0.5]}
+    assert np.asarray(decoded["actions"]).dtype == np.int64
+
+
+def test_negotiate_prefers_highest_quality():
+    header = "application/msgpack;q=0.5, application/x-pathmind-float32, */*;q=0.1"
+    assert payload.negotiate(header, [payload.JSON, payload.MSGPACK]) == payload.MSGPACK
+    assert payload.negotiate(header, payload.content_types()) == payload.FLOAT32
+    assert payload.negotiate("text/html", [payload.JSON]) is None
+
+
+def test_server_negotiates_binary_payloads():
+    with PolicyServer(Random(seed=0), MouseAndCheese(), api_key="key") as server:
+        policy = Server(server.url, api_key="key")
+        MouseAndCheese().run(policy, num_episodes=2, seed=1)
+
+        assert policy.content_type == payload.FLOAT32
+        assert policy.encoding == payload.encodings()[0]
+        assert server.requests[payload.JSON, None] == 1
+        assert server.requests[payload.FLOAT32, policy.encoding] > 0
+
+
+@pytest.mark.parametrize("content_type", payload.content_types())
+def test_discrete_actions_are_integers_in_every_format(content_type):
+    # The first request is always JSON
+    content_types = list(dict.fromkeys([content_type, payload.JSON]))
+    with PolicyServer(
+        Random(seed=0), MouseAndCheese(), content_types=content_types
+    ) as server:
+        policy = Server(server.url, api_key="key")
+        simulation = MouseAndCheese()
+        for _ in range(3):
+            action = policy.get_actions(simulation)
+            assert action[0].dtype == np.int64
+        assert policy.content_type == content_type
+
+
+def test_server_falls_back_to_json():
+    with PolicyServer(
+        Random(seed=0), MouseAndCheese(), content_types=[payload.JSON]
+    ) as server:
+        policy = Server(server.url, api_key="key")
+        simulation = MouseAndCheese()
+        for _ in range(3):
+            action = policy.get_actions(simulation)
+            assert 0 <= action[0][0] <= 3
+        assert policy.content_type == payload.JSON
+        assert dict(server.requests) == {(payload.JSON, None): 3}
+
+        # Servers that reject a binary format make clients switch to JSON
+        policy = Server(server.url, api_key="key", content_type=payload.FLOAT32)
+        assert isinstance(policy.get_actions(simulation)[0], np.ndarray)
+        assert policy.content_type == payload.JSON
+
+
+def test_server_reports_errors_of_the_stand_in():
+    observations = list(MouseAndCheese().get_observation(0)) + ["missing"]
+    with PolicyServer(
+        Random(), MouseAndCheese(), api_key="key", observations=observations
+    ) as server:
+        with pytest.raises(ValueError, match="not authorized"):
+            Server(server.url, api_key="wrong").get_actions(MouseAndCheese())
+        with pytest.raises(ValueError, match="field required"):
+            Server(server.url, api_key="key").get_actions(MouseAndCheese())
@@ -6,11 +6,13 @@ import numpy as np
 import or_gym
 import pandas as pd
 import pytest
+from examples.mouse.batch_mouse_env_pathmind import BatchMouseAndCheese
 from examples.mouse.mouse_env_pathmind import MouseAndCheese
 from examples.mouse.multi_mouse_env_pathmind import MultiMouseAndCheese
 
 from pathmind.policy import Local, Random, Server
-from pathmind.simulation import from_gym
+from pathmind.simulation import Discrete, from_gym
+from pathmind.store import EpisodeStore
 
 PATH = pathlib.Path(__file__).parent.resolve()
 
@@ -133,6 +135,138 @@ def test_policy_predictions():
         simulation.step()
 
 
+def test_random_batch_mouse_rollout():
+    simulation = BatchMouseAndCheese.with_random_agents(20)
+    simulation.run(Random(), out_csv="output.csv")
+    os.remove("output.csv")
+
+
+def test_batch_mouse_matches_multi_mouse():
+    multi = MultiMouseAndCheese()
+    batch = BatchMouseAndCheese()
+    multi.reset()
+    batch.reset()
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        action = {i: rng.integers(4, size=1) for i in range(3)}
+        multi.set_action(action)
+        batch.set_action(action)
+        multi.step()
+        batch.step()
+        for i in range(3):
+            assert batch.get_observation(i) == multi.get_observation(i)
+            assert batch.get_reward(i) == multi.get_reward(i)
+            assert batch.is_done(i) == multi.is_done(i)
+
+
+def test_run_uses_bulk_accessors():
+    class BulkMultiMouse(MultiMouseAndCheese):
+        def get_observation(self, agent_id):
+            raise AssertionError("run should only use get_observations")
+
+        def get_observations(self, agent_ids=None):
+            return [
+                MultiMouseAndCheese.get_observation(self, i)
+                for i in (range(3) if agent_ids is None else agent_ids)
+            ]
+
+        def action_space(self, agent_id):
+            raise AssertionError("Random should only use action_spaces")
+
+        def action_spaces(self, agent_ids=None):
+            return [Discrete(4)] * (3 if agent_ids is None else len(agent_ids))
+
+    simulation = BulkMultiMouse()
+    simulation.run(Random())
+
+    batch = BatchMouseAndCheese()
+    batch.reset()
+    assert batch.get_observations()[2] == batch.get_observation(2)
+    assert batch.get_dones() == [False, False, False]
+
+
+def test_run_with_observation_selection(tmp_path):
+    class LazyMouse(MouseAndCheese):
+        expensive_calls = 0
+
+        def get_observation(self, agent_id):
+            obs = super().get_observation(agent_id)
+            obs["expensive"] = self.expensive
+            return obs
+
+        def expensive(self):
+            LazyMouse.expensive_calls += 1
+            return 0.0
+
+    obs_yaml = tmp_path / "obs.yaml"
+    obs_yaml.write_text("observations:\n  - mouse_col\n  - mouse_row\n")
+    out_csv = str(tmp_path / "output.csv")
+
+    LazyMouse().run(Random(), out_csv=out_csv, observation_yaml=str(obs_yaml))
+    assert LazyMouse.expensive_calls == 0
+    first_row = pd.read_csv(out_csv).iloc[0]
+    assert first_row.observations_0 == "{'mouse_col': 0.0, 'mouse_row': 0.0}"
+
+    LazyMouse().run(Random(), num_episodes=2)
+    assert LazyMouse.expensive_calls > 0
+
+
+def test_snapshot_restore():
+    simulation = MultiMouseAndCheese()
+    simulation.reset()
+    simulation.set_action({0: [1], 1: [1], 2: [2]})
+    simulation.step()
+    snapshot = simulation.snapshot()
+    mouses = list(simulation.mouses)
+
+    simulation.step()
+    assert simulation.mouses != mouses
+
+    simulation.restore(snapshot)
+    assert simulation.mouses == mouses
+    assert simulation.steps == 1
+
+
+def test_snapshot_branches_in_parallel():
+    simulation = MouseAndCheese()
+    simulation.reset()
+    simulation.set_action({0: 0})
+    simulation.step()
+    snapshot = simulation.snapshot()
+
+    simulation.run(
+        Random(),
+        num_episodes=4,
+        snapshot=snapshot,
+        processes=2,
+        summary_csv="branches.csv",
+    )
+    actual = pd.read_csv("branches.csv")
+    assert list(actual.Episode) == [0, 1, 2, 3]
+    assert all(actual.reward_0_found_cheese == 1)
+    os.remove("branches.csv")
+
+
+class NoisyMouse(MouseAndCheese):
+    def get_reward(self, agent_id):
+        reward = super().get_reward(agent_id)
+        reward["noise"] = float(self.np_random.normal()) + self.py_random.random()
+        return reward
+
+
+def test_seeded_threads_are_reproducible(tmp_path):
+    def summary(name, **kwargs):
+        out = str(tmp_path / name)
+        NoisyMouse().run(Random(), num_episodes=8, seed=5, summary_csv=out, **kwargs)
+        return pd.read_csv(out)
+
+    first = summary("first.csv", threads=4)
+    second = summary("second.csv", threads=4)
+    sequential = summary("sequential.csv")
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(first, sequential)
+
+
 def test_from_gym():
     env = gym.make("CartPole-v0")
     sim = from_gym(env)
@@ -143,3 +277,78 @@ def test_from_or_gym():
     env = or_gym.make("Knapsack-v0")
     sim = from_gym(env)
     sim.run(Random())
+
+
+def test_run_only_observes_and_acts_for_active_agents(tmp_path):
+    class TrackingMultiMouse(MultiMouseAndCheese):
+        def get_observation(self, agent_id):
+            if self.is_done(agent_id):
+                raise AssertionError(f"Agent {agent_id} is done and got observed")
+            return super().get_observation(agent_id)
+
+    class CheckingRandom(Random):
+        def get_actions(self, simulation):
+            for agent_id in simulation.deciding_agents():
+                assert not simulation.is_done(agent_id)
+            return super().get_actions(simulation)
+
+    simulation = TrackingMultiMouse()
+    simulation.run(CheckingRandom(seed=1), seed=1, store=str(tmp_path))
+
+    store = EpisodeStore(str(tmp_path))
+    data = store.load(0)
+    done = data[:, store.columns.index("done_0")].astype(bool)
+    action = data[:, store.columns.index("action_0_0")]
+    # After agent 0 is done, it has no actions
+    assert np.all(np.isnan(action[1:][done[:-1]]))
+
+
+def test_run_supports_policies_looping_over_all_agents(tmp_path):
+    class IndexLoopingPolicy:
+        """Acts like policies written before done agents were left out of decisions."""
+
+        rng = np.random.default_rng(0)
+
+        def get_actions(self, simulation):
+            actions = {}
+            for i in range(simulation.number_of_agents()):
+                assert list(simulation.get_observation(i)) == ["mouse_row", "mouse_col"]
+                actions[i] = self.rng.integers(4, size=1)
+            return actions
+
+    obs_yaml = tmp_path / "obs.yaml"
+    obs_yaml.write_text("observations:\n  - mouse_row\n  - mouse_col\n")
+    out_csv = tmp_path / "looping.csv"
+    simulation = MultiMouseAndCheese()
+    simulation.run(
+        IndexLoopingPolicy(), out_csv=str(out_csv), observation_yaml=str(obs_yaml)
+    )
+    table = pd.read_csv(out_csv)
+    assert table.iloc[-1][["done_0", "done_1", "done_2"]].all()
+    # Actions the policy returns for agents that are done are dropped
+    finished = table.done_0.to_numpy().nonzero()[0][0]
+    assert table.actions_0[finished + 1 :].astype(str).isin(["None", "nan"]).all()
+
+
+def test_run_with_decision_mask():
+    class AlternatingMultiMouse(MultiMouseAndCheese):
+        """Agent 0 only decides every other step, the others in every step."""
+
+        def decision_mask(self):
+            return [self.steps % 2 == 0, True, True]
+
+        def step(self):
+            if self.steps % 2 == 0:
+                assert 0 in self.action or self.is_done(0)
+            else:
+                assert 0 not in self.action
+            self.action = {i: self.action.get(i, np.array([1])) for i in range(3)}
+            super().step()
+
+    AlternatingMultiMouse().run(Random(seed=2), seed=2)
+
+    batch = BatchMouseAndCheese()
+    batch.reset()
+    batch.set_action({1: np.array([1])})
+    batch.step()
+    assert batch.decided.tolist() == [False, True, False]
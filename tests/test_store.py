@@ -0,0 +1,158 @@
+import numpy as np
+import pytest
+from examples.mouse.multi_mouse_env_pathmind import MultiMouseAndCheese
+
+import pathmind.simulation as simulation_module
+from pathmind.policy import Random
+from pathmind.simulation import Discrete, Simulation
+from pathmind.store import EpisodeStore
+
+
+def test_run_appends_episodes_to_store(tmp_path):
+    simulation = MultiMouseAndCheese()
+    simulation.run(Random(), num_episodes=3, store=str(tmp_path))
+
+    store = EpisodeStore(str(tmp_path))
+    assert store.episodes() == [0, 1, 2]
+    assert store.columns[:3] == ["episode", "step", "obs_0_mouse_row"]
+    assert "action_2_0" in store.columns
+    assert store.columns[-1] == "done_2"
+
+    episode = store.load(2)
+    assert isinstance(episode, np.memmap)
+    assert episode.shape == (store.index[2], len(store.columns))
+    assert np.all(episode[:, 0] == 2)
+    assert np.all(episode[-1, -3:] == 1)
+
+    rewards = store.load(1, columns=["reward_0_found_cheese", "reward_1_found_cheese"])
+    assert rewards.shape == (store.index[1], 2)
+    assert store.load(1, steps=slice(0, 1)).shape == (1, len(store.columns))
+
+    with pytest.raises(ValueError):
+        store.append(2, store.columns, episode)
+
+
+class CrashingRandom(Random):
+    def __init__(self, crash_after: int):
+        super().__init__()
+        self.calls = 0
+        self.crash_after = crash_after
+
+    def get_actions(self, simulation):
+        self.calls += 1
+        if self.calls > self.crash_after:
+            raise RuntimeError("Crash")
+        return super().get_actions(simulation)
+
+
+def test_resumed_runs_match_complete_runs(tmp_path):
+    simulation = MultiMouseAndCheese()
+    complete = tmp_path / "complete.csv"
+    simulation.run(Random(), num_episodes=6, seed=3, summary_csv=str(complete))
+
+    summary, store = tmp_path / "summary.csv", str(tmp_path / "store")
+    with pytest.raises(RuntimeError):
+        simulation.run(
+            CrashingRandom(crash_after=200),
+            num_episodes=6,
+            seed=3,
+            summary_csv=str(summary),
+            store=store,
+            fsync=1,
+        )
+    completed = len(summary.read_text().splitlines()) - 1
+    assert 0 < completed < 6
+    # A crash while writing leaves a partial line, which is not a completed episode
+    with open(summary, "a") as f:
+        f.write(f"{completed},0.")
+
+    simulation.run(
+        Random(),
+        num_episodes=6,
+        seed=3,
+        summary_csv=str(summary),
+        store=store,
+        resume=True,
+    )
+    assert summary.read_text() == complete.read_text()
+    assert EpisodeStore(store).episodes() == list(range(6))
+
+
+def test_resume_keeps_completed_runs(tmp_path):
+    summary = tmp_path / "summary.csv"
+    simulation = MultiMouseAndCheese()
+    simulation.run(Random(), num_episodes=2, seed=0, summary_csv=str(summary))
+    before = summary.read_text()
+
+    simulation.run(
+        CrashingRandom(crash_after=0),
+        num_episodes=2,
+        seed=0,
+        summary_csv=str(summary),
+        resume=True,
+    )
+    assert summary.read_text() == before
+
+    with pytest.raises(ValueError):
+        simulation.run(Random(), num_episodes=2, resume=True)
+
+
+def test_summary_is_only_appended_to(tmp_path, monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        simulation_module,
+        "write_table",
+        lambda table, out_csv: written.append(out_csv),
+    )
+    summary = tmp_path / "summary.csv"
+    MultiMouseAndCheese().run(Random(), num_episodes=3, summary_csv=str(summary))
+
+    assert str(summary) not in written
+    lines = summary.read_text().splitlines()
+    assert lines[0].startswith("Episode,reward_0_")
+    assert [line.split(",")[0] for line in lines[1:]] == ["0", "1", "2"]
+
+
+class Bystander(Simulation):
+    """Two agents, the second of which only decides in every other episode."""
+
+    resets = 0
+    steps = 0
+
+    def number_of_agents(self) -> int:
+        return 2
+
+    def action_space(self, agent_id):
+        return Discrete(2)
+
+    def reset(self) -> None:
+        self.resets += 1
+        self.steps = 0
+
+    def step(self) -> None:
+        self.steps += 1
+
+    def decision_mask(self):
+        return [True, self.resets % 2 == 0]
+
+    def get_observation(self, agent_id):
+        return {"steps": float(self.steps)}
+
+    def get_reward(self, agent_id):
+        return {"steps": self.steps}
+
+    def is_done(self, agent_id) -> bool:
+        return self.steps >= 3
+
+
+def test_store_keeps_columns_of_agents_that_never_decide(tmp_path):
+    Bystander().run(Random(), num_episodes=3, store=str(tmp_path))
+
+    store = EpisodeStore(str(tmp_path))
+    assert store.episodes() == [0, 1, 2]
+    assert "obs_1_steps" in store.columns and "action_1_0" in store.columns
+    decided = [
+        not np.isnan(store.load(episode, columns=["action_1_0"])).all()
+        for episode in store.episodes()
+    ]
+    assert decided == [True, False, True]
@@ -0,0 +1,85 @@
+import pytest
+from examples.inventory_management.fast_inventory_env_pathmind import (
+    FastInvManagementEnv,
+)
+
+from pathmind.policy import Random
+from pathmind.sweep import grid, random_search, sweep
+
+
+def explode(policy, simulation):
+    raise AssertionError("Cached cells must not run again")
+
+
+def test_grid_and_random_search():
+    assert grid(a=[1, 2], b=["x"]) == [{"a": 1, "b": "x"}, {"a": 2, "b": "x"}]
+
+    configs = random_search(5, seed=3, a=[1, 2, 3], b=lambda rng: rng.uniform(0, 1))
+    assert configs == random_search(
+        5, seed=3, a=[1, 2, 3], b=lambda rng: rng.uniform(0, 1)
+    )
+    assert all(config["a"] in [1, 2, 3] and 0 <= config["b"] < 1 for config in configs)
+
+
+def test_sweep_runs_all_cells_in_parallel_and_caches_them(tmp_path, monkeypatch):
+    configs = {"L": [(3, 5, 10), (1, 1, 1)], "backlog": [True, False], "periods": [10]}
+
+    table = sweep(
+        FastInvManagementEnv,
+        configs,
+        num_episodes=3,
+        seed=4,
+        processes=2,
+        cache=str(tmp_path),
+    )
+    assert table.field_names == [
+        "L",
+        "backlog",
+        "periods",
+        "Episodes",
+        "reward_0_reward_mean",
+        "reward_0_reward_std_error",
+    ]
+    assert len(table.rows) == 4
+    assert all(row[3] == 3 for row in table.rows)
+
+    sequential = sweep(FastInvManagementEnv, configs, num_episodes=3, seed=4)
+    assert sequential.rows == table.rows
+
+    # Same policy and cache key as before, but it can't run anymore
+    monkeypatch.setattr(Random, "get_actions", explode)
+    cached = sweep(
+        FastInvManagementEnv,
+        configs,
+        num_episodes=3,
+        seed=4,
+        cache=str(tmp_path),
+    )
+    assert cached.rows == table.rows
+
+
+class CrashingRandom(Random):
+    def get_actions(self, simulation):
+        raise RuntimeError("Crash")
+
+
+def failing_policy(config):
+    return CrashingRandom() if config["periods"] == 10 else Random()
+
+
+def test_sweep_caches_cells_as_they_complete(tmp_path):
+    configs = {"periods": [5, 10]}
+    with pytest.raises(RuntimeError):
+        sweep(
+            FastInvManagementEnv,
+            configs,
+            policy_factory=failing_policy,
+            num_episodes=2,
+            cache=str(tmp_path),
+        )
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+
+def test_sweep_rejects_unknown_parameters():
+    with pytest.raises(ValueError, match="perods"):
+        sweep(FastInvManagementEnv, {"perods": [5]}, num_episodes=1)
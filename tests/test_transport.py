@@ -0,0 +1,164 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from examples.mouse.multi_mouse_env_pathmind import MultiMouseAndCheese
+
+from pathmind.evaluation import StoppingRule
+from pathmind.policy import Random
+from pathmind.simulation import Discrete, Simulation
+from pathmind.transport import RingBuffer, StepLayout, _Channel
+
+
+class GrowingObservations(Simulation):
+    """Observations which change their shape every step, and can't use the ring buffer."""
+
+    steps = 0
+
+    def number_of_agents(self) -> int:
+        return 1
+
+    def action_space(self, agent_id: int) -> Discrete:
+        return Discrete(3)
+
+    def reset(self) -> None:
+        self.steps = 0
+
+    def step(self) -> None:
+        self.steps += 1
+
+    def get_observation(self, agent_id: int):
+        return {"history": list(range(self.steps + 1))}
+
+    def get_reward(self, agent_id: int):
+        return {"steps": self.steps}
+
+    def is_done(self, agent_id: int) -> bool:
+        return self.steps >= 4
+
+
+def test_ring_buffer_blocks_writers_while_full():
+    ring = RingBuffer(width=3, capacity=2)
+    ring.put(np.array([1.0, 2.0, 3.0]))
+    ring.put(np.array([4.0, 5.0, 6.0]))
+    assert not ring.free.acquire(timeout=0.01)
+
+    assert list(ring.get(timeout=1)) == [1.0, 2.0, 3.0]
+    ring.release()
+    ring.put(np.array([7.0, 8.0, 9.0]))
+    assert list(ring.get(timeout=1)) == [4.0, 5.0, 6.0]
+    ring.release()
+    assert list(ring.get(timeout=1)) == [7.0, 8.0, 9.0]
+    ring.release()
+    assert ring.get(timeout=0.01) is None
+    ring.close()
+
+
+def test_layout_round_trips_rows():
+    row = [3, 7, {"x": 1, "y": [0.5, 1.5]}, None]
+    row += [np.array([2]), None, {"r": 1.0}, {"r": 0.0}, False, True]
+    layout = StepLayout.infer(
+        [{"x": 0, "y": [0.0, 0.0]}, {"x": 0, "y": [0.0, 0.0]}],
+        [(1, np.int64), (1, np.int64)],
+        [{"r": 0.0}, {"r": 0.0}],
+    )
+    record = np.empty(layout.width)
+    assert layout.write(row, record)
+    actual = layout.read(record)
+    assert actual[:4] == row[:4]
+    assert list(actual[4]) == [2] and actual[5] is None
+    assert actual[6:] == row[6:]
+
+    # Decisions are flagged explicitly, so NaN values are kept as they are
+    continuous = StepLayout.infer([{"x": 0.0}], [(2, np.float64)], [{"r": 0.0}])
+    nan_row = [0, 1, {"x": np.nan}, np.array([np.nan, np.nan]), {"r": 0.0}, False]
+    nan_record = np.empty(continuous.width)
+    assert continuous.write(nan_row, nan_record)
+    actual = continuous.read(nan_record)
+    assert np.isnan(actual[2]["x"]) and np.isnan(actual[3]).all()
+
+    assert not layout.write([3, 8, {"x": 1, "y": [0.5]}] + row[3:], record)
+    assert StepLayout.infer([{"name": "mouse"}], [(1, np.int64)], [{}]) is None
+
+
+def test_channel_falls_back_to_queue():
+    layout = StepLayout.infer([{"x": [0.0]}], [(1, np.int64)], [{"r": 0.0}])
+    channel = _Channel(layout, capacity=4)
+    channel.send([0, 0, {"x": [1.0]}, np.array([1]), {"r": 1.0}, False])
+    channel.send([0, 1, {"x": [1.0, 2.0]}, np.array([2]), {"r": 2.0}, True])
+    rows = channel.receive(timeout=1)
+    while len(rows) < 2:
+        rows += channel.receive(timeout=1)
+    assert [row[2] for row in rows] == [{"x": [1.0]}, {"x": [1.0, 2.0]}]
+    channel.close()
+
+
+def test_streamed_runs_match_regular_runs(tmp_path):
+    simulation = MultiMouseAndCheese()
+    tables = []
+    for transport in [None, "shared_memory", "queue"]:
+        out_csv = tmp_path / f"{transport}.csv"
+        simulation.run(
+            Random(),
+            num_episodes=6,
+            seed=5,
+            processes=2,
+            transport=transport,
+            out_csv=str(out_csv),
+        )
+        tables.append(pd.read_csv(out_csv))
+    pd.testing.assert_frame_equal(tables[0], tables[1])
+    pd.testing.assert_frame_equal(tables[0], tables[2])
+
+
+def test_variable_observations_are_streamed_through_queue(tmp_path):
+    simulation = GrowingObservations()
+    simulation.run(
+        Random(),
+        num_episodes=3,
+        seed=0,
+        processes=2,
+        transport="shared_memory",
+        out_csv=str(tmp_path / "out.csv"),
+        summary_csv=str(tmp_path / "summary.csv"),
+    )
+    summary = pd.read_csv(tmp_path / "summary.csv")
+    assert list(summary.Episode) == [0, 1, 2]
+    assert all(summary.reward_0_steps == 4)
+
+
+class FailingRandom(Random):
+    def get_actions(self, simulation):
+        if simulation.steps > 20:
+            raise RuntimeError("Policy failed")
+        return super().get_actions(simulation)
+
+
+def shared_memory_segments() -> set:
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="Needs /dev/shm")
+def test_stopped_runs_release_shared_memory():
+    before = shared_memory_segments()
+    stopping = StoppingRule(ci_width=1e9, min_episodes=2)
+    MultiMouseAndCheese().run(
+        Random(),
+        num_episodes=50,
+        seed=0,
+        processes=2,
+        transport="shared_memory",
+        stopping=stopping,
+    )
+    assert shared_memory_segments() == before
+
+    with pytest.raises(RuntimeError):
+        MultiMouseAndCheese().run(
+            FailingRandom(),
+            num_episodes=4,
+            seed=0,
+            processes=2,
+            transport="shared_memory",
+        )
+    assert shared_memory_segments() == before